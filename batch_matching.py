@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Batch matching of client lists.
+
+Reads a CSV or JSON-lines file of profiles in chunks. Each chunk is matched in one pass
+with one answer lookup per distinct (area, category, housing) key. The results stream out
+as JSON lines (one object per profile) or CSV (one row per match), and throughput is
+reported at the end. The profile fields are those of the search form and of
+matching_api.py; the same batches can be sent to its POST /match/batch.
+
+Usage:
+    python batch_matching.py clients.csv -o matches.jsonl
+    python batch_matching.py clients.jsonl --output-format csv -o matches.csv
+    python batch_matching.py clients.csv > matches.jsonl
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from create_comprehensive_matches import TENDERS_XLSX_PATH
+from matching_api import BATCH_CHUNK_SIZE, BATCH_FORMATS, build_api_answer_table, iter_batch_results, read_profile_batch
+from tender_store import TenderStore
+
+def batch_format(path, default='jsonl'):
+    """'csv' or 'jsonl' from a file extension"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        return 'csv'
+    if suffix in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return default
+
+def write_batch_results(results, output_file):
+    """Write encoded batch results as they arrive and return the summed summary"""
+    stats = {'profiles': 0, 'errors': 0, 'matched_profiles': 0, 'matches': 0}
+    for encoded, summary in results:
+        output_file.write(encoded)
+        for name, count in summary.items():
+            stats[name] += count
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Match a whole list of client profiles against the tenders")
+    parser.add_argument('profiles', help="CSV or JSON-lines file of profiles, one per row or line")
+    parser.add_argument('-o', '--output', help="results file (default: standard output)")
+    parser.add_argument('--input-format', choices=BATCH_FORMATS, help="default: from the profiles file extension")
+    parser.add_argument('--output-format', choices=BATCH_FORMATS,
+                        help="default: from the output file extension, else jsonl")
+    parser.add_argument('--tenders', default=TENDERS_XLSX_PATH,
+                        help=f"tender workbook to match (default: {TENDERS_XLSX_PATH})")
+    parser.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE,
+                        help=f"profiles matched per pass (default: {BATCH_CHUNK_SIZE})")
+    args = parser.parse_args()
+    
+    input_format = args.input_format or batch_format(args.profiles, 'csv')
+    output_format = args.output_format or (batch_format(args.output) if args.output else 'jsonl')
+    tender_version = TenderStore(args.tenders, build_api_answer_table).current
+    
+    start = time.perf_counter()
+    results = iter_batch_results(read_profile_batch(args.profiles, input_format, args.chunk_size),
+                                 tender_version, output_format)
+    if args.output:
+        with open(args.output, 'wb') as output_file:
+            stats = write_batch_results(results, output_file)
+    else:
+        stats = write_batch_results(results, sys.stdout.buffer)
+    elapsed = time.perf_counter() - start
+    
+    # The report goes to stderr so it never mixes with results written to stdout
+    print(f"Matched {stats['profiles']} profiles in {elapsed:.2f}s "
+          f"({stats['profiles'] / elapsed:,.0f} profiles/s): {stats['matched_profiles']} with matches, "
+          f"{stats['matches']} matches, {stats['errors']} with errors", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
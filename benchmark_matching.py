@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the matching engines.
+
+Profiles are synthesized from the value ranges of the real profile table so that
+large volumes can be measured against the real tender workbook.
+
+Usage:
+    python benchmark_matching.py --profiles 2000
+    python benchmark_matching.py --profiles 200000 --skip-reference --workers 1,2,4,8,16
+    python benchmark_matching.py --memory-processes 4 --memory-tenders 20000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from create_comprehensive_matches import (
+    TENDERS_XLSX_PATH,
+    create_comprehensive_matching_table,
+    get_profile_category,
+    get_profile_categories,
+    iter_rendered_matches,
+    load_matching_data,
+    write_rendered_matches
+)
+
+AREAS = ['דרום', 'צפון', 'ירושלים', 'מרכז', 'יהודה ושומרון']
+DISABILITY_OPTIONS = ['', 'נכות קשה', '100% ומעלה']
+
+def make_synthetic_profiles(count, seed=0):
+    """Generate a profile table with the same columns as 'טבלת הפרופילים.csv'"""
+    rng = np.random.default_rng(seed)
+    disability = rng.choice(DISABILITY_OPTIONS, size=count, p=[0.8, 0.1, 0.1])
+    return pd.DataFrame({
+        'מספר_פרופיל': [f"P{i + 1:07d}" for i in range(count)],
+        'חסר_דיור': rng.choice(['כן', 'לא'], size=count),
+        'אזור_מועדף': rng.choice(AREAS, size=count),
+        'בן/בת_זוג_זכאי': rng.choice(['כן', 'לא'], size=count),
+        'סיווג_נכות': pd.Series(disability).replace('', np.nan),
+        'ימי_מילואים_מ-7.10.23': rng.integers(0, 120, size=count),
+        'תעודת_מילואים_פעיל': rng.choice(['כן', 'לא'], size=count),
+        'ימי_מילואים_ב-6_שנים': rng.integers(0, 160, size=count),
+    })
+
+def best_time(func, repeat=3):
+    """Return the best wall-clock time of several runs, and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_comprehensive_engines(profiles_df, tenders_df, repeat=3, with_reference=True):
+    """Time every comprehensive matching engine and check they agree with the reference loop"""
+    print(f"\n=== create_comprehensive_matching_table: {len(profiles_df)} profiles × {len(tenders_df)} tenders ===")
+    engines = ['vectorized', 'grouped']
+    if with_reference:
+        engines.insert(0, 'iterrows')
+
+    reference_time, reference = None, None
+    for engine in engines:
+        elapsed, result = best_time(
+            lambda: create_comprehensive_matching_table(profiles_df, tenders_df, engine=engine),
+            repeat=1 if engine == 'iterrows' else repeat)
+        if reference is None:
+            reference_time, reference = elapsed, result
+            print(f"{engine:<12} {elapsed:9.3f}s  (reference, {len(reference)} rows)")
+            continue
+        pd.testing.assert_frame_equal(reference, result)
+        print(f"{engine:<12} {elapsed:9.3f}s  speedup ×{reference_time / elapsed:,.1f}")
+
+def bench_categorizer(profiles_df, repeat=3):
+    """Time the row-wise and column-wise profile categorizers"""
+    print(f"\n=== profile categories: {len(profiles_df)} profiles ===")
+    row_time, row_result = best_time(lambda: profiles_df.apply(get_profile_category, axis=1), repeat=1)
+    column_time, column_result = best_time(lambda: get_profile_categories(profiles_df), repeat=repeat)
+    assert row_result.tolist() == column_result.tolist()
+    print(f"{'apply':<12} {row_time:9.3f}s")
+    print(f"{'np.select':<12} {column_time:9.3f}s  speedup ×{row_time / column_time:,.1f}")
+
+def bench_workers(profiles_df, tenders_df, worker_counts, repeat=3):
+    """Scaling curve of the sharded full-table export (pool start-up and CSV writing included)"""
+    print(f"\n=== parallel export: {len(profiles_df)} profiles, {os.cpu_count()} CPUs available ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profiles_path = os.path.join(tmp_dir, 'profiles.csv')
+        profiles_df.to_csv(profiles_path, index=False)
+        baseline_time, baseline = None, None
+        for workers in worker_counts:
+            output_path = os.path.join(tmp_dir, f'matches_{workers}.csv')
+            elapsed, _ = best_time(lambda: write_rendered_matches(
+                iter_rendered_matches(profiles_path, tenders_df, max_memory_mb=None, workers=workers),
+                output_path), repeat=repeat)
+            with open(output_path, 'rb') as output_file:
+                output = output_file.read()
+            if baseline is None:
+                baseline_time, baseline = elapsed, output
+            else:
+                assert output == baseline, f"workers={workers} output differs from workers={worker_counts[0]}"
+            speedup = baseline_time / elapsed
+            print(f"workers={workers:<3} {elapsed:9.3f}s  speedup ×{speedup:5.2f}  efficiency {speedup / workers:6.1%}")
+
+def _proc_memory_kb(pid, field):
+    """A memory figure of a process in kB: VmRSS from status, Pss from smaps_rollup (Linux)"""
+    source = 'status' if field == 'VmRSS' else 'smaps_rollup'
+    with open(f"/proc/{pid}/{source}") as proc_file:
+        for line in proc_file:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+def _hold_tender_store(path, shared_dir, ready, done):
+    """Process body of bench_process_memory: load the tenders as an app process does, then wait"""
+    if shared_dir:
+        os.environ['TENDER_SHARED_DIR'] = shared_dir
+    import ui_data
+    from tender_store import TenderStore
+    store = TenderStore(path, ui_data._build_answer_table)
+    ready.put(os.getpid())
+    done.wait()
+    return store
+
+def bench_process_memory(path, process_count, tenders_count=None):
+    """Resident memory of app processes with per-process and with shared tender arrays.
+
+    Each process imports ui_data and builds a TenderStore of the same file, as a Streamlit
+    server process does. PSS splits shared pages between the processes that map them, so
+    its sum is what the processes cost together.
+    """
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tenders_df = pd.read_excel(path) if str(path).endswith('.xlsx') else pd.read_csv(path)
+        if tenders_count:
+            # Tile the workbook to the requested size, with distinct tender numbers
+            tenders_df = tenders_df.iloc[np.arange(tenders_count) % len(tenders_df)].reset_index(drop=True)
+            tenders_df['מספר המכרז'] = [f"{number}#{row}" for row, number in enumerate(tenders_df['מספר המכרז'])]
+        path = os.path.join(tmp_dir, 'tenders.csv')
+        tenders_df.to_csv(path, index=False)
+
+        print(f"\n=== app process memory: {process_count} processes, {len(tenders_df)} tenders ===")
+        for mode, shared_dir in [('per-process', None), ('shared', os.path.join(tmp_dir, 'shared'))]:
+            ready, done = context.Queue(), context.Event()
+            processes = [context.Process(target=_hold_tender_store, args=(path, shared_dir, ready, done))
+                         for _ in range(process_count)]
+            for process in processes:
+                process.start()
+            pids = [ready.get() for _ in processes]
+            rss = [_proc_memory_kb(pid, 'VmRSS') for pid in pids]
+            pss = [_proc_memory_kb(pid, 'Pss') for pid in pids]
+            done.set()
+            for process in processes:
+                process.join()
+            print(f"{mode:<12} RSS per process {np.mean(rss) / 1024:7.1f} MB  "
+                  f"PSS per process {np.mean(pss) / 1024:7.1f} MB  PSS total {sum(pss) / 1024:7.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tender matching engines")
+    parser.add_argument('--profiles', type=int, default=2000, help="number of synthetic profiles")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement (best is reported)")
+    parser.add_argument('--skip-reference', action='store_true',
+                        help="do not time the slow iterrows reference loop")
+    parser.add_argument('--workers', default='',
+                        help="comma-separated worker counts for the scaling curve, e.g. 1,2,4,8,16")
+    parser.add_argument('--memory-processes', type=int, default=0,
+                        help="also measure the memory of this many app processes, per-process vs shared arrays")
+    parser.add_argument('--memory-tenders', type=int,
+                        help="tile the workbook to this many tenders for the memory measurement")
+    args = parser.parse_args()
+
+    _, tenders_df = load_matching_data()
+    profiles_df = make_synthetic_profiles(args.profiles)
+    bench_categorizer(profiles_df, repeat=args.repeat)
+    bench_comprehensive_engines(profiles_df, tenders_df, repeat=args.repeat,
+                                with_reference=not args.skip_reference)
+    if args.workers:
+        bench_workers(profiles_df, tenders_df, [int(count) for count in args.workers.split(',')], repeat=args.repeat)
+    if args.memory_processes:
+        bench_process_memory(TENDERS_XLSX_PATH, args.memory_processes, args.memory_tenders)
+
+if __name__ == "__main__":
+    main()
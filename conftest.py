@@ -0,0 +1,9 @@
+import pytest
+
+import tender_data
+
+
+@pytest.fixture(autouse=True)
+def isolated_snapshots(tmp_path, monkeypatch):
+    """כל טסט כותב את קבצי ה-snapshot לתיקייה זמנית משלו"""
+    monkeypatch.setattr(tender_data, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
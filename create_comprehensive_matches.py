@@ -1,6 +1,14 @@
+import argparse
+import codecs
+import copy
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from tender_data import file_hash, read_profile_table, read_tender_table, tender_deadlines
 
 def is_miluim_soldier(days_since_oct, has_active_card, days_in_6_years):
     """Check if profile qualifies as miluim soldier"""
@@ -29,66 +37,478 @@ def get_profile_category(row):
     else:
         return 'אחר'
 
+def validate_profile_data(profile_data):
+    """Validate profile data and return error messages if any"""
+    errors = []
+    
+    # Check required fields
+    if not profile_data.get('אזור_מועדף'):
+        errors.append("יש לבחור אזור מועדף")
+    
+    # Check logical consistency
+    if (profile_data.get('ימי_מילואים_מ-7.10.23', 0) == 0 and 
+        profile_data.get('תעודת_מילואים_פעיל') == 'לא' and 
+        profile_data.get('ימי_מילואים_ב-6_שנים', 0) == 0 and
+        profile_data.get('סיווג_נכות') == 'אין'):
+        errors.append("על פי הנתונים שהזנת, אינך זכאי להטבות מכרזי דיור מיוחדים")
+    
+    return errors
+
+PROFILE_CATEGORIES = ['נכי צהל וחיילי מילואים', 'נכי צהל', 'חיילי מילואים', 'אחר']
+
+def get_profile_categories(profiles_df):
+    """Column-wise get_profile_category for a whole profile table, returned as a pandas Categorical"""
+    is_disabled = profiles_df['סיווג_נכות'].isin(['נכות קשה', '100% ומעלה']).to_numpy(dtype=bool)
+    is_miluim = ((profiles_df['ימי_מילואים_מ-7.10.23'] >= 45).to_numpy(dtype=bool) |
+                 (profiles_df['תעודת_מילואים_פעיל'] == 'כן').to_numpy(dtype=bool) |
+                 (profiles_df['ימי_מילואים_ב-6_שנים'] >= 80).to_numpy(dtype=bool))
+    
+    categories = np.select(
+        [is_disabled & is_miluim, is_disabled, is_miluim],
+        PROFILE_CATEGORIES[:3],
+        default='אחר'
+    )
+    return pd.Categorical(categories, categories=PROFILE_CATEGORIES)
+
 def check_area_match(profile_area, tender_area):
     """Check if profile preferred area matches tender geographical area"""
     return profile_area == tender_area
 
-def check_eligibility_match(profile_category, tender_eligibility):
-    """Check if profile category is eligible for tender"""
-    # Clean up the tender eligibility text
+# Free-text markers used by the tender columns 'מי רשאי להגיש' and 'סטטוס דיור נדרש'
+DISABLED_VETERAN_TERMS = ['נכי צה"ל', 'נכי צהל', 'נכי צה״ל']  # incl. Hebrew quotation mark
+HOMELESS_TERMS = ['חסרי דיור', 'מחוסרי דיור', 'חסרי דירה']
+
+TENDER_FLAG_COLUMNS = ['open_to_all', 'disabled_ok', 'miluim_ok', 'requires_homeless', 'unspecified_housing']
+
+def parse_eligibility_flags(tender_eligibility):
+    """Parse 'מי רשאי להגיש' text into (open_to_all, disabled_ok, miluim_ok)"""
     tender_eligibility = str(tender_eligibility).strip()
+    open_to_all = 'כולם' in tender_eligibility
+    disabled_ok = any(term in tender_eligibility for term in DISABLED_VETERAN_TERMS)
+    miluim_ok = 'חיילי מילואים' in tender_eligibility
+    return open_to_all, disabled_ok, miluim_ok
+
+def parse_housing_flags(tender_housing_req):
+    """Parse 'סטטוס דיור נדרש' text into (requires_homeless, unspecified_housing)"""
+    tender_housing_req = str(tender_housing_req).strip()
+    requires_homeless = any(term in tender_housing_req for term in HOMELESS_TERMS)
+    unspecified_housing = ('לא צוין' in tender_housing_req or
+                           tender_housing_req == '' or
+                           tender_housing_req == 'nan')
+    return requires_homeless, unspecified_housing
+
+def _contains_any(text, terms):
+    """Vectorized 'any term in text' over a string Series"""
+    mask = np.zeros(len(text), dtype=bool)
+    for term in terms:
+        mask |= text.str.contains(term, regex=False).to_numpy(dtype=bool)
+    return mask
+
+def add_tender_flags(tenders_df):
+    """Pre-parse the free-text tender columns into boolean flag columns, once per load"""
+    tenders_df = tenders_df.copy()
+    eligibility = tenders_df['מי רשאי להגיש'].map(str).str.strip()
+    housing_req = tenders_df['סטטוס דיור נדרש'].map(str).str.strip()
     
-    # Check for "כולם" (everyone)
-    if 'כולם' in tender_eligibility:
-        return True
-    
-    # NEW: Check for dual eligibility - gets access to ALL relevant tenders
+    tenders_df['open_to_all'] = _contains_any(eligibility, ['כולם'])
+    tenders_df['disabled_ok'] = _contains_any(eligibility, DISABLED_VETERAN_TERMS)
+    tenders_df['miluim_ok'] = _contains_any(eligibility, ['חיילי מילואים'])
+    tenders_df['requires_homeless'] = _contains_any(housing_req, HOMELESS_TERMS)
+    tenders_df['unspecified_housing'] = (_contains_any(housing_req, ['לא צוין']) |
+                                         housing_req.isin(['', 'nan']).to_numpy(dtype=bool))
+    return tenders_df
+
+def ensure_tender_flags(tenders_df):
+    """Return tenders_df with flag columns, parsing the text only if they are missing"""
+    if all(column in tenders_df.columns for column in TENDER_FLAG_COLUMNS):
+        return tenders_df
+    return add_tender_flags(tenders_df)
+
+def eligibility_match_from_flags(profile_category, open_to_all, disabled_ok, miluim_ok):
+    """Check eligibility against pre-parsed tender flags (scalars or NumPy arrays)"""
+    # Dual eligibility gets access to ALL relevant tenders
     if profile_category == 'נכי צהל וחיילי מילואים':
-        # Eligible for disabled veterans tenders
-        disabled_match = ('נכי צה"ל' in tender_eligibility or 
-                         'נכי צהל' in tender_eligibility or
-                         'נכי צה״ל' in tender_eligibility)
-        # Eligible for reservists tenders
-        miluim_match = 'חיילי מילואים' in tender_eligibility
-        # Return True if eligible for either category
-        return disabled_match or miluim_match
-    
-    # Check specific single categories
+        return open_to_all | disabled_ok | miluim_ok
     elif profile_category == 'נכי צהל':
-        return ('נכי צה"ל' in tender_eligibility or 
-                'נכי צהל' in tender_eligibility or
-                'נכי צה״ל' in tender_eligibility)  # Hebrew quotation mark
+        return open_to_all | disabled_ok
     elif profile_category == 'חיילי מילואים':
-        return 'חיילי מילואים' in tender_eligibility
-    
-    return False
+        return open_to_all | miluim_ok
+    return open_to_all
 
-def check_housing_match(profile_housing_need, tender_housing_req):
-    """Check housing requirement match"""
-    # Clean up the tender housing requirement text
-    tender_housing_req = str(tender_housing_req).strip()
-    
+def housing_match_from_flags(profile_housing_need, requires_homeless, unspecified_housing):
+    """Check housing requirement against pre-parsed tender flags (scalars or NumPy arrays)"""
     # If profile needs housing (חסר דיור = כן)
     if profile_housing_need == 'כן':
         # Must require housing shortage OR not specify housing requirement
-        return ('חסרי דיור' in tender_housing_req or 
-                'מחוסרי דיור' in tender_housing_req or 
-                'חסרי דירה' in tender_housing_req or
-                'לא צוין' in tender_housing_req or
-                tender_housing_req == '' or
-                tender_housing_req == 'nan')
-    else:
-        # If profile doesn't need housing, we can ignore tenders that require housing shortage
-        # But we can still match with tenders that don't require it
-        return ('חסרי דיור' not in tender_housing_req and 
-                'מחוסרי דיור' not in tender_housing_req and 
-                'חסרי דירה' not in tender_housing_req)
-
-def create_comprehensive_matching_table():
-    """Create comprehensive matching table with detailed information"""
+        return requires_homeless | unspecified_housing
+    # If profile doesn't need housing, we can ignore tenders that require housing shortage
+    return np.logical_not(requires_homeless)
+
+def check_eligibility_match(profile_category, tender_eligibility):
+    """Check if profile category is eligible for tender"""
+    return bool(eligibility_match_from_flags(profile_category, *parse_eligibility_flags(tender_eligibility)))
+
+def check_housing_match(profile_housing_need, tender_housing_req):
+    """Check housing requirement match"""
+    return bool(housing_match_from_flags(profile_housing_need, *parse_housing_flags(tender_housing_req)))
+
+def _tender_eligibility_masks(tenders_df, categories):
+    """Eligibility of every tender at once, one mask per profile category"""
+    flags = [tenders_df[column].to_numpy(dtype=bool) for column in ['open_to_all', 'disabled_ok', 'miluim_ok']]
+    masks = [eligibility_match_from_flags(category, *flags) for category in categories]
+    return np.array(masks, dtype=bool).reshape(len(categories), len(tenders_df))
+
+def _tender_housing_masks(tenders_df):
+    """Housing match of every tender at once: row 0 for profiles without need, row 1 for 'כן'"""
+    flags = [tenders_df[column].to_numpy(dtype=bool) for column in ['requires_homeless', 'unspecified_housing']]
+    return np.array([housing_match_from_flags('לא', *flags), housing_match_from_flags('כן', *flags)],
+                    dtype=bool).reshape(2, len(tenders_df))
+
+def vectorized_match_positions(profiles_df, tender_index):
+    """(profile_idx, tender_idx) of all matches, one boolean cross join per area bucket"""
+    tenders_df = tender_index.tenders_df
+    category_codes, categories = pd.factorize(profiles_df['קטגוריה'])
+    needs_housing = (profiles_df['חסר_דיור'] == 'כן').to_numpy().astype(np.intp)
+    eligibility_masks = _tender_eligibility_masks(tenders_df, list(categories))
+    housing_masks = _tender_housing_masks(tenders_df)
+    
+    profile_parts, tender_parts = [], []
+    for area, profile_positions in profiles_df.groupby('אזור_מועדף', sort=False).indices.items():
+        candidates = tender_index.candidates(area)
+        if len(candidates) == 0:
+            continue
+        # Area already matches inside the bucket: only eligibility and housing remain
+        mask = (eligibility_masks[category_codes[profile_positions]][:, candidates] &
+                housing_masks[needs_housing[profile_positions]][:, candidates])
+        rows, columns = np.nonzero(mask)
+        profile_parts.append(profile_positions[rows])
+        tender_parts.append(candidates[columns])
+    
+    if not profile_parts:
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    profile_idx = np.concatenate(profile_parts)
+    tender_idx = np.concatenate(tender_parts)
+    # Restore profile-major, tender-minor order
+    order = np.lexsort((tender_idx, profile_idx))
+    return profile_idx[order], tender_idx[order]
+
+class TenderAreaIndex:
+    """Tender positions bucketed by 'אזור גיאוגרפי ', built once per data load.
+    
+    Area matching is plain equality, so a profile only ever needs the bucket of its own
+    area; eligibility and housing are then checked on that bucket's flags alone.
+    """
+    
+    def __init__(self, tenders_df):
+        self.tenders_df = ensure_tender_flags(tenders_df)
+        self.buckets = {area: np.asarray(positions, dtype=np.intp)
+                        for area, positions in self.tenders_df.groupby('אזור גיאוגרפי ', sort=False).indices.items()}
+        self._flags = {column: self.tenders_df[column].to_numpy(dtype=bool) for column in TENDER_FLAG_COLUMNS}
+    
+    def candidates(self, profile_area):
+        """Positions of the tenders in the profile's area"""
+        return self.buckets.get(profile_area, np.array([], dtype=np.intp))
+    
+    def match_positions(self, profile_area, profile_category, profile_housing_need):
+        """Positions of the tenders matching one (area, category, housing) key, in table order"""
+        candidates = self.candidates(profile_area)
+        flags = self._flags
+        eligibility_mask = eligibility_match_from_flags(
+            profile_category, flags['open_to_all'][candidates], flags['disabled_ok'][candidates], flags['miluim_ok'][candidates])
+        housing_mask = housing_match_from_flags(
+            profile_housing_need, flags['requires_homeless'][candidates], flags['unspecified_housing'][candidates])
+        return candidates[eligibility_mask & housing_mask]
+    
+    @property
+    def deadlines(self):
+        """Deadline of every tender, see tender_deadlines"""
+        return tender_deadlines(self.tenders_df)
+
+def _as_datetime64(as_of):
+    """A point in time as datetime64[ns]; None means now"""
+    return np.datetime64(pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of), 'ns')
+
+class TenderDeadlineIndex:
+    """Tender positions sorted by deadline, for expiry cut-offs by binary search.
+    
+    A tender is open while its deadline is at or after `as_of`. Tenders without a deadline
+    (NaT) sort last and are always treated as open, since nothing says they closed. A
+    cancelled tender has CLOSED_DEADLINE (see tender_deadlines), so it sorts first and is
+    always expired.
+    """
+    
+    def __init__(self, deadlines, positions=None):
+        deadlines = np.asarray(deadlines, dtype='datetime64[ns]')
+        if positions is None:
+            positions = np.arange(len(deadlines), dtype=np.intp)
+        order = np.argsort(deadlines[positions], kind='stable')
+        self.positions = np.asarray(positions, dtype=np.intp)[order]
+        self.deadlines = deadlines[self.positions]
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def expired_count(self, as_of=None):
+        """Number of tenders whose deadline is before as_of"""
+        return int(np.searchsorted(self.deadlines, _as_datetime64(as_of), side='left'))
+    
+    def open_positions(self, as_of=None):
+        """Positions of the tenders still open at as_of, soonest deadline first"""
+        return self.positions[self.expired_count(as_of):]
+    
+    def closing_within(self, days, as_of=None):
+        """Positions of the open tenders whose deadline is within `days` days of as_of, soonest first"""
+        start = _as_datetime64(as_of)
+        end = start + np.timedelta64(int(days * 24 * 3600 * 10**9), 'ns')
+        return self.positions[np.searchsorted(self.deadlines, start, side='left'):
+                              np.searchsorted(self.deadlines, end, side='right')]
+    
+    def next_expiry(self, as_of=None):
+        """Earliest deadline at or after as_of, or None if no open tender has one"""
+        deadline = self.deadlines[self.expired_count(as_of):][:1]
+        return None if len(deadline) == 0 or np.isnat(deadline[0]) else pd.Timestamp(deadline[0])
+
+class TenderAnswerTable:
+    """Matching tender positions for every (area, category, housing need) key, built once per data load.
+    
+    Those three fields are all a profile contributes to matching, so the few dozen possible
+    answers are materialized up front and a query is a dictionary lookup. Each answer also
+    has a TenderDeadlineIndex, so expired tenders are cut off by binary search.
+    """
+    
+    def __init__(self, tender_index):
+        self.tender_index = tender_index
+        self.tenders_df = tender_index.tenders_df
+        self.answers = {(area, category, housing_need): tender_index.match_positions(area, category, housing_need)
+                        for area in tender_index.buckets
+                        for category in PROFILE_CATEGORIES
+                        for housing_need in ('לא', 'כן')}
+        self.deadlines = np.asarray(tender_index.deadlines, dtype='datetime64[ns]')
+        self._index_deadlines()
+    
+    def _index_deadlines(self):
+        self.deadline_index = TenderDeadlineIndex(self.deadlines, np.unique(np.concatenate(
+            [np.array([], dtype=np.intp)] + list(self.answers.values()))))
+        self.answer_deadlines = {key: TenderDeadlineIndex(self.deadlines, positions)
+                                 for key, positions in self.answers.items()}
+    
+    def matching_key(self, profile_area, profile_category, profile_housing_need):
+        """The (area, category, housing need) key of the answers; equal keys have equal answers"""
+        # Every housing value other than 'כן' matches like 'לא'
+        housing_need = 'כן' if profile_housing_need == 'כן' else 'לא'
+        return profile_area, profile_category, housing_need
+    
+    def lookup(self, profile_area, profile_category, profile_housing_need, as_of=None):
+        """Positions of the tenders matching one key, in table order; with as_of, only those still open"""
+        key = self.matching_key(profile_area, profile_category, profile_housing_need)
+        positions = self.answers.get(key, np.array([], dtype=np.intp))
+        if as_of is None or len(positions) == 0:
+            return positions
+        deadline_index = self.answer_deadlines[key]
+        expired = deadline_index.expired_count(as_of)
+        if expired == 0:
+            return positions
+        return np.sort(deadline_index.positions[expired:])
+    
+    def closing_within(self, profile_area, profile_category, profile_housing_need, days, as_of=None):
+        """Positions of the matching tenders that close within `days` days of as_of, soonest first"""
+        deadline_index = self.answer_deadlines.get(self.matching_key(profile_area, profile_category, profile_housing_need))
+        if deadline_index is None:
+            return np.array([], dtype=np.intp)
+        return deadline_index.closing_within(days, as_of)
+    
+    def next_expiry(self, as_of=None):
+        """Earliest deadline of any answered tender at or after as_of, or None"""
+        return self.deadline_index.next_expiry(as_of)
+    
+    def without_expired(self, as_of=None):
+        """A copy of the table whose answers drop the tenders expired at as_of.
+        
+        tenders_df is shared and positions keep their meaning; self is left untouched.
+        """
+        table = copy.copy(self)
+        table.answers = {key: self.lookup(*key, as_of=_as_datetime64(as_of)) for key in self.answers}
+        table._index_deadlines()
+        return table
+
+class ProfileIndex:
+    """Profile positions bucketed by (area, category, housing need), for tender → profiles lookups.
+    
+    Categories come from get_profile_categories, the column-wise get_profile_category. A tender
+    row selects at most eight buckets in its area (four categories × two housing needs), so a
+    lookup costs a few dict hits and one concatenation instead of a scan of the profile table.
+    """
+    
+    def __init__(self, profiles_df):
+        self.profile_ids = profiles_df['מספר_פרופיל'].to_numpy()
+        keys = pd.DataFrame({
+            'אזור_מועדף': profiles_df['אזור_מועדף'].to_numpy(dtype=object),
+            'קטגוריה': np.asarray(get_profile_categories(profiles_df), dtype=object),
+            'חסר_דיור': np.where(profiles_df['חסר_דיור'] == 'כן', 'כן', 'לא'),
+        })
+        # Profiles without an area never match (area matching is equality), so they are left out
+        self.buckets = {key: np.asarray(positions, dtype=np.intp)
+                        for key, positions in keys.groupby(list(keys.columns), sort=False).indices.items()}
+    
+    def eligible_positions(self, tender):
+        """Positions of the profiles a tender row matches, bucket by bucket in profile-table order"""
+        if all(column in tender for column in TENDER_FLAG_COLUMNS):
+            eligibility_flags = (tender['open_to_all'], tender['disabled_ok'], tender['miluim_ok'])
+            housing_flags = (tender['requires_homeless'], tender['unspecified_housing'])
+        else:
+            eligibility_flags = parse_eligibility_flags(tender['מי רשאי להגיש'])
+            housing_flags = parse_housing_flags(tender['סטטוס דיור נדרש'])
+        
+        area = tender['אזור גיאוגרפי ']
+        parts = [self.buckets[(area, category, housing_need)]
+                 for category in PROFILE_CATEGORIES if eligibility_match_from_flags(category, *eligibility_flags)
+                 for housing_need in ('לא', 'כן') if housing_match_from_flags(housing_need, *housing_flags)
+                 if (area, category, housing_need) in self.buckets]
+        return np.concatenate(parts) if parts else np.array([], dtype=np.intp)
+    
+    def eligible_profiles(self, tender):
+        """IDs of the profiles a tender row matches"""
+        return self.profile_ids[self.eligible_positions(tender)]
+
+def find_profiles_for_tenders(tender_numbers, profiles_df=None, tenders_df=None):
+    """Eligible profile IDs for each of a batch of tenders, keyed by 'מספר המכרז'"""
+    if profiles_df is None or tenders_df is None:
+        loaded_profiles, loaded_tenders = load_matching_data()
+        profiles_df = loaded_profiles if profiles_df is None else profiles_df
+        tenders_df = loaded_tenders if tenders_df is None else tenders_df
+    
+    tenders_by_number = add_tender_flags(tenders_df).set_index(tenders_df['מספר המכרז'].astype(str))
+    unknown = [number for number in tender_numbers if str(number) not in tenders_by_number.index]
+    if unknown:
+        raise ValueError(f"Unknown tender numbers: {', '.join(map(str, unknown))}")
+    
+    profile_index = ProfileIndex(profiles_df)
+    return {number: profile_index.eligible_profiles(tenders_by_number.loc[str(number)]) for number in tender_numbers}
+
+def matching_key_groups(profiles_df):
+    """Group profiles by the only fields matching depends on: (area, category, housing need).
+    
+    Returns a group id per profile and a DataFrame with one key row per group. Housing need is
+    normalized to 'כן' / 'לא' since every value other than 'כן' matches the same way.
+    """
+    keys = pd.DataFrame({
+        'אזור_מועדף': profiles_df['אזור_מועדף'].to_numpy(dtype=object),
+        'קטגוריה': profiles_df['קטגוריה'].to_numpy(dtype=object),
+        'חסר_דיור': np.where(profiles_df['חסר_דיור'] == 'כן', 'כן', 'לא'),
+    })
+    group_ids = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+    _, first_rows = np.unique(group_ids, return_index=True)
+    return group_ids, keys.iloc[first_rows].reset_index(drop=True)
+
+def grouped_match_positions(profiles_df, tender_index):
+    """(profile_idx, tender_idx) of all matches, computing the tender set once per key group"""
+    group_ids, group_keys = matching_key_groups(profiles_df)
+    group_tenders = [tender_index.match_positions(*key) for key in group_keys.itertuples(index=False)]
+    
+    # Expand each group's tender set to its profiles, keeping profile-major order
+    counts = np.array([len(positions) for positions in group_tenders], dtype=np.intp)[group_ids]
+    profile_idx = np.repeat(np.arange(len(profiles_df)), counts)
+    tender_idx = (np.concatenate([group_tenders[group_id] for group_id in group_ids])
+                  if len(group_ids) else np.array([], dtype=np.intp))
+    return profile_idx, tender_idx
+
+# Output column -> (source table, source column) for the comprehensive matching table
+COMPREHENSIVE_COLUMNS = [
+    ('מספר_פרופיל', 'profile', 'מספר_פרופיל'),
+    ('מספר_מכרז', 'tender', 'מספר המכרז'),
+    ('עיר', 'tender', 'עיר'),
+    ('שכונה', 'tender', 'שכונה'),
+    ('אזור_גיאוגרפי', 'tender', 'אזור גיאוגרפי '),
+    ('אזור_עדיפות', 'tender', 'אזור עדיפות'),
+    ('קטגוריית_פרופיל', 'profile', 'קטגוריה'),
+    ('חסר_דיור', 'profile', 'חסר_דיור'),
+    ('סיווג_נכות', 'profile', 'סיווג_נכות'),
+    ('ימי_מילואים_מ-7.10.23', 'profile', 'ימי_מילואים_מ-7.10.23'),
+    ('תעודת_מילואים_פעיל', 'profile', 'תעודת_מילואים_פעיל'),
+    ('ימי_מילואים_ב-6_שנים', 'profile', 'ימי_מילואים_ב-6_שנים'),
+    ('בן/בת_זוג_זכאי', 'profile', 'בן/בת_זוג_זכאי'),
+    ('מי_רשאי_להגיש', 'tender', 'מי רשאי להגיש'),
+    ('סטטוס_דיור_נדרש', 'tender', 'סטטוס דיור נדרש'),
+    ('מספר_מגרשים', 'tender', 'מספר מגרשים'),
+    ('מגרשים_לנכי_צהל', 'tender', 'כמה מגרשים בעדיפות בהגרלה לנכי צה"ל'),
+    ('מגרשים_לחיילי_מילואים', 'tender', 'כמה מגרשים בעדיפות בהגרלה לחיילי מילואים'),
+    ('תאריך_פרסום', 'tender', 'תאריך פרסום חוברת'),
+    ('מועד_אחרון_להגשה', 'tender', 'מועד אחרון להגשת הצעות'),
+]
+
+SCORE_COLUMNS = ['עובר_אזור', 'עובר_זכאות', 'עובר_חסר_דיור', 'ציון_סופי']
+
+def build_comprehensive_rows(profiles_df, tenders_df, profile_idx, tender_idx):
+    """Materialize comprehensive matching rows for the given (profile, tender) positions"""
+    columns = {}
+    for output_column, source, source_column in COMPREHENSIVE_COLUMNS:
+        frame, positions = (profiles_df, profile_idx) if source == 'profile' else (tenders_df, tender_idx)
+        # take() keeps the source dtype, so every chunk of a streamed table is typed alike
+        values = frame[source_column].take(positions).reset_index(drop=True)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(values.cat.categories.dtype)
+        columns[output_column] = values
+    for score_column in SCORE_COLUMNS:
+        columns[score_column] = np.ones(len(profile_idx))
+    return pd.DataFrame(columns)
+
+PROFILES_CSV_PATH = 'data/csv_output/טבלת הפרופילים.csv'
+TENDERS_XLSX_PATH = 'data/טבלת מכרזים יולי 25.xlsx'
+COMPREHENSIVE_OUTPUT_PATH = 'data/csv_output/טבלת_התאמות_מקיפה.csv'
+TENDER_SNAPSHOT_PATH = 'data/csv_output/tender_snapshot.json'
+
+def load_matching_data(tenders_path=TENDERS_XLSX_PATH):
+    """Load the profile and tender tables used by the comprehensive matcher"""
+    profiles_df = read_profile_table(PROFILES_CSV_PATH)
+    tenders_df = read_tender_table(tenders_path)
+    return profiles_df, tenders_df
+
+def match_profiles(profiles_df, tender_index, engine='vectorized'):
+    """Match a profile table against an indexed tender table and return the comprehensive rows"""
+    profiles_df = profiles_df.copy()
+    profiles_df['קטגוריה'] = get_profile_categories(profiles_df)
+    
+    match_positions = vectorized_match_positions if engine == 'vectorized' else grouped_match_positions
+    profile_idx, tender_idx = match_positions(profiles_df, tender_index)
+    return build_comprehensive_rows(profiles_df, tender_index.tenders_df, profile_idx, tender_idx)
+
+def open_tenders(tenders_df, as_of=None):
+    """The tenders still open at as_of (default now), in their table order"""
+    deadline_index = TenderDeadlineIndex(tender_deadlines(tenders_df))
+    return tenders_df.iloc[np.sort(deadline_index.open_positions(as_of))]
+
+def create_comprehensive_matching_table(profiles_df=None, tenders_df=None, engine='vectorized', workers=1,
+                                        as_of=None):
+    """Create comprehensive matching table with detailed information
+    
+    engine='vectorized' evaluates the hard filters as boolean masks over whole columns,
+    one cross join per area bucket of the TenderAreaIndex;
+    engine='grouped' computes the tender set once per (area, category, housing) key and
+    expands it to the profiles sharing that key;
+    engine='iterrows' is the original pair-by-pair loop, kept as the reference implementation.
+    All engines produce the same rows in the same (profile, tender) order.
+    
+    workers > 1 splits the profiles into shards matched by a process pool (fast engines only).
+    With as_of, tenders whose deadline passed before it are left out.
+    """
     # Load data
-    profiles_df = pd.read_csv('data/csv_output/טבלת הפרופילים.csv')
-    tenders_df = pd.read_excel('data/טבלת מכרזים יולי 25.xlsx')
+    if profiles_df is None or tenders_df is None:
+        loaded_profiles, loaded_tenders = load_matching_data()
+        profiles_df = loaded_profiles if profiles_df is None else profiles_df
+        tenders_df = loaded_tenders if tenders_df is None else tenders_df
+    if as_of is not None:
+        tenders_df = open_tenders(tenders_df, as_of)
+    
+    if engine in ('vectorized', 'grouped'):
+        if workers > 1:
+            with make_match_pool(tenders_df, workers) as pool:
+                return parallel_match_profiles(profiles_df, pool, workers, engine)
+        return match_profiles(profiles_df, TenderAreaIndex(tenders_df), engine)
+    if engine != 'iterrows':
+        raise ValueError(f"Unknown matching engine: {engine}")
+    
+    profiles_df = profiles_df.copy()
+    tenders_df = ensure_tender_flags(tenders_df)
     
     # Add profile categories
     profiles_df['קטגוריה'] = profiles_df.apply(get_profile_category, axis=1)
@@ -123,8 +543,10 @@ def create_comprehensive_matching_table():
             
             # Apply hard filters
             area_match = check_area_match(profile_area, tender_area)
-            eligibility_match = check_eligibility_match(profile_category, tender_eligibility)
-            housing_match = check_housing_match(profile_housing_need, tender_housing_req)
+            eligibility_match = eligibility_match_from_flags(
+                profile_category, tender['open_to_all'], tender['disabled_ok'], tender['miluim_ok'])
+            housing_match = housing_match_from_flags(
+                profile_housing_need, tender['requires_homeless'], tender['unspecified_housing'])
             
             # Calculate final score (all filters must pass)
             final_score = 1.0 if (area_match and eligibility_match and housing_match) else 0.0
@@ -160,18 +582,367 @@ def create_comprehensive_matching_table():
     
     return pd.DataFrame(successful_matches)
 
+# Tender index of a worker process, built once by the pool initializer
+_worker_tender_index = None
+
+def _init_match_worker(tenders_df):
+    """Pool initializer: receive the flagged tender table once per worker and index it"""
+    global _worker_tender_index
+    _worker_tender_index = TenderAreaIndex(tenders_df)
+
+def _match_shard(profiles_shard, engine):
+    """Match one profile shard against the worker's tender index"""
+    return match_profiles(profiles_shard, _worker_tender_index, engine)
+
+def make_match_pool(tenders_df, workers):
+    """Process pool whose workers each hold the tender index; only profile shards travel per task"""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker,
+                               initargs=(ensure_tender_flags(tenders_df),))
+
+def split_profiles(profiles_df, shard_count):
+    """Split a profile table into contiguous shards of near-equal size"""
+    bounds = np.linspace(0, len(profiles_df), max(1, shard_count) + 1).astype(int)
+    return [profiles_df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def parallel_match_profiles(profiles_df, pool, workers, engine='vectorized', shards_per_worker=4):
+    """Match profile shards in the pool and merge them in shard order.
+    
+    Shards are contiguous and pool.map keeps their order, so the merged table is identical
+    to a single-process run regardless of which worker finishes first.
+    """
+    shards = split_profiles(profiles_df, workers * shards_per_worker)
+    if not shards:
+        return pool.submit(_match_shard, profiles_df, engine).result()
+    return pd.concat(pool.map(_match_shard, shards, repeat(engine)), ignore_index=True)
+
+# Rough per-pair memory cost used to size streaming chunks: the boolean masks of the
+# cross join plus one materialized output row (24 columns of Python objects)
+MASK_BYTES_PER_PAIR = 4
+ROW_BYTES_PER_PAIR = 24 * 40
+
+def profile_chunk_size(tender_count, max_memory_mb):
+    """Number of profiles per chunk so that one chunk stays under max_memory_mb in the worst case"""
+    bytes_per_profile = max(tender_count, 1) * (MASK_BYTES_PER_PAIR + ROW_BYTES_PER_PAIR)
+    return max(1, int(max_memory_mb * 1024 * 1024 // bytes_per_profile))
+
+def read_profile_chunks(profiles_path, tender_count, max_memory_mb):
+    """Read the profile CSV in chunks sized by max_memory_mb, or whole when it is None"""
+    if max_memory_mb is None:
+        yield read_profile_table(profiles_path)
+        return
+    yield from pd.read_csv(profiles_path, chunksize=profile_chunk_size(tender_count, max_memory_mb))
+
+def iter_comprehensive_matches(profiles_path=PROFILES_CSV_PATH, tenders_df=None, max_memory_mb=256,
+                               engine='vectorized'):
+    """Generator of comprehensive matching rows, one DataFrame per chunk of profiles.
+    
+    Profiles are read from profiles_path in chunks sized by max_memory_mb, so memory stays
+    bounded however large the profile file is. Each chunk is sorted by profile ID and tender
+    number; the output is globally sorted when the profile file is sorted by profile ID.
+    """
+    if tenders_df is None:
+        tenders_df = read_tender_table(TENDERS_XLSX_PATH)
+    tender_index = TenderAreaIndex(tenders_df)
+    for profiles_chunk in read_profile_chunks(profiles_path, len(tenders_df), max_memory_mb):
+        matches = match_profiles(profiles_chunk, tender_index, engine)
+        yield matches.sort_values(['מספר_פרופיל', 'מספר_מכרז'])
+
+def render_match_chunk(matches):
+    """Encode a chunk of match rows as CSV lines without header, plus its summary statistics"""
+    summary = {'total_matches': len(matches), 'unique_profiles': 0, 'tenders': set(), 'areas': {},
+               'first_profile': None, 'last_profile': None}
+    if not matches.empty:
+        summary['unique_profiles'] = matches['מספר_פרופיל'].nunique()
+        summary['tenders'] = set(matches['מספר_מכרז'].unique())
+        summary['areas'] = matches['אזור_גיאוגרפי'].value_counts().to_dict()
+        summary['first_profile'] = matches['מספר_פרופיל'].iloc[0]
+        summary['last_profile'] = matches['מספר_פרופיל'].iloc[-1]
+    return matches.to_csv(index=False, header=False).encode('utf-8'), summary
+
+def _render_shard(profiles_shard, engine):
+    """Match one profile shard in a worker and return its sorted CSV fragment"""
+    matches = _match_shard(profiles_shard, engine)
+    return render_match_chunk(matches.sort_values(['מספר_פרופיל', 'מספר_מכרז']))
+
+def parallel_render_matches(profiles_df, pool, workers, engine='vectorized', shards_per_worker=4):
+    """Render profile shards to CSV fragments in the pool, yielded in shard order.
+    
+    Workers return encoded CSV text and a small summary rather than DataFrames, so the
+    parent only concatenates bytes. Profiles are stably sorted by ID before sharding, so
+    the fragments joined in order match a single-process run sorted by (profile, tender).
+    """
+    profiles_df = profiles_df.sort_values('מספר_פרופיל', kind='stable')
+    return pool.map(_render_shard, split_profiles(profiles_df, workers * shards_per_worker), repeat(engine))
+
+def iter_rendered_matches(profiles_path=PROFILES_CSV_PATH, tenders_df=None, max_memory_mb=256,
+                          engine='vectorized', workers=1):
+    """Generator of (CSV bytes, summary) fragments of the comprehensive matching table.
+    
+    With workers > 1 each profile chunk is sharded across one process pool kept for the
+    whole run; max_memory_mb=None matches the whole profile file as a single chunk.
+    """
+    if tenders_df is None:
+        tenders_df = read_tender_table(TENDERS_XLSX_PATH)
+    if workers <= 1:
+        yield from map(render_match_chunk, iter_comprehensive_matches(profiles_path, tenders_df, max_memory_mb, engine))
+        return
+    
+    with make_match_pool(tenders_df, workers) as pool:
+        for profiles_chunk in read_profile_chunks(profiles_path, len(tenders_df), max_memory_mb):
+            yield from parallel_render_matches(profiles_chunk, pool, workers, engine)
+
+def write_rendered_matches(fragments, output_path=COMPREHENSIVE_OUTPUT_PATH):
+    """Write the CSV header and rendered fragments in order and return summary statistics"""
+    # Profiles never span fragments, so they are counted rather than kept in a set
+    stats = {'total_matches': 0, 'unique_profiles': 0, 'tenders': set(), 'areas': {}, 'ordered': True}
+    last_profile = None
+    header = pd.DataFrame(columns=[column for column, _, _ in COMPREHENSIVE_COLUMNS] + SCORE_COLUMNS)
+    
+    with open(output_path, 'wb') as output_file:
+        output_file.write(header.to_csv(index=False).encode('utf-8-sig'))
+        for body, summary in fragments:
+            output_file.write(body)
+            if not summary['total_matches']:
+                continue
+            
+            # Per-fragment ordering is global only if fragments arrive in profile order
+            if last_profile is not None and summary['first_profile'] < last_profile:
+                stats['ordered'] = False
+            last_profile = summary['last_profile']
+            
+            stats['total_matches'] += summary['total_matches']
+            stats['unique_profiles'] += summary['unique_profiles']
+            stats['tenders'].update(summary['tenders'])
+            for area, count in summary['areas'].items():
+                stats['areas'][area] = stats['areas'].get(area, 0) + count
+    return stats
+
+def write_comprehensive_matches(match_chunks, output_path=COMPREHENSIVE_OUTPUT_PATH):
+    """Append match chunks to a CSV file as they arrive and return summary statistics"""
+    return write_rendered_matches(map(render_match_chunk, match_chunks), output_path)
+
+def main_streaming(max_memory_mb, workers=1, tenders_path=TENDERS_XLSX_PATH, as_of=None):
+    """Build the comprehensive matching table chunk by chunk, optionally across worker processes"""
+    if max_memory_mb is None:
+        print(f"Creating comprehensive matching table with {workers} worker processes...")
+    else:
+        print(f"Streaming comprehensive matching table (memory ceiling {max_memory_mb} MB)...")
+    
+    tenders_df = read_tender_table(tenders_path)
+    if as_of is not None:
+        tenders_df = open_tenders(tenders_df, as_of)
+    stats = write_rendered_matches(iter_rendered_matches(tenders_df=tenders_df, max_memory_mb=max_memory_mb,
+                                                         workers=workers))
+    save_tender_snapshot(tenders_df)
+    print(f"Comprehensive matching table saved to: {COMPREHENSIVE_OUTPUT_PATH}")
+    if not stats['ordered']:
+        print("Warning: profile file is not sorted by profile ID - output is sorted within each chunk only")
+    
+    print(f"\n=== SUMMARY STATISTICS ===")
+    print(f"Total successful matches: {stats['total_matches']}")
+    print(f"Unique profiles matched: {stats['unique_profiles']}")
+    print(f"Unique tenders matched: {len(stats['tenders'])}")
+    
+    print(f"\n=== MATCHES BY AREA ===")
+    for area, count in sorted(stats['areas'].items(), key=lambda item: -item[1]):
+        print(f"{area}: {count} matches")
+
+def tender_row_hashes(tenders_df):
+    """Content hash of every tender row, keyed by 'מספר המכרז'"""
+    hashes = pd.util.hash_pandas_object(tenders_df, index=False)
+    return dict(zip(tenders_df['מספר המכרז'].astype(str), hashes.astype(str)))
+
+def save_tender_snapshot(tenders_df, profiles_path=PROFILES_CSV_PATH, snapshot_path=TENDER_SNAPSHOT_PATH):
+    """Record which tenders (and which profile file) the comprehensive table was built from"""
+    snapshot = {'profiles_hash': file_hash(profiles_path), 'tenders': tender_row_hashes(tenders_df)}
+    Path(snapshot_path).write_text(json.dumps(snapshot, ensure_ascii=False, indent=1), encoding='utf-8')
+
+def load_tender_snapshot(snapshot_path=TENDER_SNAPSHOT_PATH):
+    """Last saved snapshot, or None if there is none"""
+    if not Path(snapshot_path).exists():
+        return None
+    return json.loads(Path(snapshot_path).read_text(encoding='utf-8'))
+
+def diff_tenders(tenders_df, snapshot):
+    """Tender numbers added, changed and removed since the snapshot"""
+    current = tender_row_hashes(tenders_df)
+    previous = snapshot['tenders']
+    added = [number for number in current if number not in previous]
+    changed = [number for number in current if number in previous and current[number] != previous[number]]
+    removed = [number for number in previous if number not in current]
+    return added, changed, removed
+
+def _split_csv_lines(data):
+    """Header and record lines of CSV bytes, or None if a quoted field spans several lines"""
+    lines = data.removeprefix(codecs.BOM_UTF8).split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+    # A line break inside quotes leaves that line with an odd number of quote characters
+    if any(line.count(b'"') % 2 for line in lines):
+        return None
+    return lines[0], lines[1:]
+
+def _record_key(line):
+    """(profile ID, tender number) of a comprehensive table record line, as UTF-8 bytes"""
+    fields = line.split(b',', 2)
+    if b'"' in fields[0] or b'"' in fields[1]:
+        fields = [field.encode('utf-8') for field in next(csv.reader([line.decode('utf-8')]))]
+    return fields[0], fields[1]
+
+def _record_sort_key(matches):
+    """Sort key of (record key, line) pairs in the order a full rebuild sorts matches, or None.
+    
+    The full rebuild sorts the typed ID columns, so integer IDs sort as numbers ("2" before
+    "10") while text IDs sort by code point, which UTF-8 bytes preserve. None for any other
+    column type.
+    """
+    parsers = []
+    for column in ['מספר_פרופיל', 'מספר_מכרז']:
+        if pd.api.types.is_integer_dtype(matches[column]):
+            parsers.append(int)
+        elif pd.api.types.is_string_dtype(matches[column]):
+            parsers.append(bytes)
+        else:
+            return None
+    parse_profile, parse_tender = parsers
+    return lambda item: (parse_profile(item[0][0]), parse_tender(item[0][1]))
+
+def _rebuild_comprehensive_matches(tenders_df, profiles_path, output_path, snapshot_path):
+    """Rebuild the comprehensive table in full and record the snapshot it was built from"""
+    stats = write_comprehensive_matches(iter_comprehensive_matches(profiles_path, tenders_df, None), output_path)
+    save_tender_snapshot(tenders_df, profiles_path, snapshot_path)
+    return {'full_rebuild': True, 'added': len(tenders_df), 'changed': 0, 'removed': 0,
+            'rows_removed': 0, 'rows_added': stats['total_matches']}
+
+def update_comprehensive_matches(tenders_df, profiles_path=PROFILES_CSV_PATH, output_path=COMPREHENSIVE_OUTPUT_PATH,
+                                 snapshot_path=TENDER_SNAPSHOT_PATH):
+    """Bring the comprehensive table up to date with a new tender workbook by matching only the diff.
+    
+    Tenders are keyed by 'מספר המכרז' and compared with the last snapshot: rows of removed
+    and changed tenders are dropped, and only added and changed tenders are matched against
+    the profiles. The file is patched at the byte level - untouched rows are copied as
+    stored, new rows are merged in (profile, tender) order - so the result is identical to
+    a full rebuild, and nothing is written when nothing changed. Without a usable snapshot
+    (none yet, or the profile file changed), or with IDs that are neither integers nor
+    text, the table is rebuilt in full.
+    Returns the diff and row counts.
+    """
+    snapshot = load_tender_snapshot(snapshot_path)
+    if snapshot is None or snapshot['profiles_hash'] != file_hash(profiles_path) or not Path(output_path).exists():
+        return _rebuild_comprehensive_matches(tenders_df, profiles_path, output_path, snapshot_path)
+    
+    added, changed, removed = diff_tenders(tenders_df, snapshot)
+    result = {'full_rebuild': False, 'added': len(added), 'changed': len(changed), 'removed': len(removed),
+              'rows_removed': 0, 'rows_added': 0}
+    if not (added or changed or removed):
+        return result
+    
+    split = _split_csv_lines(Path(output_path).read_bytes())
+    if split is None:
+        return _rebuild_comprehensive_matches(tenders_df, profiles_path, output_path, snapshot_path)
+    header, lines = split
+    stale = {number.encode('utf-8') for number in set(changed) | set(removed)}
+    keyed = [(_record_key(line), line) for line in lines]
+    kept = [(key, line) for key, line in keyed if key[1] not in stale]
+    
+    # Match only the added and changed tenders against all profiles
+    diff_tenders_df = tenders_df[tenders_df['מספר המכרז'].astype(str).isin(set(added) | set(changed))]
+    new_lines = []
+    updated = kept
+    matches = pd.DataFrame()
+    if len(diff_tenders_df):
+        matches = match_profiles(read_profile_table(profiles_path), TenderAreaIndex(diff_tenders_df), engine='grouped')
+    if len(matches):
+        rendered = _split_csv_lines(matches.to_csv(index=False).encode('utf-8'))
+        sort_key = _record_sort_key(matches)
+        if rendered is None or sort_key is None:
+            return _rebuild_comprehensive_matches(tenders_df, profiles_path, output_path, snapshot_path)
+        new_lines = rendered[1]
+        # Kept lines are already in order, so the sort is a merge of the new lines into them
+        updated = sorted(kept + [(_record_key(line), line) for line in new_lines], key=sort_key)
+    
+    with open(output_path, 'wb') as output_file:
+        output_file.write(codecs.BOM_UTF8 + header + b'\n')
+        output_file.writelines(line + b'\n' for _, line in updated)
+    save_tender_snapshot(tenders_df, profiles_path, snapshot_path)
+    
+    result['rows_removed'] = len(lines) - len(kept)
+    result['rows_added'] = len(new_lines)
+    return result
+
+def main_incremental(tenders_path, as_of=None):
+    """Update the comprehensive matching table for a new tender workbook"""
+    print(f"Updating comprehensive matching table from: {tenders_path}")
+    tenders_df = read_tender_table(tenders_path)
+    if as_of is not None:
+        tenders_df = open_tenders(tenders_df, as_of)
+    result = update_comprehensive_matches(tenders_df)
+    print(f"Comprehensive matching table saved to: {COMPREHENSIVE_OUTPUT_PATH}")
+    
+    print(f"\n=== TENDER CHANGES ===")
+    if result['full_rebuild']:
+        print("No usable snapshot - table rebuilt in full")
+    print(f"Added tenders: {result['added']}")
+    print(f"Changed tenders: {result['changed']}")
+    print(f"Removed tenders: {result['removed']}")
+    print(f"Rows removed: {result['rows_removed']}")
+    print(f"Rows added: {result['rows_added']}")
+
+def main_notify(tender_numbers, tenders_path=TENDERS_XLSX_PATH):
+    """Print the profiles that should hear about each of the given tenders"""
+    profiles_df, tenders_df = load_matching_data(tenders_path)
+    eligible = find_profiles_for_tenders(tender_numbers, profiles_df, tenders_df)
+    
+    print(f"\n=== PROFILES TO NOTIFY ===")
+    for number, profile_ids in eligible.items():
+        print(f"{number}: {len(profile_ids)} profiles")
+        if len(profile_ids):
+            print(f"  {', '.join(map(str, profile_ids))}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Create the comprehensive profile-tender matching table")
+    parser.add_argument('--stream', action='store_true',
+                        help="read profiles in chunks and append matches to the CSV incrementally")
+    parser.add_argument('--max-memory-mb', type=float, default=256,
+                        help="memory ceiling per chunk in streaming mode (default: 256)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes matching profile shards (default: 1)")
+    parser.add_argument('--tenders', default=TENDERS_XLSX_PATH,
+                        help=f"tender workbook to match (default: {TENDERS_XLSX_PATH})")
+    parser.add_argument('--incremental', action='store_true',
+                        help="re-match only tenders added or changed since the last run")
+    parser.add_argument('--notify', nargs='+', metavar='TENDER_NUMBER',
+                        help="list the profiles eligible for these tenders instead of building the table")
+    parser.add_argument('--open-only', action='store_true',
+                        help="leave out tenders whose deadline has passed or that were cancelled")
+    args = parser.parse_args()
+    as_of = pd.Timestamp.now() if args.open_only else None
+    
+    if args.notify:
+        main_notify(args.notify, args.tenders)
+        return
+    if args.incremental:
+        main_incremental(args.tenders, as_of)
+        return
+    if args.stream or args.workers > 1:
+        main_streaming(args.max_memory_mb if args.stream else None, args.workers, args.tenders, as_of)
+        return
+    
     print("Creating comprehensive matching table...")
     
-    # Generate comprehensive matching table
-    comprehensive_matches = create_comprehensive_matching_table()
+    # Generate comprehensive matching table; the snapshot records the tenders actually matched
+    profiles_df, tenders_df = load_matching_data(args.tenders)
+    if as_of is not None:
+        tenders_df = open_tenders(tenders_df, as_of)
+    comprehensive_matches = create_comprehensive_matching_table(profiles_df, tenders_df)
     
     # Sort by profile ID and tender number for better organization
     comprehensive_matches = comprehensive_matches.sort_values(['מספר_פרופיל', 'מספר_מכרז'])
     
     # Save comprehensive matches
-    output_path = 'data/csv_output/טבלת_התאמות_מקיפה.csv'
+    output_path = COMPREHENSIVE_OUTPUT_PATH
     comprehensive_matches.to_csv(output_path, index=False, encoding='utf-8-sig')
+    save_tender_snapshot(tenders_df)
     print(f"Comprehensive matching table saved to: {output_path}")
     
     # Print summary statistics
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Load test for the matching API.
+
+Starts a local matching_api.py instance on a free port unless --port is given. It then
+sends /match requests with synthetic profiles over keep-alive connections and reports the
+request rate and the latency percentiles, measured client-side per request.
+
+Usage:
+    python load_test_api.py --requests 20000 --connections 16
+    python load_test_api.py --port 8080 --duration 30
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmark_matching import make_synthetic_profiles
+
+def make_request_bodies(count, seed=0):
+    """POST bodies for /match built from synthetic profiles"""
+    profiles_df = make_synthetic_profiles(count, seed).fillna({'סיווג_נכות': ''})
+    records = json.loads(profiles_df.drop(columns=['מספר_פרופיל']).to_json(orient='records', force_ascii=False))
+    return [json.dumps(record, ensure_ascii=False).encode('utf-8') for record in records]
+
+async def read_response(reader):
+    """Status and body of one HTTP response, with a Content-Length or chunked"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    status = int(status_line.split()[1])
+    if headers.get('transfer-encoding') != 'chunked':
+        return status, await reader.readexactly(int(headers.get('content-length', 0)))
+    
+    chunks = []
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        chunks.append(await reader.readexactly(size + 2))
+        if size == 0:
+            return status, b''.join(chunk[:-2] for chunk in chunks)
+
+async def run_connection(host, port, bodies, next_request, deadline, latencies, statuses):
+    """Send requests one after another on one keep-alive connection"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            request_number = next_request()
+            if request_number is None or time.perf_counter() > deadline:
+                break
+            body = bodies[request_number % len(bodies)]
+            start = time.perf_counter()
+            writer.write(b'POST /match HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n'
+                         b'Content-Length: %d\r\n\r\n%s' % (host.encode('ascii'), len(body), body))
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+async def run_load(host, port, bodies, total_requests, connections, duration):
+    """Run the load and return (elapsed seconds, latencies in seconds, responses per status)"""
+    counter = iter(range(total_requests)) if total_requests else itertools.count()
+    next_request = lambda: next(counter, None)
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    deadline = start + duration if duration else float('inf')
+    await asyncio.gather(*[run_connection(host, port, bodies, next_request, deadline, latencies, statuses)
+                           for _ in range(connections)])
+    return time.perf_counter() - start, np.array(latencies), statuses
+
+def free_port():
+    """A TCP port that is free on localhost right now"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_local_server(port, tenders_path):
+    """Start matching_api.py in a subprocess and wait until it answers /health"""
+    command = [sys.executable, 'matching_api.py', '--port', str(port)]
+    if tenders_path:
+        command += ['--tenders', tenders_path]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    for _ in range(600):
+        if server.poll() is not None:
+            raise RuntimeError(f"matching_api.py exited with code {server.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1) as sock:
+                sock.sendall(b'GET /health HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n')
+                if sock.recv(64).startswith(b'HTTP/1.1 200'):
+                    return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("matching_api.py did not start within 60 seconds")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the matching API")
+    parser.add_argument('--host', default='127.0.0.1', help="API address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, help="port of a running API; without it a local instance is started")
+    parser.add_argument('--tenders', help="tender workbook for the local instance")
+    parser.add_argument('--requests', type=int, default=20000, help="requests to send (default: 20000)")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds instead")
+    parser.add_argument('--connections', type=int, default=16, help="concurrent keep-alive connections (default: 16)")
+    parser.add_argument('--profiles', type=int, default=1000, help="distinct synthetic profiles (default: 1000)")
+    args = parser.parse_args()
+    
+    server = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        server = start_local_server(port, args.tenders)
+    try:
+        bodies = make_request_bodies(args.profiles)
+        total_requests = None if args.duration else args.requests
+        elapsed, latencies, statuses = asyncio.run(
+            run_load(args.host, port, bodies, total_requests, args.connections, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    
+    p50, p95, p99, p999 = np.percentile(latencies, [50, 95, 99, 99.9]) * 1000
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency ms: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  p99.9 {p999:.2f}  max {latencies.max() * 1000:.2f}")
+    print(f"responses by status: {dict(sorted(statuses.items()))}")
+
+if __name__ == "__main__":
+    main()
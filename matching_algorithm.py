@@ -1,6 +1,10 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from tender_data import read_profile_table, read_tender_table
 
 def is_miluim_soldier(days_since_oct, has_active_card, days_in_6_years):
     """Check if profile qualifies as miluim soldier"""
@@ -24,6 +28,19 @@ def get_profile_category(row):
     
     return 'אחר'
 
+PROFILE_CATEGORIES = ['נכי צהל', 'חיילי מילואים', 'אחר']
+
+def get_profile_categories(profiles_df):
+    """Column-wise get_profile_category for a whole profile table, returned as a pandas Categorical"""
+    is_disabled = profiles_df['סיווג_נכות'].isin(['נכות קשה', '100% ומעלה']).to_numpy(dtype=bool)
+    is_miluim = ((profiles_df['ימי_מילואים_מ-7.10.23'] >= 45).to_numpy(dtype=bool) |
+                 (profiles_df['תעודת_מילואים_פעיל'] == 'כן').to_numpy(dtype=bool) |
+                 (profiles_df['ימי_מילואים_ב-6_שנים'] >= 80).to_numpy(dtype=bool))
+    
+    # Disability takes precedence over miluim status
+    categories = np.select([is_disabled, is_miluim], PROFILE_CATEGORIES[:2], default='אחר')
+    return pd.Categorical(categories, categories=PROFILE_CATEGORIES)
+
 def check_area_match(profile_area, tender_area):
     """Check if profile preferred area matches tender geographical area"""
     return profile_area == tender_area
@@ -66,59 +83,246 @@ def check_housing_match(profile_housing_need, tender_housing_req):
                 'מחוסרי דיור' not in tender_housing_req and 
                 'חסרי דירה' not in tender_housing_req)
 
-def create_matching_table():
-    """Create matching table based on hard filters"""
+def load_matching_data():
+    """Load the profile and tender tables used for the comparison run"""
+    profiles_df = read_profile_table('data/csv_output/טבלת הפרופילים.csv')
+    tenders_df = read_tender_table('data/csv_output/טבלת מכרזים ניסיון שני_.csv')
+    return profiles_df, tenders_df
+
+def _matching_key_groups(profiles_df):
+    """Group profiles by (area, category, housing need) - the only fields the filters read"""
+    keys = pd.DataFrame({
+        'אזור_מועדף': profiles_df['אזור_מועדף'].to_numpy(dtype=object),
+        'קטגוריה': profiles_df['קטגוריה'].to_numpy(dtype=object),
+        'חסר_דיור': np.where(profiles_df['חסר_דיור'] == 'כן', 'כן', 'לא'),
+    })
+    group_ids = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+    _, first_rows = np.unique(group_ids, return_index=True)
+    return group_ids, keys.iloc[first_rows].reset_index(drop=True)
+
+# Bits of the per-pair filter bitfield
+AREA_PASSED = 1
+ELIGIBILITY_PASSED = 2
+HOUSING_PASSED = 4
+ALL_FILTERS_PASSED = AREA_PASSED | ELIGIBILITY_PASSED | HOUSING_PASSED
+
+# Dense table columns derived from the filter bits
+FILTER_COLUMNS = [('עובר_אזור', AREA_PASSED), ('עובר_זכאות', ELIGIBILITY_PASSED),
+                  ('עובר_חסר_דיור', HOUSING_PASSED)]
+
+class SparseMatches:
+    """Matched (profile, tender) pairs of the hard filters, stored as int32 positions.
+    
+    profile_idx and tender_idx index into profile_ids and tender_ids, one entry per pair
+    that passed every filter, in profile-major order. When filters are kept, filter_bits
+    holds one packed uint8 per tender (AREA_PASSED | ELIGIBILITY_PASSED | HOUSING_PASSED)
+    for each distinct filter row, and filter_rows maps every profile to its row, so
+    profiles sharing a matching key share one row of bits.
+    """
+    
+    def __init__(self, profile_ids, tender_ids, profile_idx, tender_idx, filter_bits=None, filter_rows=None):
+        self.profile_ids = np.asarray(profile_ids)
+        self.tender_ids = np.asarray(tender_ids)
+        self.profile_idx = np.asarray(profile_idx, dtype=np.int32)
+        self.tender_idx = np.asarray(tender_idx, dtype=np.int32)
+        self.filter_bits = filter_bits
+        self.filter_rows = filter_rows
+    
+    @classmethod
+    def from_filter_bits(cls, profile_ids, tender_ids, filter_bits, filter_rows, keep_filters=True):
+        """Build the pair arrays from per-row filter bits shared by the profiles in filter_rows"""
+        filter_rows = np.asarray(filter_rows, dtype=np.int32)
+        passed = filter_bits == ALL_FILTERS_PASSED
+        
+        # Matched tenders of every filter row, laid end to end, and where each row starts
+        row_tenders = np.nonzero(passed)[1].astype(np.int32)
+        row_counts = passed.sum(axis=1)
+        row_starts = np.cumsum(row_counts) - row_counts
+        
+        # Expand each profile to its row's tenders without building the profiles × tenders grid
+        pair_counts = row_counts[filter_rows]
+        profile_idx = np.repeat(np.arange(len(filter_rows), dtype=np.int32), pair_counts)
+        pair_starts = np.cumsum(pair_counts) - pair_counts
+        offsets = np.arange(pair_counts.sum()) - np.repeat(pair_starts, pair_counts)
+        tender_idx = row_tenders[np.repeat(row_starts[filter_rows], pair_counts) + offsets]
+        if not keep_filters:
+            filter_bits, filter_rows = None, None
+        return cls(profile_ids, tender_ids, profile_idx, tender_idx, filter_bits, filter_rows)
+    
+    @classmethod
+    def concat(cls, parts):
+        """Merge results of consecutive profile shards matched against the same tenders"""
+        parts = list(parts)
+        profile_offsets = np.cumsum([0] + [len(part.profile_ids) for part in parts])
+        keep_filters = all(part.filter_bits is not None for part in parts)
+        filter_bits, filter_rows = None, None
+        if keep_filters:
+            row_offsets = np.cumsum([0] + [len(part.filter_bits) for part in parts])
+            filter_bits = np.concatenate([part.filter_bits for part in parts])
+            filter_rows = np.concatenate([part.filter_rows + offset for part, offset in zip(parts, row_offsets)])
+        return cls(np.concatenate([part.profile_ids for part in parts]),
+                   parts[0].tender_ids,
+                   np.concatenate([part.profile_idx + offset for part, offset in zip(parts, profile_offsets)]),
+                   np.concatenate([part.tender_idx for part in parts]),
+                   filter_bits, filter_rows)
+    
+    def __len__(self):
+        return len(self.profile_idx)
+    
+    def pairs(self):
+        """Iterate over matched (profile_id, tender_id) pairs"""
+        return zip(self.profile_ids[self.profile_idx].tolist(), self.tender_ids[self.tender_idx].tolist())
+    
+    def pair_filter_bits(self):
+        """Filter bits of every profile × tender pair, shape (profiles, tenders)"""
+        if self.filter_bits is None:
+            raise ValueError("Filter bits were not kept for these matches")
+        return self.filter_bits[self.filter_rows]
+    
+    def to_frame(self):
+        """Matched pairs only, with the columns of the dense table"""
+        ones = np.ones(len(self))
+        frame = pd.DataFrame({
+            'profile_id': self.profile_ids[self.profile_idx],
+            'tender_id': self.tender_ids[self.tender_idx],
+        })
+        for column, _ in FILTER_COLUMNS:
+            frame[column] = ones
+        frame['score_סופי'] = ones
+        return frame
+    
+    def to_dense(self):
+        """Materialize the original all-pairs table with 0/1 filter columns"""
+        bits = self.pair_filter_bits().ravel()
+        frame = pd.DataFrame({
+            'profile_id': np.repeat(self.profile_ids, len(self.tender_ids)),
+            'tender_id': np.tile(self.tender_ids, len(self.profile_ids)),
+        })
+        for column, flag in FILTER_COLUMNS:
+            frame[column] = ((bits & flag) != 0).astype(float)
+        frame['score_סופי'] = (bits == ALL_FILTERS_PASSED).astype(float)
+        return frame
+    
+    def to_csv(self, output_path, dense=False):
+        """Write the matched pairs (or the all-pairs table when dense=True) to CSV"""
+        frame = self.to_dense() if dense else self.to_frame()
+        frame.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+def _filter_bits(areas, categories, housing_needs, tenders_df):
+    """Packed filter bits of each (area, category, housing) row against every tender"""
+    tender_areas = tenders_df['אזור גיאוגרפי '].tolist()
+    tender_eligibility = tenders_df['מי רשאי להגיש'].tolist()
+    tender_housing = tenders_df['סטטוס דיור נדרש'].tolist()
+    
+    bits = np.zeros((len(areas), len(tenders_df)), dtype=np.uint8)
+    for row, (area, category, need) in enumerate(zip(areas, categories, housing_needs)):
+        for col in range(len(tenders_df)):
+            if check_area_match(area, tender_areas[col]):
+                bits[row, col] |= AREA_PASSED
+            if check_eligibility_match(category, tender_eligibility[col]):
+                bits[row, col] |= ELIGIBILITY_PASSED
+            if check_housing_match(need, tender_housing[col]):
+                bits[row, col] |= HOUSING_PASSED
+    return bits
+
+def _create_matching_table_grouped(profiles_df, tenders_df, keep_filters=True):
+    """Evaluate the filters once per key group and share the result by every profile in it"""
+    group_ids, group_keys = _matching_key_groups(profiles_df)
+    filter_bits = _filter_bits(group_keys['אזור_מועדף'], group_keys['קטגוריה'], group_keys['חסר_דיור'], tenders_df)
+    return SparseMatches.from_filter_bits(profiles_df['מספר_פרופיל'].to_numpy(), tenders_df['id'].to_numpy(),
+                                          filter_bits, group_ids, keep_filters)
+
+# Tender table of a worker process, received once from the pool initializer
+_worker_tenders_df = None
+
+def _init_match_worker(tenders_df):
+    """Pool initializer: keep the tender table in the worker for all of its tasks"""
+    global _worker_tenders_df
+    _worker_tenders_df = tenders_df
+
+def _match_shard(profiles_shard, engine, keep_filters):
+    """Match one profile shard against the worker's tender table"""
+    return create_matching_table(profiles_shard, _worker_tenders_df, engine, keep_filters=keep_filters)
+
+def parallel_create_matching_table(profiles_df, tenders_df, workers, engine='grouped', keep_filters=True,
+                                   shards_per_worker=4):
+    """Match contiguous profile shards in a process pool and merge them in shard order"""
+    bounds = np.linspace(0, len(profiles_df), workers * shards_per_worker + 1).astype(int)
+    shards = [profiles_df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+    if not shards:
+        return create_matching_table(profiles_df, tenders_df, engine, keep_filters=keep_filters)
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker, initargs=(tenders_df,)) as pool:
+        return SparseMatches.concat(pool.map(_match_shard, shards, repeat(engine), repeat(keep_filters)))
+
+def create_matching_table(profiles_df=None, tenders_df=None, engine='grouped', workers=1,
+                          keep_filters=True, dense=False):
+    """Create matching table based on hard filters
+    
+    Returns SparseMatches holding only the matched pairs (plus the packed filter bits unless
+    keep_filters=False); dense=True materializes the all-pairs table with 0/1 filter columns.
+    engine='grouped' evaluates the filters once per (area, category, housing) key, so the
+    filter work scales with the number of tenders rather than profiles × tenders;
+    engine='iterrows' is the original pair-by-pair loop. Both return the same matches.
+    workers > 1 matches profile shards in a process pool.
+    """
     # Load data
-    profiles_df = pd.read_csv('data/csv_output/טבלת הפרופילים.csv')
-    tenders_df = pd.read_csv('data/csv_output/טבלת מכרזים ניסיון שני_.csv')
+    if profiles_df is None or tenders_df is None:
+        loaded_profiles, loaded_tenders = load_matching_data()
+        profiles_df = loaded_profiles if profiles_df is None else profiles_df
+        tenders_df = loaded_tenders if tenders_df is None else tenders_df
+    if dense:
+        return create_matching_table(profiles_df, tenders_df, engine, workers).to_dense()
+    if workers > 1:
+        return parallel_create_matching_table(profiles_df, tenders_df, workers, engine, keep_filters)
+    profiles_df = profiles_df.copy()
+    
+    # Add profile categories (row by row for the reference loop)
+    if engine == 'iterrows':
+        profiles_df['קטגוריה'] = profiles_df.apply(get_profile_category, axis=1)
+    else:
+        profiles_df['קטגוריה'] = get_profile_categories(profiles_df)
     
-    # Add profile categories
-    profiles_df['קטגוריה'] = profiles_df.apply(get_profile_category, axis=1)
+    if engine == 'grouped':
+        return _create_matching_table_grouped(profiles_df, tenders_df, keep_filters)
+    if engine != 'iterrows':
+        raise ValueError(f"Unknown matching engine: {engine}")
     
-    matches = []
+    filter_bits = np.zeros((len(profiles_df), len(tenders_df)), dtype=np.uint8)
     
-    for _, profile in profiles_df.iterrows():
-        profile_id = profile['מספר_פרופיל']
+    for row, (_, profile) in enumerate(profiles_df.iterrows()):
         profile_area = profile['אזור_מועדף']
         profile_category = profile['קטגוריה']
         profile_housing_need = profile['חסר_דיור']
         
-        for _, tender in tenders_df.iterrows():
-            tender_id = tender['id']
+        for col, (_, tender) in enumerate(tenders_df.iterrows()):
             tender_area = tender['אזור גיאוגרפי ']
             tender_eligibility = tender['מי רשאי להגיש']
             tender_housing_req = tender['סטטוס דיור נדרש']
             
-            # Apply hard filters
-            area_match = check_area_match(profile_area, tender_area)
-            eligibility_match = check_eligibility_match(profile_category, tender_eligibility)
-            housing_match = check_housing_match(profile_housing_need, tender_housing_req)
-            
-            # Calculate final score (all filters must pass)
-            final_score = 1.0 if (area_match and eligibility_match and housing_match) else 0.0
-            
-            # Only add matches with score > 0 or for comparison purposes
-            if final_score > 0 or True:  # Keep all for comparison
-                matches.append({
-                    'profile_id': profile_id,
-                    'tender_id': tender_id,
-                    'עובר_אזור': 1.0 if area_match else 0.0,
-                    'עובר_זכאות': 1.0 if eligibility_match else 0.0,
-                    'עובר_חסר_דיור': 1.0 if housing_match else 0.0,
-                    'score_סופי': final_score
-                })
-    
-    return pd.DataFrame(matches)
+            # Apply hard filters and record which ones passed
+            if check_area_match(profile_area, tender_area):
+                filter_bits[row, col] |= AREA_PASSED
+            if check_eligibility_match(profile_category, tender_eligibility):
+                filter_bits[row, col] |= ELIGIBILITY_PASSED
+            if check_housing_match(profile_housing_need, tender_housing_req):
+                filter_bits[row, col] |= HOUSING_PASSED
+    
+    return SparseMatches.from_filter_bits(profiles_df['מספר_פרופיל'].to_numpy(), tenders_df['id'].to_numpy(),
+                                          filter_bits, np.arange(len(profiles_df)), keep_filters)
+
+def _matched_pairs(matches):
+    """Set of (profile_id, tender_id) pairs with a full score, from SparseMatches or a table"""
+    if isinstance(matches, SparseMatches):
+        return set(matches.pairs())
+    matches = matches[matches['score_סופי'] == 1.0]
+    return set(zip(matches['profile_id'], matches['tender_id']))
 
 def compare_with_manual_table(generated_df, manual_df):
     """Compare generated matching table with manual table"""
-    # Filter only successful matches (score = 1.0) for comparison
-    generated_matches = generated_df[generated_df['score_סופי'] == 1.0].copy()
-    manual_matches = manual_df[manual_df['score_סופי'] == 1.0].copy()
-    
-    # Create comparison sets
-    generated_pairs = set(zip(generated_matches['profile_id'], generated_matches['tender_id']))
-    manual_pairs = set(zip(manual_matches['profile_id'], manual_matches['tender_id']))
+    # Only successful matches (score = 1.0) take part in the comparison
+    generated_pairs = _matched_pairs(generated_df)
+    manual_pairs = _matched_pairs(manual_df)
     
     # Calculate metrics
     common_matches = generated_pairs.intersection(manual_pairs)
@@ -144,14 +348,19 @@ def compare_with_manual_table(generated_df, manual_df):
     }
 
 def main():
+    parser = argparse.ArgumentParser(description="Create the hard-filter matching table and compare it with the manual one")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes matching profile shards (default: 1)")
+    args = parser.parse_args()
+    
     print("Creating matching table based on hard filters...")
     
-    # Generate matching table
-    generated_matches = create_matching_table()
+    # Generate matched pairs
+    generated_matches = create_matching_table(workers=args.workers, keep_filters=False)
     
-    # Save generated matches
+    # Save generated matches (matched pairs only)
     output_path = 'data/csv_output/generated_matches.csv'
-    generated_matches.to_csv(output_path, index=False, encoding='utf-8-sig')
+    generated_matches.to_csv(output_path)
     print(f"Generated matching table saved to: {output_path}")
     
     # Load manual matching table
@@ -181,9 +390,8 @@ def main():
             print(f"  {profile} -> {tender}")
     
     # Show sample of successful matches
-    successful_matches = generated_matches[generated_matches['score_סופי'] == 1.0]
     print(f"\nSample of successful matches (first 10):")
-    print(successful_matches.head(10).to_string(index=False))
+    print(generated_matches.to_frame().head(10).to_string(index=False))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Headless JSON matching API for partner systems.
+
+A small asyncio HTTP/1.1 server with keep-alive. It answers from a TenderStore built at
+startup, the same versioned answer table the Streamlit apps use. A search is a lookup of
+the profile's (area, category, housing) key. The response body is then joined from tender
+JSON objects that were encoded once per data version, so a request does no pandas work.
+
+Endpoints:
+    POST /match   JSON object with the profile fields of the search form
+    GET  /match   the same fields as a query string
+    POST /match/batch?format=jsonl|csv
+                  CSV (sent as text/csv) or JSON lines of profiles; the results are
+                  streamed back as JSON lines or CSV, see batch_matching.py for the CLI
+    GET  /health  the data version being served and the result cache counters
+
+Usage:
+    python matching_api.py --port 8080
+    curl -s localhost:8080/match -d '{"אזור_מועדף": "דרום", "חסר_דיור": "כן", "ימי_מילואים_מ-7.10.23": 60}'
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import traceback
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from create_comprehensive_matches import (
+    TENDERS_XLSX_PATH,
+    get_profile_categories,
+    get_profile_category,
+    matching_key_groups,
+    validate_profile_data
+)
+from tender_data import PLOT_COUNT_COLUMNS, PRIORITY_ALL_COLUMNS, ensure_plot_counts, ensure_tender_dates
+from tender_store import ResultCache, TenderStore, build_answer_table
+
+# JSON field -> tender table column; counts and dates keep their parsed values
+TENDER_JSON_FIELDS = [
+    ('מספר מכרז', 'מספר המכרז'),
+    ('עיר', 'עיר'),
+    ('שכונה', 'שכונה'),
+    ('אזור גיאוגרפי', 'אזור גיאוגרפי '),
+    ('אזור עדיפות', 'אזור עדיפות'),
+    ('מי רשאי להגיש', 'מי רשאי להגיש'),
+    ('סטטוס דיור נדרש', 'סטטוס דיור נדרש'),
+    ('קישור למכרז', 'קישור למכרז '),
+    ('publish_date', 'publish_date'),
+    ('deadline', 'deadline'),
+] + [(column, column) for column in PLOT_COUNT_COLUMNS + PRIORITY_ALL_COLUMNS]
+
+# Profile fields of the search form and their defaults there
+PROFILE_DEFAULTS = {
+    'ימי_מילואים_מ-7.10.23': 0,
+    'תעודת_מילואים_פעיל': 'לא',
+    'ימי_מילואים_ב-6_שנים': 0,
+    'סיווג_נכות': '',
+    'חסר_דיור': 'לא',
+    'אזור_מועדף': '',
+    'בן/בת_זוג_זכאי': 'לא',
+}
+PROFILE_NUMBER_FIELDS = ['ימי_מילואים_מ-7.10.23', 'ימי_מילואים_ב-6_שנים']
+
+JSON_CONTENT_TYPE = b'application/json; charset=utf-8'
+BATCH_CONTENT_TYPES = {'jsonl': b'application/x-ndjson; charset=utf-8', 'csv': b'text/csv; charset=utf-8'}
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+def tender_records(tenders_df):
+    """The JSON-ready fields of every tender as dicts, in table order"""
+    tenders_df = ensure_plot_counts(ensure_tender_dates(tenders_df))
+    fields_df = tenders_df[[source for _, source in TENDER_JSON_FIELDS]]
+    fields_df.columns = [field for field, _ in TENDER_JSON_FIELDS]
+    return json.loads(fields_df.to_json(orient='records', date_format='iso', force_ascii=False))
+
+def encode_tenders(tenders_df):
+    """The JSON object of every tender as UTF-8 bytes, in table order"""
+    return [json.dumps(record, ensure_ascii=False).encode('utf-8') for record in tender_records(tenders_df)]
+
+def _csv_line(values):
+    line = io.StringIO()
+    csv.writer(line, lineterminator='\n').writerow(values)
+    return line.getvalue().encode('utf-8')
+
+def encode_tender_csv_rows(tenders_df):
+    """The batch CSV fields of every tender as a UTF-8 line, in table order"""
+    return [_csv_line(record.values()) for record in tender_records(tenders_df)]
+
+def build_api_answer_table(path):
+    """TenderStore builder that also encodes the tenders, so each version is served ready-made"""
+    answer_table = build_answer_table(path)
+    # Copied along by without_expired(): positions keep their meaning across sweeps
+    answer_table.encoded_tenders = encode_tenders(answer_table.tenders_df)
+    answer_table.csv_tenders = encode_tender_csv_rows(answer_table.tenders_df)
+    return answer_table
+
+def parse_profile(fields):
+    """Profile data from request fields, with the search form's defaults for missing ones.
+    
+    Unknown fields are ignored. Raises ValueError if a day count is not a whole number or
+    another field is not a string, such as a JSON list or object.
+    """
+    profile_data = dict(PROFILE_DEFAULTS)
+    profile_data.update((field, value) for field, value in fields.items() if field in PROFILE_DEFAULTS)
+    for field in PROFILE_NUMBER_FIELDS:
+        value = profile_data[field]
+        try:
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError
+            profile_data[field] = int(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"השדה {field} חייב להיות מספר שלם") from None
+    for field, value in profile_data.items():
+        if field not in PROFILE_NUMBER_FIELDS and not isinstance(value, str):
+            raise ValueError(f"השדה {field} חייב להיות טקסט")
+    # The form sends no disability as an empty value
+    if profile_data['סיווג_נכות'] == 'אין':
+        profile_data['סיווג_נכות'] = ''
+    return profile_data
+
+def _json_body(payload):
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+BATCH_CHUNK_SIZE = 10000
+BATCH_FORMATS = ['jsonl', 'csv']
+
+# Profiles per executor call when the server matches a batch: results stream out a slice
+# at a time, and no single pandas call of a slice holds the GIL for long
+SERVER_BATCH_SLICE_SIZE = 1000
+
+def read_profile_batch(source, input_format, chunk_size=BATCH_CHUNK_SIZE):
+    """Profile DataFrames of a CSV or JSON-lines file (a path or a file object), chunk by chunk"""
+    if input_format == 'csv':
+        # Empty cells are missing fields; profile IDs stay text so leading zeros survive
+        return pd.read_csv(source, chunksize=chunk_size, dtype={'מספר_פרופיל': str}, encoding='utf-8-sig')
+    return pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False, encoding='utf-8')
+
+def normalize_profile_batch(profiles_df):
+    """Column-wise parse_profile: the profile fields with the form's defaults, and an input error or None per row"""
+    batch = pd.DataFrame(index=profiles_df.index)
+    input_errors = np.full(len(profiles_df), None, dtype=object)
+    for field, default in PROFILE_DEFAULTS.items():
+        if field in profiles_df:
+            values = profiles_df[field].fillna(default)
+        else:
+            values = pd.Series(default, index=profiles_df.index)
+        if field in PROFILE_NUMBER_FIELDS:
+            # Like parse_profile, booleans, fractions and infinities are not day counts
+            if values.dtype == object:
+                is_bool = values.map(lambda value: isinstance(value, (bool, np.bool_))).to_numpy(dtype=bool)
+            else:
+                is_bool = np.full(len(values), pd.api.types.is_bool_dtype(values))
+            numbers = pd.to_numeric(values, errors='coerce')
+            as_float = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+            not_whole = (is_bool | ~np.isfinite(as_float) | (as_float != np.floor(as_float)) |
+                         (np.abs(as_float) >= 2.0 ** 63))
+            input_errors[not_whole & pd.isna(input_errors)] = f"השדה {field} חייב להיות מספר שלם"
+            values = numbers.where(~not_whole, 0).astype(np.int64)
+        elif values.dtype == object:
+            # JSON lines can hold numbers, lists or objects; lists cannot even be grouped by
+            not_text = ~values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+            input_errors[not_text & pd.isna(input_errors)] = f"השדה {field} חייב להיות טקסט"
+            values = values.where(~not_text, default)
+        batch[field] = values
+    batch['סיווג_נכות'] = batch['סיווג_נכות'].replace('אין', '')
+    return batch, input_errors
+
+def match_profile_batch(profiles_df, answer_table, as_of=None):
+    """Match a batch of profiles in one pass, with one answer lookup per distinct matching key.
+    
+    Returns (group id per profile, tender positions per group, error messages per profile).
+    Profiles with errors have group id -1. Tenders whose deadline passed before as_of
+    (default now) are left out.
+    """
+    batch, input_errors = normalize_profile_batch(profiles_df)
+    batch['קטגוריה'] = get_profile_categories(batch)
+    group_ids, group_keys = matching_key_groups(batch)
+    as_of = pd.Timestamp.now() if as_of is None else as_of
+    group_positions = [answer_table.lookup(*key, as_of=as_of) for key in group_keys.itertuples(index=False)]
+    
+    # validate_profile_data runs once per distinct combination of what it looks at
+    checks = pd.DataFrame({
+        'אזור_מועדף': batch['אזור_מועדף'],
+        'ימי_מילואים_מ-7.10.23': batch['ימי_מילואים_מ-7.10.23'] == 0,
+        'תעודת_מילואים_פעיל': batch['תעודת_מילואים_פעיל'],
+        'ימי_מילואים_ב-6_שנים': batch['ימי_מילואים_ב-6_שנים'] == 0,
+        'סיווג_נכות': batch['סיווג_נכות'],
+    })
+    check_ids = checks.groupby(list(checks.columns), sort=False, dropna=False).ngroup().to_numpy()
+    _, first_rows = np.unique(check_ids, return_index=True)
+    check_errors = [validate_profile_data(profile_data)
+                    for profile_data in batch.iloc[first_rows][list(PROFILE_DEFAULTS)].to_dict('records')]
+    
+    errors = [[input_error] if input_error is not None else check_errors[check_id]
+              for input_error, check_id in zip(input_errors, check_ids)]
+    group_ids = np.where([bool(profile_errors) for profile_errors in errors], -1, group_ids)
+    return group_ids, group_positions, errors
+
+def batch_header(output_format):
+    """What a batch output starts with: the CSV header line, nothing for JSON lines"""
+    if output_format == 'csv':
+        return _csv_line(['מספר_פרופיל'] + [field for field, _ in TENDER_JSON_FIELDS])
+    return b''
+
+def render_profile_batch(profiles_df, tender_version, output_format, first_row=0, as_of=None):
+    """Match a chunk of profiles and encode the results, plus summary counts for the chunk.
+    
+    JSON lines give one object per profile, with its tenders or its errors. CSV gives one
+    row per (profile, tender) match; profiles with errors only show in the summary.
+    Profiles are identified by 'מספר_פרופיל', or by their 1-based row number without it.
+    """
+    answer_table = tender_version.answer_table
+    group_ids, group_positions, errors = match_profile_batch(profiles_df, answer_table, as_of)
+    if 'מספר_פרופיל' in profiles_df:
+        profile_ids = profiles_df['מספר_פרופיל'].tolist()
+    else:
+        profile_ids = list(range(first_row + 1, first_row + len(profiles_df) + 1))
+    
+    # Each group's tenders are encoded once and shared by all its profiles
+    lines = []
+    if output_format == 'csv':
+        csv_tenders = answer_table.csv_tenders
+        group_rows = [[csv_tenders[position] for position in positions] for positions in group_positions]
+        for profile_id, group_id in zip(profile_ids, group_ids):
+            if group_id >= 0 and len(group_rows[group_id]):
+                prefix = _csv_line([profile_id])[:-1] + b','
+                lines.extend(prefix + row for row in group_rows[group_id])
+    else:
+        encoded_tenders = answer_table.encoded_tenders
+        group_bodies = [b'"version":%d,"count":%d,"tenders":[%s]' % (
+            tender_version.number, len(positions), b','.join([encoded_tenders[position] for position in positions]))
+            for positions in group_positions]
+        for profile_id, group_id, profile_errors in zip(profile_ids, group_ids, errors):
+            profile_json = _json_body(profile_id)
+            if group_id < 0:
+                lines.append(b'{"profile":%s,"errors":%s}\n' % (profile_json, _json_body(profile_errors)))
+            else:
+                lines.append(b'{"profile":%s,%s}\n' % (profile_json, group_bodies[group_id]))
+    
+    # Group id -1 (profiles with errors) picks the trailing 0
+    match_counts = np.array([len(positions) for positions in group_positions] + [0], dtype=np.intp)[group_ids]
+    summary = {'profiles': len(profiles_df), 'errors': int((group_ids < 0).sum()),
+               'matched_profiles': int((match_counts > 0).sum()), 'matches': int(match_counts.sum())}
+    return b''.join(lines), summary
+
+def iter_batch_results(profile_chunks, tender_version, output_format, as_of=None):
+    """Generator of (encoded results, summary) per chunk of profiles, after the output header"""
+    yield batch_header(output_format), {'profiles': 0, 'errors': 0, 'matched_profiles': 0, 'matches': 0}
+    first_row = 0
+    for profiles_chunk in profile_chunks:
+        yield render_profile_batch(profiles_chunk, tender_version, output_format, first_row, as_of)
+        first_row += len(profiles_chunk)
+
+class MatchService:
+    """Answers the API requests from the current version of a TenderStore.
+    
+    /match bodies are cached per data version and matching key in a ResultCache, so a burst
+    of identical searches is encoded once; its counters are reported by /health.
+    """
+    
+    def __init__(self, store, cache=None):
+        self.store = store
+        self.cache = ResultCache() if cache is None else cache
+    
+    def match(self, fields, as_of=None):
+        """(status, JSON body) of a /match request; tenders whose deadline passed before as_of (default now) are left out"""
+        try:
+            profile_data = parse_profile(fields)
+        except ValueError as e:
+            return 400, _json_body({'errors': [str(e)]})
+        errors = validate_profile_data(profile_data)
+        if errors:
+            return 422, _json_body({'errors': errors})
+        
+        tender_version = self.store.current
+        matching_key = tender_version.answer_table.matching_key(
+            profile_data['אזור_מועדף'], get_profile_category(profile_data), profile_data['חסר_דיור'])
+        if as_of is not None:
+            return 200, self._match_body(tender_version, matching_key, as_of)
+        # The sweeper retires a version within a poll of a deadline passing, so "now" is cached per version
+        cache_key = (tender_version.fingerprint, tender_version.number) + matching_key
+        return 200, self.cache.get_or_compute(
+            cache_key, lambda: self._match_body(tender_version, matching_key, pd.Timestamp.now()))
+    
+    def _match_body(self, tender_version, matching_key, as_of):
+        answer_table = tender_version.answer_table
+        positions = answer_table.lookup(*matching_key, as_of=as_of)
+        encoded_tenders = answer_table.encoded_tenders
+        return b'{"version":%d,"count":%d,"tenders":[%s]}' % (
+            tender_version.number, len(positions), b','.join([encoded_tenders[position] for position in positions]))
+    
+    def health(self):
+        """(status, JSON body) of a /health request, with the counters of the result cache"""
+        tender_version = self.store.current
+        return 200, _json_body({'version': tender_version.number, 'tenders': len(tender_version.tenders_df),
+                                'cache': self.cache.stats()})
+    
+    def respond(self, method, target, body=b''):
+        """(status, JSON body) of one HTTP request; an unexpected error answers 500 rather than dropping the connection"""
+        try:
+            return self._route(method, target, body)
+        except Exception:
+            traceback.print_exc()
+            return 500, _json_body({'errors': ['Internal server error']})
+    
+    def _route(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/health':
+            return self.health() if method == 'GET' else (405, _json_body({'errors': ['GET only']}))
+        if url.path != '/match':
+            return 404, _json_body({'errors': [f"Unknown path: {url.path}"]})
+        
+        if method == 'GET':
+            return self.match(dict(parse_qsl(url.query)))
+        if method != 'POST':
+            return 405, _json_body({'errors': ['GET or POST only']})
+        try:
+            fields = json.loads(body or b'{}')
+        except ValueError:
+            return 400, _json_body({'errors': ['Request body is not valid JSON']})
+        if not isinstance(fields, dict):
+            return 400, _json_body({'errors': ['Request body must be a JSON object']})
+        return self.match(fields)
+    
+    async def match_batch(self, body, input_format, output_format, as_of=None):
+        """(status, body) of a batch request; a successful body is an async generator of encoded chunks.
+        
+        Parsing and matching run in the default executor, one slice of profiles per call, so
+        the event loop keeps answering other connections while a large batch is processed.
+        """
+        if output_format not in BATCH_FORMATS:
+            return 400, _json_body({'errors': [f"Unknown output format: {output_format}"]})
+        loop = asyncio.get_running_loop()
+        try:
+            # The body is already in memory: parse it whole so a bad row fails before any output
+            profile_chunks = await loop.run_in_executor(
+                None, lambda: list(read_profile_batch(io.BytesIO(body), input_format, SERVER_BATCH_SLICE_SIZE)))
+        except ValueError as e:
+            return 400, _json_body({'errors': [f"Could not read the profiles: {e}"]})
+        results = iter_batch_results(profile_chunks, self.store.current, output_format, as_of)
+        return 200, self._stream_batch(loop, results)
+    
+    async def _stream_batch(self, loop, results):
+        while True:
+            result = await loop.run_in_executor(None, next, results, None)
+            if result is None:
+                return
+            yield result[0]
+    
+    async def respond_batch(self, method, target, body, content_type):
+        """(status, body, content type) of a /match/batch request.
+        
+        The body holds CSV profiles when sent as text/csv and JSON lines otherwise; the
+        `format` query parameter picks JSON lines (default) or CSV results.
+        """
+        if method != 'POST':
+            return 405, _json_body({'errors': ['POST only']}), JSON_CONTENT_TYPE
+        input_format = 'csv' if content_type.split(';')[0].strip() == 'text/csv' else 'jsonl'
+        output_format = dict(parse_qsl(urlsplit(target).query)).get('format', 'jsonl')
+        try:
+            status, payload = await self.match_batch(body, input_format, output_format)
+        except Exception:
+            traceback.print_exc()
+            return 500, _json_body({'errors': ['Internal server error']}), JSON_CONTENT_TYPE
+        return status, payload, BATCH_CONTENT_TYPES[output_format] if status == 200 else JSON_CONTENT_TYPE
+    
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it or asks to"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, http_version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                
+                if urlsplit(target).path == '/match/batch':
+                    status, payload, content_type = await self.respond_batch(method, target, body,
+                                                                             headers.get('content-type', ''))
+                else:
+                    status, payload = self.respond(method, target, body)
+                    content_type = JSON_CONTENT_TYPE
+                keep_alive = http_version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                head = b'HTTP/1.1 %d %s\r\nContent-Type: %s\r\nConnection: %s\r\n' % (
+                    status, HTTP_REASONS[status].encode('ascii'), content_type,
+                    b'keep-alive' if keep_alive else b'close')
+                if isinstance(payload, bytes):
+                    writer.write(head + b'Content-Length: %d\r\n\r\n%s' % (len(payload), payload))
+                elif http_version == 'HTTP/1.1':
+                    # Batch results are streamed as they are encoded, one HTTP chunk per profile slice
+                    writer.write(head + b'Transfer-Encoding: chunked\r\n\r\n')
+                    async for chunk in payload:
+                        if chunk:
+                            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                            await writer.drain()
+                    writer.write(b'0\r\n\r\n')
+                else:
+                    payload = b''.join([chunk async for chunk in payload])
+                    writer.write(head + b'Content-Length: %d\r\n\r\n%s' % (len(payload), payload))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            # Malformed request or dropped client: nothing sensible to answer
+            pass
+        except Exception:
+            # Failed while streaming batch results: closing mid-stream tells the client they are incomplete
+            traceback.print_exc()
+        finally:
+            writer.close()
+
+async def serve(service, host, port, ready=None):
+    """Run the API server until cancelled; ready, if given, is set to the bound (host, port)"""
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    if ready is not None:
+        ready.set_result(server.sockets[0].getsockname()[:2])
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve tender matching as a JSON API")
+    parser.add_argument('--host', default='127.0.0.1', help="address to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8080, help="port to bind (default: 8080)")
+    parser.add_argument('--tenders', default=TENDERS_XLSX_PATH,
+                        help=f"tender workbook to serve (default: {TENDERS_XLSX_PATH})")
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                        help="seconds between checks of the workbook for changes (default: 2)")
+    parser.add_argument('--cache-size', type=int, default=256, help="cached /match results (default: 256)")
+    parser.add_argument('--cache-ttl', type=float, default=600.0,
+                        help="seconds a cached /match result is kept (default: 600)")
+    args = parser.parse_args()
+    
+    store = TenderStore(args.tenders, build_api_answer_table, poll_interval=args.poll_interval,
+                        sweep_expired=True).start()
+    print(f"Serving {len(store.current.tenders_df)} tenders from {args.tenders} on http://{args.host}:{args.port}",
+          flush=True)
+    try:
+        asyncio.run(serve(MatchService(store, ResultCache(args.cache_size, args.cache_ttl)), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop()
+
+if __name__ == "__main__":
+    main()
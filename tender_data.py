@@ -0,0 +1,271 @@
+"""
+Tender and profile file access shared by the matcher, the CLIs and the Streamlit apps.
+
+Files are identified by a fingerprint (path, mtime, content hash) so that caches built on
+top of them are invalidated as soon as the file changes on disk.
+
+Parsing a tender table also parses its date columns into datetime64 columns and their
+display strings, and its plot-count text into integer columns, so nothing downstream
+parses a date or a count again.
+
+Parsed tables are also kept as binary snapshots under SNAPSHOT_DIR: loading one takes a
+few milliseconds instead of a full openpyxl / CSV parse, and a snapshot is re-ingested
+automatically when its source file changes. Run this module to ingest the default sources.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import pandas as pd
+
+SNAPSHOT_DIR = 'data/.snapshots'
+
+# Bump when the snapshot layout or the parsing of a source changes
+SNAPSHOT_VERSION = 4
+
+DEFAULT_TENDERS_PATH = 'data/טבלת מכרזים יולי 25.xlsx'
+DEFAULT_PROFILES_PATH = 'data/csv_output/טבלת הפרופילים.csv'
+
+# Content hashes already computed, keyed by (path, mtime_ns, size): an unchanged file is
+# hashed once, so a fingerprint check is a single stat call
+_content_hashes = {}
+
+def file_hash(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as data_file:
+        for block in iter(lambda: data_file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(path):
+    """(path, mtime_ns, content hash) of a file; raises FileNotFoundError if it is missing"""
+    path = os.fspath(path)
+    stat = os.stat(path)
+    stat_key = (path, stat.st_mtime_ns, stat.st_size)
+    if stat_key not in _content_hashes:
+        _content_hashes[stat_key] = file_hash(path)
+    return path, stat.st_mtime_ns, _content_hashes[stat_key]
+
+# Source date column -> parsed datetime64 column; its display strings go to '<name>_text'
+TENDER_DATE_COLUMNS = {
+    'תאריך פרסום חוברת': 'publish_date',
+    'מועד אחרון להגשת הצעות': 'deadline',
+}
+
+NO_DATE_TEXT = 'לא צוין'
+
+# Deadline cell text of a cancelled tender
+CANCELLED_TEXT = 'בוטל'
+
+# Deadline of a cancelled tender: the earliest datetime64[ns], so it counts as expired at
+# any point in time
+CLOSED_DEADLINE = pd.Timestamp.min.to_datetime64()
+
+def parse_tender_dates(values):
+    """Parse a date column mixing datetime cells and text into datetime64; text that is not a date ('בוטל') becomes NaT"""
+    # Typed-in cells carry stray spaces and dots, e.g. ' .30/07/2025  0:00:00'
+    values = values.map(lambda value: value.strip(' .') if isinstance(value, str) else value)
+    # ISO text ('2025-06-10 00:00:00') first: dayfirst would read it as 6 October
+    dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    day_first = pd.to_datetime(values.where(dates.isna()), errors='coerce', dayfirst=True, format='mixed')
+    return dates.fillna(day_first).astype('datetime64[ns]')
+
+def format_israeli_dates(dates, source=None):
+    """Format a datetime64 column as 'DD.M.YYYY בשעה HH:MM' strings in one pass.
+    
+    Missing dates become NO_DATE_TEXT, or the source cell's text when it has some
+    (a cancelled tender keeps 'בוטל').
+    """
+    formatted = (dates.dt.day.astype('Int64').astype(str) + '.' + dates.dt.month.astype('Int64').astype(str) + '.' +
+                 dates.dt.year.astype('Int64').astype(str) + ' בשעה ' + dates.dt.strftime('%H:%M'))
+    fallback = pd.Series(NO_DATE_TEXT, index=dates.index, dtype=object)
+    if source is not None:
+        fallback = fallback.mask(_has_text(source), source.map(str).str.strip())
+    return formatted.astype(object).where(dates.notna(), fallback)
+
+def _has_text(source):
+    """Whether each cell says something, as opposed to empty, 'nan' or NO_DATE_TEXT"""
+    return source.notna() & ~source.map(str).str.strip().isin(['', 'nan', NO_DATE_TEXT])
+
+def add_tender_dates(tenders_df):
+    """Add the parsed date columns and their display strings, once per load"""
+    tenders_df = tenders_df.copy()
+    for source, column in TENDER_DATE_COLUMNS.items():
+        tenders_df[column] = parse_tender_dates(tenders_df[source])
+        tenders_df[f"{column}_text"] = format_israeli_dates(tenders_df[column], tenders_df[source])
+    return tenders_df
+
+def ensure_tender_dates(tenders_df):
+    """Return tenders_df with the date columns, parsing only if they are missing"""
+    if all(f"{column}_text" in tenders_df.columns for column in TENDER_DATE_COLUMNS.values()):
+        return tenders_df
+    return add_tender_dates(tenders_df)
+
+# Parsed plot counts: nullable Int64, <NA> where the text gives no number in that unit
+PLOT_COUNT_COLUMNS = ['plot_count', 'housing_units', 'disabled_priority_plots', 'disabled_priority_units',
+                      'miluim_priority_plots', 'miluim_priority_units']
+
+# Source priority column -> (plots column, housing units column, 'כל המגרשים' flag column)
+PRIORITY_PLOT_COLUMNS = {
+    'כמה מגרשים בעדיפות בהגרלה לנכי צה"ל': ('disabled_priority_plots', 'disabled_priority_units', 'disabled_priority_all'),
+    'כמה מגרשים בעדיפות בהגרלה לחיילי מילואים': ('miluim_priority_plots', 'miluim_priority_units', 'miluim_priority_all'),
+}
+PRIORITY_ALL_COLUMNS = [all_column for _, _, all_column in PRIORITY_PLOT_COLUMNS.values()]
+
+def _count_text(values):
+    """Cells as text without thousands separators; missing cells become ''"""
+    return values.astype(object).where(values.notna(), '').map(str).str.replace(',', '', regex=False).str.strip()
+
+def _extract_count(text, pattern):
+    return pd.to_numeric(text.str.extract(pattern, expand=False)).astype('Int64')
+
+def parse_plot_counts(values):
+    """Plots and housing units from text like '4 מגרשים (6 יח"ד)', '308 יח"ד' or '40 מגרשים'"""
+    text = _count_text(values)
+    return _extract_count(text, r'(\d+)\s*מגרש'), _extract_count(text, r'(\d+)\s*יח')
+
+def parse_priority_plots(values, plot_count, housing_units):
+    """Priority plots, priority housing units and the 'all plots' flag.
+    
+    A number counts in the unit the cell gives: '132 מגרשים' or a bare 150 are plots, '2 יח"ד'
+    is housing units. 'כל המגרשים' takes the tender's own plots and units, so a tender listed
+    only in units keeps its flag and unit count; 'לא רלוונטי' counts none of either.
+    """
+    text = _count_text(values)
+    all_plots = (text == 'כל המגרשים').to_numpy(dtype=bool)
+    not_relevant = text == 'לא רלוונטי'
+    plots = _extract_count(text, r'^(\d+)\s*(?:מגרש|$)').mask(not_relevant, 0).mask(all_plots, plot_count)
+    units = _extract_count(text, r'^(\d+)\s*יח').mask(not_relevant, 0).mask(all_plots, housing_units)
+    return plots, units, all_plots
+
+def add_plot_counts(tenders_df):
+    """Add the parsed plot-count columns and 'all plots' flags, once per load"""
+    tenders_df = tenders_df.copy()
+    tenders_df['plot_count'], tenders_df['housing_units'] = parse_plot_counts(tenders_df['מספר מגרשים'])
+    for source, (plots_column, units_column, all_column) in PRIORITY_PLOT_COLUMNS.items():
+        tenders_df[plots_column], tenders_df[units_column], tenders_df[all_column] = parse_priority_plots(
+            tenders_df[source], tenders_df['plot_count'], tenders_df['housing_units'])
+    return tenders_df
+
+def has_priority_plots(tender, all_column, plots_column, units_column):
+    """Whether a tender row gives priority plots: all of them, or a positive count of plots or units"""
+    counts = [tender.get(plots_column), tender.get(units_column)]
+    return bool(tender.get(all_column)) or any(pd.notna(count) and count > 0 for count in counts)
+
+def ensure_plot_counts(tenders_df):
+    """Return tenders_df with the plot-count columns, parsing only if they are missing"""
+    if all(column in tenders_df.columns for column in PLOT_COUNT_COLUMNS):
+        return tenders_df
+    return add_plot_counts(tenders_df)
+
+def tender_deadlines(tenders_df):
+    """Deadline of every tender as a datetime64 array for expiry checks.
+    
+    A cell marked CANCELLED_TEXT gives CLOSED_DEADLINE. Any other cell that is not a
+    date - empty, 'טרם נקבע' or a mistyped date - gives NaT, which stays open, so a live
+    tender is never hidden because of its deadline text.
+    """
+    source = tenders_df['מועד אחרון להגשת הצעות']
+    if 'deadline' in tenders_df.columns:
+        deadlines = tenders_df['deadline']
+    else:
+        deadlines = parse_tender_dates(source)
+    cancelled = source.map(lambda value: isinstance(value, str) and value.strip(' .') == CANCELLED_TEXT)
+    closed = (deadlines.isna() & cancelled).to_numpy(dtype=bool)
+    deadlines = deadlines.to_numpy(dtype='datetime64[ns]', copy=True)
+    deadlines[closed] = CLOSED_DEADLINE
+    return deadlines
+
+def parse_tender_table(path):
+    """Parse a tender table from an Excel workbook or a CSV export"""
+    if os.fspath(path).lower().endswith(('.xlsx', '.xls')):
+        tenders_df = pd.read_excel(path)
+    else:
+        tenders_df = pd.read_csv(path)
+    return add_plot_counts(add_tender_dates(tenders_df))
+
+def parse_profile_table(path):
+    """Parse the profile CSV"""
+    return pd.read_csv(path)
+
+def snapshot_path(source_path, snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot file of a source; the source's absolute path keeps same-named files apart"""
+    source = Path(source_path).resolve()
+    path_tag = hashlib.sha1(str(source).encode('utf-8')).hexdigest()[:8]
+    return Path(snapshot_dir) / f"{source.name}.{path_tag}.pkl"
+
+def _write_snapshot(path, snapshot):
+    """Write a snapshot atomically, so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as snapshot_file:
+        pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+def _read_snapshot(path):
+    """The snapshot stored at path, or None if it is missing, unreadable or not of this version"""
+    try:
+        with open(path, 'rb') as snapshot_file:
+            snapshot = pickle.load(snapshot_file)
+        # A corrupt or foreign pickle can fail in many ways, and an old one may load but not fit
+        if (isinstance(snapshot, dict) and snapshot.get('version') == SNAPSHOT_VERSION
+                and isinstance(snapshot['frame'], pd.DataFrame)
+                and isinstance(snapshot['mtime_ns'], int) and isinstance(snapshot['size'], int)
+                and isinstance(snapshot['content_hash'], str)):
+            return snapshot
+    except Exception:
+        pass
+    return None
+
+def load_with_snapshot(source_path, parser, snapshot_dir=None):
+    """Load a table through its binary snapshot, re-ingesting it when the source changed.
+    
+    The snapshot is a pickled DataFrame, so every dtype - including the mixed date/text
+    object columns of the workbook - comes back exactly as the parser produced it. It is
+    trusted when the source's mtime and size are unchanged; otherwise the source is hashed
+    and parsed again only if its content differs. Snapshot write failures are not fatal.
+    """
+    stat = os.stat(source_path)
+    path = snapshot_path(source_path, SNAPSHOT_DIR if snapshot_dir is None else snapshot_dir)
+    snapshot = _read_snapshot(path)
+    if snapshot is not None:
+        if (snapshot['mtime_ns'], snapshot['size']) == (stat.st_mtime_ns, stat.st_size):
+            return snapshot['frame']
+        content_hash = file_hash(source_path)
+        if snapshot['content_hash'] == content_hash:
+            # Touched but not modified: refresh the stat fields only
+            snapshot.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            try:
+                _write_snapshot(path, snapshot)
+            except OSError:
+                pass
+            return snapshot['frame']
+    
+    frame = parser(source_path)
+    snapshot = {'version': SNAPSHOT_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                'content_hash': file_hash(source_path), 'frame': frame}
+    try:
+        _write_snapshot(path, snapshot)
+    except OSError:
+        pass
+    return frame
+
+def read_tender_table(path, snapshot_dir=None):
+    """Read a tender table (Excel or CSV) through its snapshot"""
+    return load_with_snapshot(path, parse_tender_table, snapshot_dir)
+
+def read_profile_table(path, snapshot_dir=None):
+    """Read the profile CSV through its snapshot"""
+    return load_with_snapshot(path, parse_profile_table, snapshot_dir)
+
+def main():
+    """Ingest the default tender workbook and profile CSV into snapshots"""
+    for path, reader in [(DEFAULT_TENDERS_PATH, read_tender_table), (DEFAULT_PROFILES_PATH, read_profile_table)]:
+        frame = reader(path)
+        print(f"{path}: {len(frame)} rows -> {snapshot_path(path)}")
+
+if __name__ == "__main__":
+    main()
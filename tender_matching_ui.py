@@ -1,13 +1,11 @@
 import streamlit as st
 import pandas as pd
-from create_comprehensive_matches import (
-    is_miluim_soldier, 
-    get_profile_category, 
-    check_area_match, 
-    check_eligibility_match, 
-    check_housing_match
-)
-from datetime import datetime, timedelta
+import numpy as np
+from create_comprehensive_matches import get_profile_category, validate_profile_data
+from tender_data import PLOT_COUNT_COLUMNS, PRIORITY_ALL_COLUMNS, ensure_plot_counts, ensure_tender_dates, has_priority_plots
+from ui_data import current_tender_version, get_match_cache, get_tender_store
+
+TENDERS_PATH = 'data/csv_output/טבלת מכרזים ניסיון שני_.csv'
 
 # Set page configuration
 st.set_page_config(
@@ -138,111 +136,141 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def validate_profile_data(profile_data):
-    """Validate profile data and return error messages if any"""
-    errors = []
-    
-    # Check required fields
-    if not profile_data.get('אזור_מועדף'):
-        errors.append("יש לבחור אזור מועדף")
-    
-    # Check logical consistency
-    if (profile_data.get('ימי_מילואים_מ-7.10.23', 0) == 0 and 
-        profile_data.get('תעודת_מילואים_פעיל') == 'לא' and 
-        profile_data.get('ימי_מילואים_ב-6_שנים', 0) == 0 and
-        profile_data.get('סיווג_נכות') == 'אין'):
-        errors.append("על פי הנתונים שהזנת, אינך זכאי להטבות מכרזי דיור מיוחדים")
-    
-    return errors
+# Display column -> source column in the tender table
+TENDER_DISPLAY_COLUMNS = [
+    ('מספר מכרז', 'מספר המכרז'),
+    ('עיר', 'עיר'),
+    ('שכונה', 'שכונה'),
+    ('אזור גיאוגרפי', 'אזור גיאוגרפי '),
+    ('מספר מגרשים', 'מספר מגרשים'),
+    ('מגרשים לנכי צה"ל', 'כמה מגרשים בעדיפות בהגרלה לנכי צה"ל'),
+    ('מגרשים לחיילי מילואים', 'כמה מגרשים בעדיפות בהגרלה לחיילי מילואים'),
+    # Dates are formatted once at load, see tender_data.add_tender_dates
+    ('תאריך פרסום חוברת המכרז', 'publish_date_text'),
+    ('מועד אחרון להגשה', 'deadline_text'),
+    ('אזור עדיפות', 'אזור עדיפות'),
+    ('מי רשאי להגיש', 'מי רשאי להגיש'),
+    ('סטטוס דיור נדרש', 'סטטוס דיור נדרש'),
+] + [(column, column) for column in PLOT_COUNT_COLUMNS + PRIORITY_ALL_COLUMNS + ['deadline']]  # parsed values, see tender_data
+
+# Cards built per rerun; "load more" adds another page
+CARDS_PER_PAGE = 10
+
+# Table view column -> display table column; counts and deadline stay numeric so the table sorts by them
+RESULTS_TABLE_COLUMNS = [
+    ('מספר מכרז', 'מספר מכרז'),
+    ('עיר', 'עיר'),
+    ('שכונה', 'שכונה'),
+    ('אזור גיאוגרפי', 'אזור גיאוגרפי'),
+    ('אזור עדיפות', 'אזור עדיפות'),
+    ('מגרשים', 'plot_count'),
+    ('יח"ד', 'housing_units'),
+    ('מגרשים לנכי צה"ל', 'disabled_priority_plots'),
+    ('יח"ד לנכי צה"ל', 'disabled_priority_units'),
+    ('מגרשים לחיילי מילואים', 'miluim_priority_plots'),
+    ('יח"ד לחיילי מילואים', 'miluim_priority_units'),
+    ('מועד אחרון להגשה', 'deadline'),
+    ('קישור למכרז', 'קישור למכרז'),
+]
+
+def build_tender_display_table(tenders_df, positions):
+    """Select the matched tenders by position and rename their columns for display"""
+    if len(positions) == 0:
+        return pd.DataFrame()
+    display_df = ensure_plot_counts(ensure_tender_dates(tenders_df)).iloc[positions][[source for _, source in TENDER_DISPLAY_COLUMNS]]
+    display_df.columns = [display for display, _ in TENDER_DISPLAY_COLUMNS]
+    return display_df.reset_index(drop=True)
+
+def build_results_table(matches):
+    """The matches as the compact table view, with the columns renamed for display"""
+    columns = [(display, source) for display, source in RESULTS_TABLE_COLUMNS if source in matches.columns]
+    table = matches[[source for _, source in columns]]
+    table.columns = [display for display, _ in columns]
+    return table
+
+# Result of a search that failed; shared and read-only like the cached results
+NO_MATCHES = (np.array([], dtype=np.int32), pd.DataFrame())
 
-def find_matching_tenders(profile_data):
-    """Find tenders that match the user profile"""
+# as_of of the app's searches: the deadline cut-off at the time of the search
+AS_OF_NOW = 'now'
+
+def match_tenders(profile_data, tender_version=None, as_of=None):
+    """Search the tenders for a profile, in tender_version or the current one.
+    
+    Returns (tender_version, (int32 positions into its tenders_df, display table), errors).
+    With as_of, tenders whose deadline passed before it are left out. Results without a
+    cut-off or cut off at AS_OF_NOW are shared through the process-wide match cache, keyed
+    by data version and (area, category, housing) key, so the display table must be
+    treated as read-only. The sweeper retires a version within a poll of a deadline
+    passing, so "now" stays right for the whole version; any other as_of is computed
+    directly.
+    """
     try:
         # Validate profile data
         validation_errors = validate_profile_data(profile_data)
         if validation_errors:
-            return pd.DataFrame(), validation_errors
+            return tender_version, NO_MATCHES, validation_errors
         
-        # Load tender data
-        tenders_df = pd.read_csv('data/csv_output/טבלת מכרזים ניסיון שני_.csv')
+        # Answers for every (area, category, housing) key are built once per data version
+        if tender_version is None:
+            tender_version = current_tender_version(TENDERS_PATH)
+        answer_table = tender_version.answer_table
         
-        # Create profile series
-        profile = pd.Series(profile_data)
+        # Get profile category; it only indexes the fields, so the dict needs no Series around it
+        profile_category = get_profile_category(profile_data)
         
-        # Get profile category
-        profile_category = get_profile_category(profile)
+        # Identical keys share one result: no matching per search, and a burst of them is computed once
+        matching_key = answer_table.matching_key(profile_data['אזור_מועדף'], profile_category, profile_data['חסר_דיור'])
         
-        matching_tenders = []
+        as_of_now = isinstance(as_of, str) and as_of == AS_OF_NOW
         
-        for _, tender in tenders_df.iterrows():
-            # Apply matching filters
-            area_match = check_area_match(profile_data['אזור_מועדף'], tender['אזור גיאוגרפי '])
-            eligibility_match = check_eligibility_match(profile_category, tender['מי רשאי להגיש'])
-            housing_match = check_housing_match(profile_data['חסר_דיור'], tender['סטטוס דיור נדרש'])
-            
-            # Only include if all criteria match
-            if area_match and eligibility_match and housing_match:
-                matching_tenders.append({
-                    'מספר מכרז': tender['מספר המכרז'],
-                    'עיר': tender['עיר'],
-                    'שכונה': tender['שכונה'],
-                    'אזור גיאוגרפי': tender['אזור גיאוגרפי '],
-                    'מספר מגרשים': tender['מספר מגרשים'],
-                    'מגרשים לנכי צה"ל': tender['כמה מגרשים בעדיפות בהגרלה לנכי צה"ל'],
-                    'מגרשים לחיילי מילואים': tender['כמה מגרשים בעדיפות בהגרלה לחיילי מילואים'],
-                    'תאריך פרסום חוברת המכרז': tender['תאריך פרסום חוברת'],
-                    'מועד אחרון להגשה': tender['מועד אחרון להגשת הצעות'],
-                    'אזור עדיפות': tender['אזור עדיפות'],
-                    'מי רשאי להגיש': tender['מי רשאי להגיש'],
-                    'סטטוס דיור נדרש': tender['סטטוס דיור נדרש']
-                })
+        def compute():
+            cut_off = pd.Timestamp.now() if as_of_now else as_of
+            positions = answer_table.lookup(*matching_key, as_of=cut_off).astype(np.int32)
+            return positions, build_tender_display_table(tender_version.tenders_df, positions)
         
-        return pd.DataFrame(matching_tenders), []
+        if as_of is not None and not as_of_now:
+            return tender_version, compute(), []
+        cache_key = (tender_version.fingerprint, tender_version.number, as_of) + matching_key
+        return tender_version, get_match_cache().get_or_compute(cache_key, compute), []
         
     except FileNotFoundError as e:
-        return pd.DataFrame(), [f"קובץ הנתונים לא נמצא: {str(e)}"]
+        return tender_version, NO_MATCHES, [f"קובץ הנתונים לא נמצא: {str(e)}"]
     except Exception as e:
-        return pd.DataFrame(), [f"אירעה שגיאה בעת חיפוש המכרזים: {str(e)}"]
+        return tender_version, NO_MATCHES, [f"אירעה שגיאה בעת חיפוש המכרזים: {str(e)}"]
 
-def format_israeli_date(date_input):
-    """Convert date from any format to Israeli format DD.M.YYYY בשעה HH:MM"""
-    if not date_input or str(date_input) == 'nan' or str(date_input) == 'לא צוין':
-        return 'לא צוין'
-    
-    try:
-        # Handle pandas timestamp or datetime objects directly
-        if hasattr(date_input, 'day') and hasattr(date_input, 'month'):
-            dt = date_input
-        else:
-            # Convert to string and try to parse
-            date_str = str(date_input).strip()
-            
-            # Try different date formats
-            if 'T' in date_str:
-                # ISO format with T
-                dt = datetime.fromisoformat(date_str.replace('T', ' ').split('.')[0])
-            elif len(date_str) == 10:
-                # YYYY-MM-DD format
-                dt = datetime.strptime(date_str, '%Y-%m-%d')
-            else:
-                # YYYY-MM-DD HH:MM:SS format
-                dt = datetime.strptime(date_str.split('.')[0], '%Y-%m-%d %H:%M:%S')
-        
-        # Format to Israeli style: DD.M.YYYY בשעה HH:MM
-        day = dt.day
-        month = dt.month
-        year = dt.year
-        hour = dt.hour if hasattr(dt, 'hour') else 0
-        minute = dt.minute if hasattr(dt, 'minute') else 0
-        
-        return f"{day}.{month}.{year} בשעה {hour:02d}:{minute:02d}"
-        
-    except (ValueError, TypeError, AttributeError) as e:
-        # If parsing fails, return original string
-        return str(date_input)
+def find_matching_positions(profile_data, tender_version=None, as_of=None):
+    """Positions of the tenders that match the user profile, as (tender_version, int32 positions, errors)"""
+    tender_version, (positions, _), errors = match_tenders(profile_data, tender_version, as_of)
+    return tender_version, positions, errors
 
-def render_tender_with_streamlit(tender):
-    """Render tender card with blue background using expander"""
+def find_matching_tenders(profile_data, tender_version=None, as_of=None):
+    """Find tenders that match the user profile, as the display table"""
+    _, (_, matches), errors = match_tenders(profile_data, tender_version, as_of)
+    if errors:
+        return pd.DataFrame(), errors
+    return matches, []
+
+def load_session_matches():
+    """Display table of the session's matches, resolved against the shared tender store.
+    
+    The session only keeps its data version and the matched positions; if that version
+    has been retired since, the search is run again on the current one.
+    """
+    positions = st.session_state.match_positions
+    if len(positions) == 0:
+        return pd.DataFrame()
+    
+    tender_version = get_tender_store(TENDERS_PATH).get(st.session_state.tender_version)
+    if tender_version is None:
+        tender_version, (positions, matches), _ = match_tenders(st.session_state.profile_data, as_of=AS_OF_NOW)
+        st.session_state.tender_version = tender_version.number if tender_version else None
+        st.session_state.match_positions = positions
+        return matches
+    return build_tender_display_table(tender_version.tenders_df, positions)
+
+def build_card_fragments(tender):
+    """Markdown and HTML of one tender card; they depend only on the tender row"""
     
     # Get location info safely
     city = str(tender.get('עיר', ''))
@@ -260,90 +288,162 @@ def render_tender_with_streamlit(tender):
     
     location_display = ' • '.join(location_parts) if location_parts else 'מיקום לא צוין'
     
+    # Priority badge as (Streamlit alert, text)
+    priority_status = str(tender.get('אזור עדיפות', ''))
+    if priority_status == "A":
+        priority = ('error', "🔥 עדיפות א'")
+    elif priority_status == "B":
+        priority = ('warning', "⚡ עדיפות ב'")
+    else:
+        priority = ('info', "📋 ללא עדיפות לאומית")
+    
+    # Special plots badges, for 'all plots' or a positive parsed count of plots or units
+    miluim_badge = None
+    miluim_plots = tender.get('מגרשים לחיילי מילואים', 0)
+    if has_priority_plots(tender, 'miluim_priority_all', 'miluim_priority_plots', 'miluim_priority_units'):
+        miluim_badge = f"🎖️ מגרשים למילואים: {miluim_plots}"
+    
+    disability_badge = None
+    disability_plots = tender.get('מגרשים לנכי צה"ל', 0)
+    if has_priority_plots(tender, 'disabled_priority_all', 'disabled_priority_plots', 'disabled_priority_units'):
+        disability_badge = f"🏅 מגרשים לנכי צה\"ל: {disability_plots}"
+    
+    housing_markdown = None
+    housing_req = tender.get('סטטוס דיור נדרש', 'לא צוין')
+    if housing_req and str(housing_req) != 'nan':
+        # Show "עדיפות לחסרי דיור" instead of "לא צוין"
+        if housing_req == 'לא צוין':
+            housing_req = 'עדיפות לחסרי דיור'
+        housing_markdown = f"🏠 **דרישת דיור:** {housing_req}"
+    
+    # Direct link button - opens immediately without additional clicks
+    link_html = f"""
+    <a href="https://apps.land.gov.il/MichrazimSite/#/search" target="_blank" style="
+        display: inline-block;
+        padding: 0.5rem 1rem;
+        background-color: #1f2937;
+        color: white;
+        text-decoration: none;
+        border-radius: 0.375rem;
+        font-weight: 500;
+        text-align: center;
+        border: none;
+        cursor: pointer;
+        width: 100%;
+    ">
+        🌐 למערכת המכרזים של רמ״י
+    </a>
+    """
+    
+    return {
+        'header': f"🏆 מכרז #{tender['מספר מכרז']} | 📍 {location_display}",
+        'plots': f"🏠 **מספר מגרשים:** {tender['מספר מגרשים']}",
+        'priority': priority,
+        'miluim': miluim_badge,
+        'disability': disability_badge,
+        'publish_date': f"📅 **תאריך פרסום חוברת:** {tender.get('תאריך פרסום חוברת המכרז', 'לא צוין')}",
+        'deadline': f"⏰ **מועד אחרון:** {tender.get('מועד אחרון להגשה', 'לא צוין')}",
+        'eligibility': f"👥 **זכאות:** {tender.get('מי רשאי להגיש', 'לא צוין')}",
+        'housing': housing_markdown,
+        'link': link_html,
+    }
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_card_fragments(data_version):
+    """Card fragments of every tender of a data version, keyed by 'מספר מכרז'; shared by all sessions.
+    
+    Built once per version and looked up once per rerun, so a card costs a dict lookup.
+    None if the version is no longer retained.
+    """
+    tender_version = get_tender_store(TENDERS_PATH).get(data_version)
+    if tender_version is None:
+        return None
+    display_df = build_tender_display_table(tender_version.tenders_df, range(len(tender_version.tenders_df)))
+    return {tender['מספר מכרז']: build_card_fragments(tender) for _, tender in display_df.iterrows()}
+
+def render_tender_with_streamlit(tender, fragments=None):
+    """Render tender card with blue background using expander"""
+    if fragments is None:
+        fragments = build_card_fragments(tender)
+    
     # Create blue card using expander with custom styling
-    header_text = f"🏆 מכרז #{tender['מספר מכרז']} | 📍 {location_display}"
-    with st.expander(header_text, expanded=True):
+    with st.expander(fragments['header'], expanded=True):
         
         # Row 1: Priority (RIGHT) and Plot count (LEFT) - same size
         col_left, col_right = st.columns([1, 1])
         
         with col_left:
             # Plot count on the LEFT - normal size
-            st.markdown(f"🏠 **מספר מגרשים:** {tender['מספר מגרשים']}")
+            st.markdown(fragments['plots'])
         
         with col_right:
             # Priority on the RIGHT - normal size
-            priority_status = str(tender.get('אזור עדיפות', ''))
-            if priority_status == "A":
-                st.error("🔥 עדיפות א'")
-            elif priority_status == "B":
-                st.warning("⚡ עדיפות ב'")
-            else:
-                st.info("📋 ללא עדיפות לאומית")
+            alert, priority_text = fragments['priority']
+            getattr(st, alert)(priority_text)
         
         # Row 2: Special plots info
         special_col_left, special_col_right = st.columns([1, 1])
         
         with special_col_left:
-            miluim_plots = tender.get('מגרשים לחיילי מילואים', 0)
-            if miluim_plots and str(miluim_plots) != 'nan' and str(miluim_plots) != '0':
-                st.success(f"🎖️ מגרשים למילואים: {miluim_plots}")
+            if fragments['miluim']:
+                st.success(fragments['miluim'])
         
         with special_col_right:
-            disability_plots = tender.get('מגרשים לנכי צה"ל', 0)
-            if disability_plots and str(disability_plots) != 'nan' and str(disability_plots) != '0':
-                st.success(f"🏅 מגרשים לנכי צה\"ל: {disability_plots}")
+            if fragments['disability']:
+                st.success(fragments['disability'])
         
         # Row 3: Dates - same size as plot count and priority
         date_col_left, date_col_right = st.columns([1, 1])
         
         with date_col_left:
-            publish_date = tender.get('תאריך פרסום חוברת המכרז', 'לא צוין')
-            formatted_publish_date = format_israeli_date(publish_date)
-            st.markdown(f"📅 **תאריך פרסום חוברת:** {formatted_publish_date}")
+            st.markdown(fragments['publish_date'])
         
         with date_col_right:
-            deadline = tender.get('מועד אחרון להגשה', 'לא צוין')
-            formatted_deadline = format_israeli_date(deadline)
-            st.markdown(f"⏰ **מועד אחרון:** {formatted_deadline}")
+            st.markdown(fragments['deadline'])
         
         # Row 4: Eligibility and housing requirements
         req_col_left, req_col_right = st.columns([1, 1])
         
         with req_col_left:
-            eligibility = tender.get('מי רשאי להגיש', 'לא צוין')
-            st.markdown(f"👥 **זכאות:** {eligibility}")
+            st.markdown(fragments['eligibility'])
         
         with req_col_right:
-            housing_req = tender.get('סטטוס דיור נדרש', 'לא צוין')
-            if housing_req and str(housing_req) != 'nan':
-                # Show "עדיפות לחסרי דיור" instead of "לא צוין"
-                if housing_req == 'לא צוין':
-                    housing_req = 'עדיפות לחסרי דיור'
-                st.markdown(f"🏠 **דרישת דיור:** {housing_req}")
+            if fragments['housing']:
+                st.markdown(fragments['housing'])
         
         # Row 5: Button on the left side
         button_col_left, button_col_right = st.columns([1, 1])
         
         with button_col_left:
-            # Direct link button - opens immediately without additional clicks
-            st.markdown(f"""
-            <a href="https://apps.land.gov.il/MichrazimSite/#/search" target="_blank" style="
-                display: inline-block;
-                padding: 0.5rem 1rem;
-                background-color: #1f2937;
-                color: white;
-                text-decoration: none;
-                border-radius: 0.375rem;
-                font-weight: 500;
-                text-align: center;
-                border: none;
-                cursor: pointer;
-                width: 100%;
-            ">
-                🌐 למערכת המכרזים של רמ״י
-            </a>
-            """, unsafe_allow_html=True)
+            st.markdown(fragments['link'], unsafe_allow_html=True)
+
+def show_more_cards():
+    st.session_state.cards_shown += CARDS_PER_PAGE
+
+def render_tender_cards(matches):
+    """Render the cards of the first pages only, with a button that adds the next page"""
+    cards_shown = st.session_state.cards_shown
+    data_version = st.session_state.tender_version
+    card_fragments = (get_card_fragments(data_version) if data_version is not None else None) or {}
+    for _, tender in matches.iloc[:cards_shown].iterrows():
+        render_tender_with_streamlit(tender, card_fragments.get(tender['מספר מכרז']))
+        st.markdown("---")
+    
+    remaining = len(matches) - cards_shown
+    if remaining > 0:
+        st.button(f"⬇️ הצג עוד מכרזים ({remaining} נוספים)", key="show_more_cards", on_click=show_more_cards,
+                  width="stretch")
+
+def render_tender_table(matches):
+    """Render all the matches as one sortable table"""
+    st.dataframe(
+        build_results_table(matches),
+        hide_index=True,
+        column_config={
+            'מועד אחרון להגשה': st.column_config.DatetimeColumn(format="D.M.YYYY HH:mm"),
+            'קישור למכרז': st.column_config.LinkColumn(display_text="לדף המכרז"),
+        },
+    )
 
 def show_profile_summary(profile_data):
     """Show a summary of the user's profile"""
@@ -375,6 +475,57 @@ def show_profile_summary(profile_data):
     else:
         st.warning(f"⚠️ **קטגוריה:** {category} - ייתכן ולא תהיה זכאי להטבות מיוחדות")
 
+@st.fragment
+def show_results():
+    """The results pane; widgets in it rerun only this fragment, not the search form"""
+    if st.session_state.search_performed:
+        # Show validation errors if any
+        if st.session_state.validation_errors:
+            for error in st.session_state.validation_errors:
+                st.error(f"❌ {error}")
+            st.markdown("---")
+        
+        # Show profile summary
+        if st.session_state.profile_data:
+            show_profile_summary(st.session_state.profile_data)
+            st.markdown("---")
+        
+        matches = load_session_matches()
+        if not matches.empty:
+            st.markdown("### ✅ מכרזים מתאימים לפרופיל שלך")
+            
+            # Show messages BEFORE the tender cards
+            st.success(f"נמצאו {len(matches)} מכרזים מתאימים לך!")
+            
+            # Government website link - show prominently at the top
+            st.info("""
+🔗 **על מנת להתקדם להגשה יש להכנס למערכת המכרזים של רמ״י ולפתוח את המכרז שבחרתם לפי מספר המכרז שהוצג למטה.**
+
+**לסיוע בתהליך המלא אנו מזמינים אתכם ליצור קשר עם הצוות שלנו בכתובת:** yuvalk@apm.law
+""")
+            
+            st.markdown("---")
+            
+            # Cards are built a page at a time; the table shows every match in one element
+            results_view = st.radio("תצוגת תוצאות", ["כרטיסים", "טבלה"], horizontal=True, key="results_view")
+            if results_view == "טבלה":
+                render_tender_table(matches)
+            else:
+                render_tender_cards(matches)
+            
+        else:
+            if not st.session_state.validation_errors:  # Only show if no validation errors
+                st.warning("😔 לא נמצאו מכרזים מתאימים לפרופיל שלך")
+                st.info("""
+**מה אפשר לעשות?**
+• נסה לשנות את האזור המועדף
+• בדוק שוב מאוחר יותר - מכרזים חדשים מתפרסמים באופן קבוע
+• צור קשר עם הצוות שלנו לבדיקה ידנית של האפשרויות
+""")
+    else:
+        st.info("🏠 **התחל למצוא את המכרז שלך**")
+        st.write("מלא את הפרטים בטופס משמאל לקבלת מכרזים מותאמים אישית")
+
 def main():
     # Override Streamlit CSS to center everything
     st.markdown("""
@@ -442,15 +593,20 @@ def main():
     # Initialize session state
     if 'search_performed' not in st.session_state:
         st.session_state.search_performed = False
-    if 'matches' not in st.session_state:
-        st.session_state.matches = pd.DataFrame()
+    if 'match_positions' not in st.session_state:
+        st.session_state.match_positions = np.array([], dtype=np.int32)
     if 'profile_data' not in st.session_state:
         st.session_state.profile_data = {}
     if 'validation_errors' not in st.session_state:
         st.session_state.validation_errors = []
+    if 'tender_version' not in st.session_state:
+        st.session_state.tender_version = None
+    if 'cards_shown' not in st.session_state:
+        st.session_state.cards_shown = CARDS_PER_PAGE
 
     with search_col:
-        with st.container():
+        # A form sends the whole profile in one rerun instead of one per edited field
+        with st.form("profile_form", border=False):
             st.markdown("### 📋 פרטים אישיים")
             
             # Service details section
@@ -517,7 +673,7 @@ def main():
             st.markdown("---")
             
             # Search button
-            if st.button("🔍 מצא מכרזים מתאימים", key="search_button"):
+            if st.form_submit_button("🔍 מצא מכרזים מתאימים", key="search_button"):
                 profile_data = {
                     'ימי_מילואים_מ-7.10.23': days_since_oct,
                     'תעודת_מילואים_פעיל': active_card,
@@ -528,58 +684,17 @@ def main():
                     'בן/בת_זוג_זכאי': spouse_eligible
                 }
                 
-                matches, validation_errors = find_matching_tenders(profile_data)
-                st.session_state.matches = matches
+                # The session keeps only this data version and the matched positions in it
+                tender_version, positions, validation_errors = find_matching_positions(profile_data, as_of=AS_OF_NOW)
+                st.session_state.tender_version = tender_version.number if tender_version else None
+                st.session_state.match_positions = positions
                 st.session_state.profile_data = profile_data
                 st.session_state.validation_errors = validation_errors
                 st.session_state.search_performed = True
-                st.rerun()
+                st.session_state.cards_shown = CARDS_PER_PAGE
 
     with results_col:
-        if st.session_state.search_performed:
-            # Show validation errors if any
-            if st.session_state.validation_errors:
-                for error in st.session_state.validation_errors:
-                    st.error(f"❌ {error}")
-                st.markdown("---")
-            
-            # Show profile summary
-            if st.session_state.profile_data:
-                show_profile_summary(st.session_state.profile_data)
-                st.markdown("---")
-            
-            if not st.session_state.matches.empty:
-                st.markdown("### ✅ מכרזים מתאימים לפרופיל שלך")
-                
-                # Show messages BEFORE the tender cards
-                st.success(f"נמצאו {len(st.session_state.matches)} מכרזים מתאימים לך!")
-                
-                # Government website link - show prominently at the top
-                st.info("""
-🔗 **על מנת להתקדם להגשה יש להכנס למערכת המכרזים של רמ״י ולפתוח את המכרז שבחרתם לפי מספר המכרז שהוצג למטה.**
-
-**לסיוע בתהליך המלא אנו מזמינים אתכם ליצור קשר עם הצוות שלנו בכתובת:** yuvalk@apm.law
-""")
-                
-                st.markdown("---")
-                
-                # Render tender cards using expander
-                for _, tender in st.session_state.matches.iterrows():
-                    render_tender_with_streamlit(tender)
-                    st.markdown("---")
-                
-            else:
-                if not st.session_state.validation_errors:  # Only show if no validation errors
-                    st.warning("😔 לא נמצאו מכרזים מתאימים לפרופיל שלך")
-                    st.info("""
-**מה אפשר לעשות?**
-• נסה לשנות את האזור המועדף
-• בדוק שוב מאוחר יותר - מכרזים חדשים מתפרסמים באופן קבוע
-• צור קשר עם הצוות שלנו לבדיקה ידנית של האפשרויות
-""")
-        else:
-            st.info("🏠 **התחל למצוא את המכרז שלך**")
-            st.write("מלא את הפרטים בטופס משמאל לקבלת מכרזים מותאמים אישית")
+        show_results()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,371 @@
+"""
+Serving-side tender structures for the Streamlit apps.
+
+TenderStore keeps the tender data as immutable, numbered versions: a watcher thread
+notices changes to the source file, builds the next version off the request path and
+swaps it in with a single reference assignment, so searches never wait on a reload and a
+session holding a version keeps a consistent view of it.
+
+Several app processes behind a load balancer can share one copy of the preprocessed
+tender arrays: publish_tender_arrays() writes them to a memory-mapped file in a shared
+directory (a tmpfs such as /dev/shm keeps it in RAM) and atomically repoints CURRENT at
+it, and SharedTenderArrays attaches read-only with np.load(mmap_mode='r'), so every
+process maps the same pages instead of building its own flag and index arrays.
+
+The mode is scoped to those arrays; it does not keep resident memory flat as processes
+are added. The display table, the materialized answers and the cached results stay per
+process. Measured with `benchmark_matching.py --memory-processes 4`, an app process is
+about 135 MB RSS (85 MB PSS). For the 72-tender workbook the shared mode makes no
+measurable difference. Tiled to 20,000 tenders it saves about 12 MB per process, while
+the per-process display table still costs about 30 MB.
+
+ResultCache holds search results per data version and matching key, so a burst of
+identical searches is computed once and concurrent identical searches wait for that one
+computation instead of repeating it.
+
+A memory-mapped file is used rather than multiprocessing.shared_memory because the
+server processes are unrelated: before Python 3.13 the resource tracker of any process
+attaching to a segment unlinks it when that process exits.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from create_comprehensive_matches import (
+    TENDERS_XLSX_PATH,
+    TENDER_FLAG_COLUMNS,
+    TenderAnswerTable,
+    TenderAreaIndex,
+    eligibility_match_from_flags,
+    ensure_tender_flags,
+    housing_match_from_flags
+)
+from tender_data import (
+    PLOT_COUNT_COLUMNS,
+    PRIORITY_ALL_COLUMNS,
+    ensure_plot_counts,
+    ensure_tender_dates,
+    file_fingerprint,
+    read_tender_table,
+    tender_deadlines
+)
+
+# One record per tender, in table order; plot counts are -1 where the text gives no number
+SHARED_ARRAY_DTYPE = np.dtype([('area_code', np.int16)] +
+                              [(column, np.bool_) for column in TENDER_FLAG_COLUMNS] +
+                              [('deadline', 'datetime64[ns]')] +
+                              [(column, np.int32) for column in PLOT_COUNT_COLUMNS] +
+                              [(all_column, np.bool_) for all_column in PRIORITY_ALL_COLUMNS])
+
+CURRENT_POINTER = 'CURRENT'
+
+def build_tender_arrays(tenders_df):
+    """Record array of the matching fields of every tender, plus the names behind area_code"""
+    tenders_df = ensure_tender_flags(tenders_df)
+    # Tenders without an area get code -1 and never match, like NaN in TenderAreaIndex
+    area_codes, area_names = pd.factorize(tenders_df['אזור גיאוגרפי '])
+    
+    records = np.zeros(len(tenders_df), dtype=SHARED_ARRAY_DTYPE)
+    records['area_code'] = area_codes
+    for column in TENDER_FLAG_COLUMNS:
+        records[column] = tenders_df[column].to_numpy(dtype=bool)
+    records['deadline'] = tender_deadlines(ensure_tender_dates(tenders_df))
+    counts_df = ensure_plot_counts(tenders_df)
+    for column in PLOT_COUNT_COLUMNS:
+        records[column] = counts_df[column].fillna(-1).to_numpy(dtype=np.int32)
+    for all_column in PRIORITY_ALL_COLUMNS:
+        records[all_column] = counts_df[all_column].to_numpy(dtype=bool)
+    return records, [str(name) for name in area_names]
+
+def _write_atomic(path, write):
+    """Write a file through a temporary name and rename it into place"""
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    write(temp_path)
+    os.replace(temp_path, path)
+
+def _save_records(path, records):
+    """Save a record array as .npy under exactly this path"""
+    with open(path, 'wb') as array_file:
+        np.save(array_file, records)
+
+def publish_tender_arrays(tenders_df, shared_dir, keep=2):
+    """Publish the tender arrays as a new version and make it current; returns the version.
+    
+    Versions are named by content, so publishing unchanged data is a no-op apart from the
+    pointer. Old versions beyond `keep` are unlinked; processes still mapping them keep
+    their pages until they re-attach.
+    """
+    shared_dir = Path(shared_dir)
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    records, area_names = build_tender_arrays(tenders_df)
+    meta = {'area_names': area_names, 'tender_numbers': tenders_df['מספר המכרז'].astype(str).tolist()}
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    version = hashlib.sha256(records.tobytes() + meta_bytes).hexdigest()[:16]
+    
+    array_path = shared_dir / f"tenders-{version}.npy"
+    if not array_path.exists():
+        _write_atomic(shared_dir / f"tenders-{version}.json", lambda path: path.write_bytes(meta_bytes))
+        _write_atomic(array_path, lambda path: _save_records(path, records))
+    _write_atomic(shared_dir / CURRENT_POINTER, lambda path: path.write_text(version, encoding='utf-8'))
+    
+    published = sorted(shared_dir.glob('tenders-*.npy'), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+    for old_path in published[keep:]:
+        if old_path != array_path:
+            old_path.unlink(missing_ok=True)
+            old_path.with_suffix('.json').unlink(missing_ok=True)
+    return version
+
+class SharedTenderArrays:
+    """Read-only, zero-copy view of the published tender arrays, with the TenderAreaIndex interface.
+    
+    tenders_df is the caller's table for display and must be the one the arrays were
+    published from. Pass the version publish_tender_arrays() returned for it: CURRENT may
+    already point at another process's publish. Without one the view attaches to CURRENT.
+    The view stays on the version it attached to until refresh().
+    """
+    
+    def __init__(self, shared_dir, tenders_df=None, version=None):
+        self.shared_dir = Path(shared_dir)
+        self.tenders_df = tenders_df
+        self.version = None
+        if version is None:
+            self.refresh()
+        else:
+            self._attach(version)
+    
+    def refresh(self):
+        """Attach to the current version if it changed since the last attach; returns the version"""
+        version = (self.shared_dir / CURRENT_POINTER).read_text(encoding='utf-8').strip()
+        if version != self.version:
+            self._attach(version)
+        return version
+    
+    def _attach(self, version):
+        """Map one published version; raises FileNotFoundError if it has been unlinked"""
+        meta = json.loads((self.shared_dir / f"tenders-{version}.json").read_text(encoding='utf-8'))
+        if self.tenders_df is not None and meta['tender_numbers'] != self.tenders_df['מספר המכרז'].astype(str).tolist():
+            raise ValueError(f"Shared tender arrays {version} were published from a different tender table")
+        self.records = np.load(self.shared_dir / f"tenders-{version}.npy", mmap_mode='r')
+        self.area_codes = {name: code for code, name in enumerate(meta['area_names'])}
+        self.tender_numbers = meta['tender_numbers']
+        self.version = version
+    
+    @property
+    def buckets(self):
+        """Tender positions per area, like TenderAreaIndex.buckets"""
+        area_code = self.records['area_code']
+        return {name: np.flatnonzero(area_code == code) for name, code in self.area_codes.items()}
+    
+    def candidates(self, profile_area):
+        """Positions of the tenders in the profile's area"""
+        code = self.area_codes.get(profile_area)
+        if code is None:
+            return np.array([], dtype=np.intp)
+        return np.flatnonzero(self.records['area_code'] == code)
+    
+    def match_positions(self, profile_area, profile_category, profile_housing_need):
+        """Positions of the tenders matching one (area, category, housing) key, in table order"""
+        candidates = self.candidates(profile_area)
+        flags = self.records[candidates]
+        eligibility_mask = eligibility_match_from_flags(
+            profile_category, flags['open_to_all'], flags['disabled_ok'], flags['miluim_ok'])
+        housing_mask = housing_match_from_flags(
+            profile_housing_need, flags['requires_homeless'], flags['unspecified_housing'])
+        return candidates[eligibility_mask & housing_mask]
+    
+    @property
+    def deadlines(self):
+        """Deadline of every tender, see tender_data.tender_deadlines"""
+        return self.records['deadline']
+
+def build_answer_table(path):
+    """Default TenderStore builder: parse the tender file and materialize its answers"""
+    return TenderAnswerTable(TenderAreaIndex(read_tender_table(path)))
+
+class TenderVersion:
+    """One immutable generation of the tender data; number increases with every reload"""
+    
+    def __init__(self, number, fingerprint, answer_table):
+        self.number = number
+        self.fingerprint = fingerprint
+        self.answer_table = answer_table
+    
+    @property
+    def tenders_df(self):
+        return self.answer_table.tenders_df
+
+class TenderStore:
+    """Tender data of one source file, reloaded in the background as new versions.
+    
+    `current` is replaced, never mutated, so reading it never blocks and never sees a
+    half-built version. The last `keep_versions` versions stay available through get()
+    for sessions pinned to them. A reload that fails (for example a workbook caught
+    mid-write) keeps the current version and is retried on the next poll.
+    
+    With sweep_expired, the watcher also drops tenders whose deadline has passed: once the
+    earliest open deadline is behind it, it swaps in a version of the same file without them.
+    """
+    
+    def __init__(self, path, build=build_answer_table, poll_interval=2.0, keep_versions=4, sweep_expired=False):
+        self.path = path
+        self.build = build
+        self.poll_interval = poll_interval
+        self.keep_versions = keep_versions
+        self.sweep_expired = sweep_expired
+        self.last_error = None
+        self._versions = OrderedDict()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        # The first version is built on the caller's thread: there is nothing to serve before it
+        self.current = self._build_version(file_fingerprint(path), number=1)
+    
+    def _build_version(self, fingerprint, number):
+        """Build a version and register it"""
+        return self._register(TenderVersion(number, fingerprint, self.build(self.path)))
+    
+    def _register(self, version):
+        """Keep a version retrievable, evicting the oldest beyond keep_versions"""
+        self._versions[version.number] = version
+        while len(self._versions) > self.keep_versions:
+            self._versions.popitem(last=False)
+        return version
+    
+    def get(self, number):
+        """A retained version by number, or None if it was evicted"""
+        return self._versions.get(number)
+    
+    def check_for_update(self):
+        """Build and swap in a new version if the source changed; returns True on a swap"""
+        with self._reload_lock:
+            try:
+                fingerprint = file_fingerprint(self.path)
+                if fingerprint == self.current.fingerprint:
+                    return False
+                version = self._build_version(fingerprint, self.current.number + 1)
+            except Exception as e:
+                self.last_error = e
+                return False
+            self.last_error = None
+            self.current = version
+            return True
+    
+    def sweep(self, as_of=None):
+        """Swap in a version without the tenders expired at as_of (default now); returns True on a swap"""
+        with self._reload_lock:
+            current = self.current
+            # One binary search: nothing to do until the earliest open deadline has passed
+            if current.answer_table.deadline_index.expired_count(as_of) == 0:
+                return False
+            version = self._register(TenderVersion(current.number + 1, current.fingerprint,
+                                                   current.answer_table.without_expired(as_of)))
+            self.current = version
+            return True
+    
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_for_update()
+            if self.sweep_expired:
+                self.sweep()
+    
+    def start(self):
+        """Start the background watcher thread; returns the store"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name=f"tender-watcher:{self.path}", daemon=True)
+            self._watcher.start()
+        return self
+    
+    def stop(self):
+        """Stop the watcher thread"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+class ResultCache:
+    """Results of a computation per key, shared by concurrent callers, with LRU and TTL eviction.
+    
+    get_or_compute() computes a missing result once however many threads ask for it at the
+    same time: the first caller computes it and the others wait for that result instead of
+    repeating the work. At most `maxsize` results are kept, the least recently used going
+    first, each for at most `ttl` seconds. A failed computation is not cached; the callers
+    waiting on it get its exception.
+    """
+    
+    def __init__(self, maxsize=256, ttl=600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._results = OrderedDict()  # key -> (expiry time, result)
+        self._in_flight = {}  # key -> Future of the computation under way
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, key, compute):
+        """The cached result for key, or the result of compute() run once for every caller waiting on key"""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._results[key]
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                self._in_flight[key] = Future()
+        if flight is not None:
+            return flight.result()
+        
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                flight = self._in_flight.pop(key)
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            self._results[key] = (self.clock() + self.ttl, result)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+            flight = self._in_flight.pop(key)
+        flight.set_result(result)
+        return result
+    
+    def stats(self):
+        """Hit, miss and eviction counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced,
+                    'evictions': self.evictions, 'size': len(self._results),
+                    'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0}
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the tender arrays for Streamlit processes to share")
+    parser.add_argument('shared_dir', help="directory shared by the app processes, e.g. /dev/shm/tender-matching")
+    parser.add_argument('--tenders', default=TENDERS_XLSX_PATH,
+                        help=f"tender workbook to publish (default: {TENDERS_XLSX_PATH})")
+    args = parser.parse_args()
+    
+    version = publish_tender_arrays(read_tender_table(args.tenders), args.shared_dir)
+    print(f"Published tender arrays version {version} to: {args.shared_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+טסטים ל-API ההתאמה
+"""
+
+import asyncio
+import io
+import json
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from create_comprehensive_matches import get_profile_category
+from load_test_api import read_response
+from matching_api import MatchService, build_api_answer_table, iter_batch_results, parse_profile, read_profile_batch, serve
+from tender_store import TenderStore
+from test_matching_engines import make_profiles, make_tenders
+
+PROFILE = {
+    'ימי_מילואים_מ-7.10.23': 60,
+    'תעודת_מילואים_פעיל': 'לא',
+    'ימי_מילואים_ב-6_שנים': 0,
+    'סיווג_נכות': '',
+    'חסר_דיור': 'כן',
+    'אזור_מועדף': 'דרום',
+    'בן/בת_זוג_זכאי': 'לא'
+}
+
+
+@pytest.fixture
+def service(tmp_path):
+    """שירות API מעל טבלת מכרזים קטנה"""
+    path = tmp_path / 'tenders.csv'
+    make_tenders().to_csv(path, index=False)
+    return MatchService(TenderStore(path, build_api_answer_table))
+
+
+class TestMatchService:
+    """טסטים לתשובות ה-API"""
+    
+    def test_match_same_as_answer_table(self, service):
+        """טסט: המכרזים בתשובה הם התשובה של טבלת התשובות, לפי הסדר"""
+        as_of = pd.Timestamp('2025-09-10')
+        status, body = service.match(PROFILE, as_of=as_of)
+        response = json.loads(body)
+        
+        answer_table = service.store.current.answer_table
+        positions = answer_table.lookup('דרום', get_profile_category(PROFILE), 'כן', as_of=as_of)
+        expected = answer_table.tenders_df['מספר המכרז'].iloc[positions].tolist()
+        assert status == 200 and response['version'] == 1
+        assert response['count'] == len(expected) > 0
+        assert [tender['מספר מכרז'] for tender in response['tenders']] == expected
+        assert all(tender['deadline'] >= '2025-09-10' for tender in response['tenders'])
+        assert isinstance(response['tenders'][0]['plot_count'], int)
+    
+    def test_expired_tenders_left_out(self, service):
+        """טסט: מכרזים שמועד ההגשה שלהם עבר אינם מוחזרים"""
+        _, body = service.match(PROFILE, as_of=pd.Timestamp('2026-01-01'))
+        assert json.loads(body) == {'version': 1, 'count': 0, 'tenders': []}
+    
+    def test_current_results_cached(self, service):
+        """טסט: חיפושים זהים נענים מהמטמון, וחיפוש לתאריך מסוים אינו נשמר בו"""
+        first = service.match(PROFILE)
+        assert service.match({**PROFILE, 'ימי_מילואים_מ-7.10.23': 90, 'חסר_דיור': 'כן'}) == first
+        service.match(PROFILE, as_of=pd.Timestamp('2025-09-10'))
+        
+        stats = service.cache.stats()
+        assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+    
+    def test_query_string_fields(self, service):
+        """טסט: שדות ב-query string מומרים כמו גוף JSON"""
+        profile = parse_profile({'ימי_מילואים_מ-7.10.23': '60', 'סיווג_נכות': 'אין', 'אזור_מועדף': 'דרום'})
+        assert profile['ימי_מילואים_מ-7.10.23'] == 60 and profile['סיווג_נכות'] == ''
+        status, body = service.respond('GET', '/match?' + urlencode(PROFILE))
+        assert status == 200 and json.loads(body)['version'] == 1
+    
+    def test_errors(self, service):
+        """טסט: בקשות שגויות מקבלות קוד שגיאה והודעה"""
+        assert service.respond('POST', '/match', b'not json')[0] == 400
+        assert service.respond('POST', '/match', b'[1]')[0] == 400
+        assert service.respond('POST', '/match', json.dumps({**PROFILE, 'ימי_מילואים_ב-6_שנים': 'הרבה'}).encode())[0] == 400
+        status, body = service.respond('POST', '/match', json.dumps({**PROFILE, 'אזור_מועדף': ''}).encode())
+        assert status == 422 and json.loads(body)['errors'] == ["יש לבחור אזור מועדף"]
+        for value in [['דרום'], {'אזור': 'דרום'}, 7, None]:
+            status, body = service.respond('POST', '/match', json.dumps({**PROFILE, 'אזור_מועדף': value}).encode())
+            assert status == 400 and json.loads(body)['errors'] == ["השדה אזור_מועדף חייב להיות טקסט"]
+        for value in [[60], 60.5, True, 1e400]:
+            assert service.respond('POST', '/match', json.dumps({**PROFILE, 'ימי_מילואים_מ-7.10.23': value}).encode())[0] == 400
+        assert service.respond('DELETE', '/match')[0] == 405
+        assert service.respond('GET', '/tenders')[0] == 404
+    
+    def test_unexpected_error_is_500(self, service, monkeypatch):
+        """טסט: שגיאה לא צפויה מחזירה 500 עם גוף JSON במקום לנתק את החיבור"""
+        monkeypatch.setattr(service, 'match', lambda fields: 1 / 0)
+        status, body = service.respond('POST', '/match', json.dumps(PROFILE).encode())
+        assert status == 500 and json.loads(body) == {'errors': ['Internal server error']}
+
+
+class TestBatchMatching:
+    """טסטים להתאמה של רשימת פרופילים"""
+    
+    def batch_output(self, service, profiles_df, output_format, chunk_size=25):
+        source = io.BytesIO(profiles_df.to_csv(index=False).encode('utf-8'))
+        results = iter_batch_results(read_profile_batch(source, 'csv', chunk_size), service.store.current,
+                                     output_format, as_of=pd.Timestamp('2025-09-10'))
+        return b''.join(encoded for encoded, _ in results).decode('utf-8')
+    
+    def test_same_as_single_matches(self, service):
+        """טסט: כל שורת תוצאה זהה לתשובת /match עבור אותו פרופיל"""
+        profiles_df = make_profiles()
+        lines = self.batch_output(service, profiles_df, 'jsonl').splitlines()
+        
+        assert len(lines) == len(profiles_df)
+        for line, profile in zip(lines, profiles_df.to_dict('records')):
+            result = json.loads(line)
+            fields = {field: value for field, value in profile.items() if not pd.isna(value)}
+            _, body = service.match(fields, as_of=pd.Timestamp('2025-09-10'))
+            assert result['profile'] == profile['מספר_פרופיל']
+            assert {key: value for key, value in result.items() if key != 'profile'} == json.loads(body)
+    
+    def test_csv_rows_per_match(self, service):
+        """טסט: בפלט CSV שורה לכל התאמה"""
+        profiles_df = make_profiles()
+        jsonl_results = [json.loads(line) for line in self.batch_output(service, profiles_df, 'jsonl').splitlines()]
+        matches = pd.read_csv(io.StringIO(self.batch_output(service, profiles_df, 'csv')))
+        
+        assert len(matches) == sum(result['count'] for result in jsonl_results) > 0
+        assert matches['מספר_פרופיל'].iloc[0] == next(result['profile'] for result in jsonl_results if result['count'])
+    
+    def test_errors_per_profile(self, service):
+        """טסט: פרופיל שגוי מקבל הודעת שגיאה בלי לעצור את שאר הרשימה"""
+        profiles_df = make_profiles(3).astype({'ימי_מילואים_ב-6_שנים': object})
+        profiles_df.loc[1, 'ימי_מילואים_ב-6_שנים'] = 'הרבה'
+        profiles_df.loc[2, 'אזור_מועדף'] = np.nan
+        results = [json.loads(line) for line in self.batch_output(service, profiles_df, 'jsonl').splitlines()]
+        
+        assert 'count' in results[0]
+        assert results[1]['errors'] == ["השדה ימי_מילואים_ב-6_שנים חייב להיות מספר שלם"]
+        assert results[2]['errors'] == ["יש לבחור אזור מועדף"]
+    
+    def test_non_text_values_per_profile(self, service):
+        """טסט: ערך שאינו טקסט ב-JSON lines (רשימה או אובייקט) מקבל הודעת שגיאה לפרופיל בלבד"""
+        lines = [{**PROFILE, 'מספר_פרופיל': 'A'}, {**PROFILE, 'מספר_פרופיל': 'B', 'אזור_מועדף': ['דרום']},
+                 {**PROFILE, 'מספר_פרופיל': 'C', 'חסר_דיור': {'כן': True}}]
+        source = io.BytesIO(b''.join(json.dumps(line, ensure_ascii=False).encode('utf-8') + b'\n' for line in lines))
+        results = iter_batch_results(read_profile_batch(source, 'jsonl'), service.store.current, 'jsonl',
+                                     as_of=pd.Timestamp('2025-09-10'))
+        results = [json.loads(line) for line in b''.join(encoded for encoded, _ in results).splitlines()]
+        
+        assert results[0]['count'] > 0
+        assert results[1] == {'profile': 'B', 'errors': ["השדה אזור_מועדף חייב להיות טקסט"]}
+        assert results[2] == {'profile': 'C', 'errors': ["השדה חסר_דיור חייב להיות טקסט"]}
+    
+    def test_non_whole_day_counts_per_profile(self, service):
+        """טסט: אינסוף, שבר ו-true בימי המילואים מקבלים הודעת שגיאה לפרופיל בלבד, כמו ב-/match"""
+        error = ["השדה ימי_מילואים_מ-7.10.23 חייב להיות מספר שלם"]
+        profiles_df = make_profiles(3).astype({'ימי_מילואים_מ-7.10.23': object})
+        profiles_df.loc[1, 'ימי_מילואים_מ-7.10.23'] = 'inf'
+        profiles_df.loc[2, 'ימי_מילואים_מ-7.10.23'] = '1.5'
+        results = [json.loads(line) for line in self.batch_output(service, profiles_df, 'jsonl').splitlines()]
+        assert 'count' in results[0] and results[1]['errors'] == results[2]['errors'] == error
+        
+        lines = [json.dumps({**PROFILE, 'מספר_פרופיל': 'A'}, ensure_ascii=False)]
+        for profile_id, value in [('B', 'true'), ('C', '1e400'), ('D', '-1e400')]:
+            line = json.dumps({**PROFILE, 'מספר_פרופיל': profile_id, 'ימי_מילואים_מ-7.10.23': 0}, ensure_ascii=False)
+            lines.append(line.replace('"ימי_מילואים_מ-7.10.23": 0', f'"ימי_מילואים_מ-7.10.23": {value}'))
+        source = io.BytesIO('\n'.join(lines).encode('utf-8'))
+        results = iter_batch_results(read_profile_batch(source, 'jsonl'), service.store.current, 'jsonl',
+                                     as_of=pd.Timestamp('2025-09-10'))
+        results = [json.loads(line) for line in b''.join(encoded for encoded, _ in results).splitlines()]
+        
+        assert results[0]['count'] > 0
+        assert [result['errors'] for result in results[1:]] == [error] * 3
+        for value in [True, 1.5, 1e400]:
+            assert service.respond('POST', '/match', json.dumps({**PROFILE, 'ימי_מילואים_מ-7.10.23': value}).encode())[0] == 400
+
+
+def test_http_keep_alive(service):
+    """טסט: כמה בקשות על אותו חיבור HTTP"""
+    async def scenario():
+        ready = asyncio.get_running_loop().create_future()
+        server_task = asyncio.create_task(serve(service, '127.0.0.1', 0, ready))
+        host, port = await ready
+        reader, writer = await asyncio.open_connection(host, port)
+        body = json.dumps(PROFILE, ensure_ascii=False).encode('utf-8')
+        responses = []
+        for request in [b'GET /health HTTP/1.1\r\nHost: x\r\n\r\n',
+                        b'POST /match HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body)]:
+            writer.write(request)
+            responses.append(await read_response(reader))
+        writer.close()
+        server_task.cancel()
+        return responses
+    
+    (health_status, health_body), (match_status, match_body) = asyncio.run(scenario())
+    health = json.loads(health_body)
+    assert health_status == 200 and (health['version'], health['tenders']) == (1, len(make_tenders()))
+    assert match_status == 200 and json.loads(match_body)['version'] == 1
+
+
+def test_http_batch(service):
+    """טסט: התאמת רשימה דרך ה-API מוחזרת ב-chunked בפורמט המבוקש"""
+    async def scenario():
+        ready = asyncio.get_running_loop().create_future()
+        server_task = asyncio.create_task(serve(service, '127.0.0.1', 0, ready))
+        host, port = await ready
+        reader, writer = await asyncio.open_connection(host, port)
+        body = make_profiles(20).to_json(orient='records', lines=True, force_ascii=False).encode('utf-8')
+        responses = []
+        for target in [b'/match/batch', b'/match/batch?format=csv', b'/match/batch?format=xml']:
+            writer.write(b'POST %s HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s' % (target, len(body), body))
+            responses.append(await read_response(reader))
+        writer.close()
+        server_task.cancel()
+        return responses
+    
+    (jsonl_status, jsonl_body), (csv_status, csv_body), (bad_status, _) = asyncio.run(scenario())
+    assert jsonl_status == 200 and len(jsonl_body.decode('utf-8').splitlines()) == 20
+    assert all(json.loads(line)['profile'] for line in jsonl_body.decode('utf-8').splitlines())
+    assert csv_status == 200 and csv_body.decode('utf-8').startswith('מספר_פרופיל,מספר מכרז')
+    assert bad_status == 400
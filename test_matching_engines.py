@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+טסטים למנועי ההתאמה המהירים - כל מנוע חייב להחזיר בדיוק את אותן שורות כמו הלולאה המקורית
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from create_comprehensive_matches import (
+    create_comprehensive_matching_table,
+    add_tender_flags,
+    parse_eligibility_flags,
+    parse_housing_flags,
+    check_eligibility_match,
+    check_housing_match,
+    TenderAreaIndex,
+    TenderAnswerTable,
+    TenderDeadlineIndex,
+    PROFILE_CATEGORIES,
+    ProfileIndex,
+    find_profiles_for_tenders,
+    get_profile_category,
+    get_profile_categories,
+    iter_comprehensive_matches,
+    iter_rendered_matches,
+    update_comprehensive_matches,
+    write_comprehensive_matches,
+    write_rendered_matches
+)
+import matching_algorithm
+
+
+def make_tenders():
+    """טבלת מכרזים קטנה המכסה את כל וריאציות הזכאות והדיור"""
+    eligibility = [
+        'נכי צה"ל וכוחות הביטחון', 'חיילי מילואים', 'כולם, עם עדיפות לנכי צה"ל וחיילי מילואים',
+        'נכי צה״ל וחיילי מילואים', ' לנכי צה"ל וחיילי מילואים', 'בוטל', np.nan, 'נכי צהל'
+    ]
+    housing = ['חסרי דיור', 'לא צוין', 'מחוסרי דיור', 'חסרי דירה', 'לא צוין ', 'בוטל', np.nan,
+               'חסרי דיור (לבעלי עדיפות)']
+    areas = ['דרום', 'צפון', 'מרכז', 'ירושלים', 'יהודה ושומרון', 'בוטל', np.nan]
+    rows = []
+    for i in range(40):
+        rows.append({
+            'id': f"m{i + 1}",
+            'מספר המכרז': f"דר/{100 + i}/2025",
+            'עיר': f"עיר {i}",
+            'שכונה': f"שכונה {i}",
+            'אזור עדיפות': ['A', 'B', '–'][i % 3],
+            'אזור גיאוגרפי ': areas[i % len(areas)],
+            'מספר מגרשים': f"{i + 1} מגרשים ({i + 1} יח\"ד)",
+            'מי רשאי להגיש': eligibility[i % len(eligibility)],
+            'כמה מגרשים בעדיפות בהגרלה לנכי צה"ל': ['כל המגרשים', 'לא רלוונטי', '2 יח"ד'][i % 3],
+            'כמה מגרשים בעדיפות בהגרלה לחיילי מילואים': ['כל המגרשים', 'לא רלוונטי', '3 יח"ד'][i % 3],
+            'סטטוס דיור נדרש': housing[(i // 2) % len(housing)],
+            'תאריך פרסום חוברת': pd.Timestamp('2025-07-28'),
+            'מועד אחרון להגשת הצעות': pd.Timestamp('2025-09-01 12:00') + pd.Timedelta(days=i),
+            'קישור למכרז ': f"https://apps.land.gov.il/MichrazimSite/#/michraz/{i}",
+        })
+    return pd.DataFrame(rows)
+
+
+def make_profiles(count=60):
+    """טבלת פרופילים המכסה את כל הקטגוריות"""
+    areas = ['דרום', 'צפון', 'ירושלים', 'מרכז', 'יהודה ושומרון']
+    disability = [np.nan, 'נכות קשה', '100% ומעלה', 'נכות קלה']
+    return pd.DataFrame({
+        'מספר_פרופיל': [f"P{i + 1:03d}" for i in range(count)],
+        'חסר_דיור': ['כן' if i % 3 else 'לא' for i in range(count)],
+        'אזור_מועדף': [areas[i % len(areas)] for i in range(count)],
+        'בן/בת_זוג_זכאי': ['כן' if i % 2 else 'לא' for i in range(count)],
+        'סיווג_נכות': [disability[(i // 5) % len(disability)] for i in range(count)],
+        'ימי_מילואים_מ-7.10.23': [(i * 7) % 90 for i in range(count)],
+        'תעודת_מילואים_פעיל': ['כן' if i % 7 == 0 else 'לא' for i in range(count)],
+        'ימי_מילואים_ב-6_שנים': [(i * 13) % 120 for i in range(count)],
+    })
+
+
+@pytest.fixture
+def tenders_df():
+    return make_tenders()
+
+
+@pytest.fixture
+def profiles_df():
+    return make_profiles()
+
+
+class TestVectorizedCategories:
+    """טסטים לקביעת קטגוריות לכל טבלת הפרופילים בבת אחת"""
+
+    def test_same_as_row_wise(self, profiles_df):
+        """טסט: זהה לחישוב שורה אחר שורה, כולל הקטגוריה הכפולה"""
+        expected = profiles_df.apply(get_profile_category, axis=1).tolist()
+        result = get_profile_categories(profiles_df)
+
+        assert isinstance(result, pd.Categorical)
+        assert result.tolist() == expected
+        assert 'נכי צהל וחיילי מילואים' in expected
+
+    def test_boundaries_and_missing_values(self):
+        """טסט: ערכי גבול וערכים חסרים"""
+        profiles_df = pd.DataFrame({
+            'סיווג_נכות': [np.nan, '100% ומעלה', '', 'נכות קשה', np.nan],
+            'ימי_מילואים_מ-7.10.23': [45, 44, np.nan, 0, 0],
+            'תעודת_מילואים_פעיל': ['לא', 'לא', np.nan, 'כן', 'לא'],
+            'ימי_מילואים_ב-6_שנים': [0, 0, 80, 0, 79],
+        })
+        expected = profiles_df.apply(get_profile_category, axis=1).tolist()
+        assert get_profile_categories(profiles_df).tolist() == expected
+
+    def test_matching_algorithm_categories(self, profiles_df):
+        """טסט: גרסת matching_algorithm (ללא קטגוריה כפולה) זהה לחישוב שורה אחר שורה"""
+        expected = profiles_df.apply(matching_algorithm.get_profile_category, axis=1).tolist()
+        assert matching_algorithm.get_profile_categories(profiles_df).tolist() == expected
+
+
+class TestTenderFlags:
+    """טסטים לפענוח עמודות הטקסט של המכרזים לדגלים"""
+
+    def test_flags_match_scalar_parsing(self, tenders_df):
+        """טסט: הפענוח הווקטורי זהה לפענוח של מכרז בודד"""
+        flagged = add_tender_flags(tenders_df)
+        for _, tender in flagged.iterrows():
+            assert parse_eligibility_flags(tender['מי רשאי להגיש']) == (
+                tender['open_to_all'], tender['disabled_ok'], tender['miluim_ok'])
+            assert parse_housing_flags(tender['סטטוס דיור נדרש']) == (
+                tender['requires_homeless'], tender['unspecified_housing'])
+
+    def test_flag_columns_are_boolean(self, tenders_df):
+        """טסט: עמודות הדגלים בוליאניות ולא משנות את הטבלה המקורית"""
+        flagged = add_tender_flags(tenders_df)
+        for column in ['open_to_all', 'disabled_ok', 'miluim_ok', 'requires_homeless', 'unspecified_housing']:
+            assert flagged[column].dtype == bool
+            assert column not in tenders_df.columns
+
+    def test_predicates_return_plain_bool(self):
+        """טסט: פונקציות הבדיקה מחזירות bool רגיל"""
+        assert check_eligibility_match('נכי צהל וחיילי מילואים', 'נכי צה״ל') is True
+        assert check_housing_match('לא', 'חסרי דירה') is False
+
+
+class TestTenderAreaIndex:
+    """טסטים לאינדקס המכרזים לפי אזור"""
+
+    def test_buckets_cover_each_area(self, tenders_df):
+        """טסט: כל דלי מכיל בדיוק את המכרזים של האזור"""
+        index = TenderAreaIndex(tenders_df)
+        for area in ['דרום', 'צפון', 'מרכז', 'ירושלים', 'יהודה ושומרון']:
+            expected = np.flatnonzero(tenders_df['אזור גיאוגרפי '].to_numpy(dtype=object) == area)
+            np.testing.assert_array_equal(index.candidates(area), expected)
+        assert len(index.candidates('חו"ל')) == 0
+
+    def test_match_positions_same_as_full_scan(self, tenders_df):
+        """טסט: חיפוש בדלי בלבד זהה לסריקה של כל המכרזים"""
+        index = TenderAreaIndex(tenders_df)
+        for area in ['דרום', 'צפון', 'מרכז']:
+            for category in ['נכי צהל וחיילי מילואים', 'נכי צהל', 'חיילי מילואים', 'אחר']:
+                for housing in ['כן', 'לא']:
+                    expected = [
+                        position for position, (_, tender) in enumerate(tenders_df.iterrows())
+                        if tender['אזור גיאוגרפי '] == area
+                        and check_eligibility_match(category, tender['מי רשאי להגיש'])
+                        and check_housing_match(housing, tender['סטטוס דיור נדרש'])
+                    ]
+                    assert index.match_positions(area, category, housing).tolist() == expected
+
+
+class TestTenderAnswerTable:
+    """טסטים לטבלת התשובות המחושבת מראש לכל מפתח"""
+
+    def test_lookup_same_as_index(self, tenders_df):
+        """טסט: כל תשובה בטבלה זהה לחישוב ישיר מול האינדקס"""
+        index = TenderAreaIndex(tenders_df)
+        table = TenderAnswerTable(index)
+
+        assert len(table.answers) == len(index.buckets) * len(PROFILE_CATEGORIES) * 2
+        for area in ['דרום', 'צפון', 'ירושלים', 'מרכז', 'יהודה ושומרון']:
+            for category in PROFILE_CATEGORIES:
+                for housing_need in ['כן', 'לא', 'אחר']:
+                    assert (table.lookup(area, category, housing_need).tolist() ==
+                            index.match_positions(area, category, housing_need).tolist())
+
+    def test_unknown_area(self, tenders_df):
+        """טסט: אזור ללא מכרזים מחזיר תשובה ריקה"""
+        table = TenderAnswerTable(TenderAreaIndex(tenders_df))
+        assert len(table.lookup('חו"ל', 'אחר', 'כן')) == 0
+
+
+class TestTenderDeadlineIndex:
+    """טסטים לאינדקס המכרזים לפי מועד אחרון להגשה"""
+
+    AREAS = ['דרום', 'צפון', 'ירושלים', 'מרכז', 'יהודה ושומרון']
+
+    @pytest.fixture
+    def dated_tenders_df(self, tenders_df):
+        """מכרזים שחלקם ללא מועד אחרון (תא ריק או טקסט שאינו תאריך) או שבוטלו"""
+        tenders_df = tenders_df.copy()
+        tenders_df['מועד אחרון להגשת הצעות'] = tenders_df['מועד אחרון להגשת הצעות'].astype(object)
+        tenders_df.loc[3, 'מועד אחרון להגשת הצעות'] = 'בוטל'
+        tenders_df.loc[17, 'מועד אחרון להגשת הצעות'] = np.nan
+        tenders_df.loc[25, 'מועד אחרון להגשת הצעות'] = 'טרם נקבע'
+        return tenders_df
+
+    def test_open_positions_same_as_scan(self, dated_tenders_df):
+        """טסט: המכרזים הפתוחים זהים לסריקה מלאה; מכרז ללא מועד נחשב פתוח ורק מכרז שבוטל סגור"""
+        deadlines = TenderAreaIndex(dated_tenders_df).deadlines
+        index = TenderDeadlineIndex(deadlines)
+
+        for as_of in ['2025-08-01', '2025-09-10', '2025-09-10 12:00', '2026-01-01']:
+            expected = [position for position, deadline in enumerate(deadlines)
+                        if np.isnat(deadline) or deadline >= np.datetime64(as_of)]
+            assert sorted(index.open_positions(as_of).tolist()) == expected
+            assert 3 not in expected
+        assert sorted(index.open_positions('2026-01-01').tolist()) == [17, 25]
+
+    def test_closing_within(self, tenders_df):
+        """טסט: מכרזים שנסגרים בתוך מספר ימים, מהקרוב לרחוק"""
+        index = TenderDeadlineIndex(TenderAreaIndex(tenders_df).deadlines)
+
+        # המועדים הם 1.9.2025 בשעה 12:00 ועוד יום לכל מכרז
+        assert index.closing_within(3, as_of='2025-09-10').tolist() == [9, 10, 11]
+        assert index.next_expiry('2025-09-10') == pd.Timestamp('2025-09-10 12:00')
+        assert index.next_expiry('2026-01-01') is None
+
+    def test_lookup_as_of_same_as_filter(self, dated_tenders_df):
+        """טסט: חיפוש עם תאריך מחזיר את התשובה המלאה ללא המכרזים שפג תוקפם, בסדר הטבלה"""
+        table = TenderAnswerTable(TenderAreaIndex(dated_tenders_df))
+        as_of = np.datetime64('2025-09-15')
+
+        for area in self.AREAS:
+            for category in PROFILE_CATEGORIES:
+                for housing_need in ['כן', 'לא']:
+                    expected = [position for position in table.lookup(area, category, housing_need)
+                                if np.isnat(table.deadlines[position]) or table.deadlines[position] >= as_of]
+                    assert table.lookup(area, category, housing_need, as_of=as_of).tolist() == expected
+
+    def test_without_expired(self, dated_tenders_df):
+        """טסט: טבלה ללא המכרזים שפג תוקפם אינה משנה את הטבלה המקורית"""
+        table = TenderAnswerTable(TenderAreaIndex(dated_tenders_df))
+        before = {key: positions.tolist() for key, positions in table.answers.items()}
+        swept = table.without_expired('2025-09-15')
+
+        assert {key: positions.tolist() for key, positions in table.answers.items()} == before
+        assert swept.tenders_df is table.tenders_df
+        for key in table.answers:
+            assert swept.lookup(*key).tolist() == table.lookup(*key, as_of='2025-09-15').tolist()
+        assert swept.deadline_index.expired_count('2025-09-15') == 0
+
+    def test_open_only_table(self, profiles_df, dated_tenders_df):
+        """טסט: טבלת ההתאמות עם as_of זהה לטבלה המלאה ללא המכרזים שנסגרו"""
+        full = create_comprehensive_matching_table(profiles_df, dated_tenders_df)
+        open_only = create_comprehensive_matching_table(profiles_df, dated_tenders_df, as_of='2025-09-15')
+        deadlines = TenderAreaIndex(dated_tenders_df).deadlines
+        open_numbers = dated_tenders_df['מספר המכרז'][np.isnat(deadlines) | (deadlines >= np.datetime64('2025-09-15'))]
+
+        assert 'דר/103/2025' not in set(open_numbers) and {'דר/117/2025', 'דר/125/2025'} <= set(open_numbers)
+        expected = full[full['מספר_מכרז'].isin(open_numbers)].reset_index(drop=True)
+        pd.testing.assert_frame_equal(open_only.reset_index(drop=True), expected)
+
+
+class TestProfileIndex:
+    """טסטים לאינדקס הפרופילים לפי מכרז (לצורך הודעות)"""
+
+    def test_same_profiles_as_full_table(self, profiles_df, tenders_df):
+        """טסט: הפרופילים המתאימים לכל מכרז זהים לשורות המכרז בטבלה המלאה"""
+        full = create_comprehensive_matching_table(profiles_df, tenders_df)
+        index = ProfileIndex(profiles_df)
+
+        for _, tender in tenders_df.iterrows():
+            expected = full.loc[full['מספר_מכרז'] == tender['מספר המכרז'], 'מספר_פרופיל'].tolist()
+            assert sorted(index.eligible_profiles(tender)) == sorted(expected)
+
+    def test_flag_columns_same_as_text(self, profiles_df, tenders_df):
+        """טסט: מכרז עם עמודות דגלים מחזיר את אותם פרופילים כמו מכרז עם טקסט בלבד"""
+        index = ProfileIndex(profiles_df)
+        flagged = add_tender_flags(tenders_df)
+        for position in range(len(tenders_df)):
+            assert (index.eligible_positions(tenders_df.iloc[position]).tolist() ==
+                    index.eligible_positions(flagged.iloc[position]).tolist())
+
+    def test_batch_by_tender_number(self, profiles_df, tenders_df):
+        """טסט: נקודת הכניסה לאצווה מחזירה תוצאה לכל מספר מכרז ונכשלת על מספר לא מוכר"""
+        numbers = tenders_df['מספר המכרז'].iloc[:5].tolist()
+        result = find_profiles_for_tenders(numbers, profiles_df, tenders_df)
+        index = ProfileIndex(profiles_df)
+
+        assert list(result) == numbers
+        for position, number in enumerate(numbers):
+            assert result[number].tolist() == index.eligible_profiles(tenders_df.iloc[position]).tolist()
+        with pytest.raises(ValueError):
+            find_profiles_for_tenders(['לא קיים'], profiles_df, tenders_df)
+
+
+class TestVectorizedEngine:
+    """טסטים למנוע הווקטורי של טבלת ההתאמות המקיפה"""
+
+    def test_same_rows_as_iterrows(self, profiles_df, tenders_df):
+        """טסט: המנוע הווקטורי מחזיר בדיוק את אותן שורות ובאותו סדר"""
+        reference = create_comprehensive_matching_table(profiles_df, tenders_df, engine='iterrows')
+        result = create_comprehensive_matching_table(profiles_df, tenders_df, engine='vectorized')
+
+        assert len(reference) > 0
+        pd.testing.assert_frame_equal(reference, result)
+
+    def test_no_matches(self, profiles_df, tenders_df):
+        """טסט: אין התאמות כאשר אין מכרזים באזור"""
+        tenders_df['אזור גיאוגרפי '] = 'בוטל'
+        result = create_comprehensive_matching_table(profiles_df, tenders_df, engine='vectorized')
+        assert len(result) == 0
+
+    def test_missing_areas_never_match(self, profiles_df, tenders_df):
+        """טסט: אזור חסר בפרופיל ובמכרז אינו נחשב התאמה"""
+        profiles_df['אזור_מועדף'] = np.nan
+        result = create_comprehensive_matching_table(profiles_df, tenders_df, engine='vectorized')
+        assert len(result) == 0
+
+    def test_grouped_same_rows_as_iterrows(self, profiles_df, tenders_df):
+        """טסט: חישוב לפי מחלקות שקילות מחזיר בדיוק את אותן שורות ובאותו סדר"""
+        reference = create_comprehensive_matching_table(profiles_df, tenders_df, engine='iterrows')
+        result = create_comprehensive_matching_table(profiles_df, tenders_df, engine='grouped')
+        pd.testing.assert_frame_equal(reference, result)
+
+    def test_unknown_engine(self, profiles_df, tenders_df):
+        """טסט: מנוע לא מוכר"""
+        with pytest.raises(ValueError):
+            create_comprehensive_matching_table(profiles_df, tenders_df, engine='gpu')
+
+
+class TestStreamingExport:
+    """טסטים לייצוא טבלת ההתאמות בחלקים עם זיכרון חסום"""
+
+    def test_stream_matches_full_table(self, profiles_df, tenders_df, tmp_path):
+        """טסט: קובץ ה-CSV שנכתב בחלקים זהה לקובץ שנכתב בבת אחת"""
+        profiles_path = tmp_path / 'profiles.csv'
+        profiles_df.to_csv(profiles_path, index=False)
+
+        full = create_comprehensive_matching_table(pd.read_csv(profiles_path), tenders_df)
+        full = full.sort_values(['מספר_פרופיל', 'מספר_מכרז'])
+        full.to_csv(tmp_path / 'full.csv', index=False, encoding='utf-8-sig')
+
+        # תקרת זיכרון זעירה מכריחה חלקים של פרופילים בודדים
+        chunks = iter_comprehensive_matches(profiles_path, tenders_df, max_memory_mb=0.05)
+        stats = write_comprehensive_matches(chunks, tmp_path / 'stream.csv')
+
+        assert (tmp_path / 'stream.csv').read_bytes() == (tmp_path / 'full.csv').read_bytes()
+        assert stats['total_matches'] == len(full)
+        assert stats['unique_profiles'] == full['מספר_פרופיל'].nunique()
+        assert stats['ordered']
+
+    def test_generator_yields_chunks(self, profiles_df, tenders_df, tmp_path):
+        """טסט: הגנרטור מחזיר יותר מחלק אחד כאשר התקרה קטנה"""
+        profiles_path = tmp_path / 'profiles.csv'
+        profiles_df.to_csv(profiles_path, index=False)
+
+        chunks = list(iter_comprehensive_matches(profiles_path, tenders_df, max_memory_mb=0.05))
+        assert len(chunks) > 1
+
+    def test_empty_output_has_header(self, profiles_df, tenders_df, tmp_path):
+        """טסט: גם ללא התאמות נכתבת שורת כותרת"""
+        stats = write_comprehensive_matches(iter([]), tmp_path / 'empty.csv')
+        assert stats['total_matches'] == 0
+        assert 'מספר_פרופיל' in pd.read_csv(tmp_path / 'empty.csv').columns
+
+
+class TestParallelMatching:
+    """טסטים להתאמה מקבילית בתהליכי עבודה"""
+
+    def test_parallel_table_same_as_serial(self, profiles_df, tenders_df):
+        """טסט: טבלה שחושבה בכמה תהליכים זהה לטבלה שחושבה בתהליך אחד"""
+        serial = create_comprehensive_matching_table(profiles_df, tenders_df)
+        parallel = create_comprehensive_matching_table(profiles_df, tenders_df, workers=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    def test_parallel_export_same_bytes(self, profiles_df, tenders_df, tmp_path):
+        """טסט: ייצוא מקבילי של פרופילים לא ממוינים זהה לייצוא הטבלה המלאה"""
+        profiles_path = tmp_path / 'profiles.csv'
+        profiles_df.sample(frac=1, random_state=1).to_csv(profiles_path, index=False)
+
+        full = create_comprehensive_matching_table(pd.read_csv(profiles_path), tenders_df)
+        full = full.sort_values(['מספר_פרופיל', 'מספר_מכרז'])
+        full.to_csv(tmp_path / 'full.csv', index=False, encoding='utf-8-sig')
+
+        fragments = iter_rendered_matches(profiles_path, tenders_df, max_memory_mb=None, workers=2)
+        stats = write_rendered_matches(fragments, tmp_path / 'parallel.csv')
+
+        assert (tmp_path / 'parallel.csv').read_bytes() == (tmp_path / 'full.csv').read_bytes()
+        assert stats['total_matches'] == len(full)
+        assert stats['ordered']
+
+    def test_matching_algorithm_parallel_same_as_serial(self, profiles_df, tenders_df):
+        """טסט: טבלת ההתאמות של matching_algorithm זהה גם בחישוב מקבילי"""
+        serial = matching_algorithm.create_matching_table(profiles_df, tenders_df)
+        parallel = matching_algorithm.create_matching_table(profiles_df, tenders_df, workers=2)
+        assert list(parallel.pairs()) == list(serial.pairs())
+        pd.testing.assert_frame_equal(serial.to_dense(), parallel.to_dense())
+
+
+class TestIncrementalMatching:
+    """טסטים לעדכון טבלת ההתאמות רק עבור מכרזים שהשתנו"""
+
+    def full_table(self, profiles_path, tenders_df, output_path):
+        write_comprehensive_matches(iter_comprehensive_matches(profiles_path, tenders_df, None), output_path)
+        return output_path.read_bytes()
+
+    def test_diff_same_as_full_rebuild(self, profiles_df, tenders_df, tmp_path):
+        """טסט: עדכון לפי הפרש המכרזים זהה לבנייה מלאה של הטבלה"""
+        profiles_path = tmp_path / 'profiles.csv'
+        profiles_df.to_csv(profiles_path, index=False)
+        paths = dict(profiles_path=profiles_path, output_path=tmp_path / 'matches.csv',
+                     snapshot_path=tmp_path / 'snapshot.json')
+
+        first = update_comprehensive_matches(tenders_df.iloc[:30], **paths)
+        assert first['full_rebuild']
+
+        # הסרה, שינוי והוספה של מכרזים
+        new_tenders = tenders_df.drop(index=[2, 4]).copy()
+        new_tenders.loc[5, 'מי רשאי להגיש'] = 'כולם'
+        new_tenders.loc[6, 'עיר'] = 'עיר, "חדשה"'
+        result = update_comprehensive_matches(new_tenders, **paths)
+
+        assert not result['full_rebuild']
+        assert (result['added'], result['changed'], result['removed']) == (10, 2, 2)
+        assert paths['output_path'].read_bytes() == self.full_table(profiles_path, new_tenders, tmp_path / 'full.csv')
+
+    def test_numeric_ids_same_as_full_rebuild(self, profiles_df, tenders_df, tmp_path):
+        """טסט: עם מספרי פרופיל ומכרז שלמים הסדר הוא המספרי של הבנייה המלאה (2 לפני 10)"""
+        profiles_df['מספר_פרופיל'] = range(1, len(profiles_df) + 1)
+        tenders_df['מספר המכרז'] = range(1, len(tenders_df) + 1)
+        profiles_path = tmp_path / 'profiles.csv'
+        profiles_df.to_csv(profiles_path, index=False)
+        paths = dict(profiles_path=profiles_path, output_path=tmp_path / 'matches.csv',
+                     snapshot_path=tmp_path / 'snapshot.json')
+
+        update_comprehensive_matches(tenders_df.iloc[:30], **paths)
+        new_tenders = tenders_df.copy()
+        new_tenders.loc[1, 'מי רשאי להגיש'] = 'כולם'
+        result = update_comprehensive_matches(new_tenders, **paths)
+
+        assert not result['full_rebuild'] and result['rows_added'] > 0
+        assert paths['output_path'].read_bytes() == self.full_table(profiles_path, new_tenders, tmp_path / 'full.csv')
+
+    def test_no_changes_leaves_file(self, profiles_df, tenders_df, tmp_path):
+        """טסט: ללא שינויים בחוברת הקובץ אינו נכתב מחדש"""
+        profiles_path = tmp_path / 'profiles.csv'
+        profiles_df.to_csv(profiles_path, index=False)
+        paths = dict(profiles_path=profiles_path, output_path=tmp_path / 'matches.csv',
+                     snapshot_path=tmp_path / 'snapshot.json')
+
+        update_comprehensive_matches(tenders_df, **paths)
+        mtime = paths['output_path'].stat().st_mtime_ns
+        result = update_comprehensive_matches(tenders_df.copy(), **paths)
+
+        assert (result['added'], result['changed'], result['removed']) == (0, 0, 0)
+        assert paths['output_path'].stat().st_mtime_ns == mtime
+
+    def test_profile_change_rebuilds(self, profiles_df, tenders_df, tmp_path):
+        """טסט: שינוי בקובץ הפרופילים מחייב בנייה מלאה"""
+        profiles_path = tmp_path / 'profiles.csv'
+        profiles_df.to_csv(profiles_path, index=False)
+        paths = dict(profiles_path=profiles_path, output_path=tmp_path / 'matches.csv',
+                     snapshot_path=tmp_path / 'snapshot.json')
+
+        update_comprehensive_matches(tenders_df, **paths)
+        profiles_df.iloc[:40].to_csv(profiles_path, index=False)
+        result = update_comprehensive_matches(tenders_df, **paths)
+
+        assert result['full_rebuild']
+        assert paths['output_path'].read_bytes() == self.full_table(profiles_path, tenders_df, tmp_path / 'full.csv')
+
+
+class TestMatchingAlgorithmEngines:
+    """טסטים למנועים של matching_algorithm.create_matching_table"""
+
+    def test_grouped_same_table_as_iterrows(self, profiles_df, tenders_df):
+        """טסט: חישוב לפי מחלקות שקילות מחזיר טבלה זהה לכל הזוגות"""
+        reference = matching_algorithm.create_matching_table(profiles_df, tenders_df, engine='iterrows', dense=True)
+        result = matching_algorithm.create_matching_table(profiles_df, tenders_df, engine='grouped', dense=True)
+
+        assert len(result) == len(profiles_df) * len(tenders_df)
+        pd.testing.assert_frame_equal(reference, result)
+
+
+class TestSparseMatches:
+    """טסטים לייצוג הדליל של זוגות ההתאמה"""
+
+    def test_pairs_are_full_score_rows(self, profiles_df, tenders_df):
+        """טסט: הזוגות הדלילים הם בדיוק השורות עם ציון מלא בטבלה המלאה"""
+        sparse = matching_algorithm.create_matching_table(profiles_df, tenders_df)
+        dense = sparse.to_dense()
+        matched = dense[dense['score_סופי'] == 1.0]
+
+        assert sparse.profile_idx.dtype == np.int32
+        assert sparse.tender_idx.dtype == np.int32
+        assert list(sparse.pairs()) == list(zip(matched['profile_id'], matched['tender_id']))
+        pd.testing.assert_frame_equal(sparse.to_frame(), matched.reset_index(drop=True))
+
+    def test_filter_bits(self, profiles_df, tenders_df):
+        """טסט: שדה הביטים משחזר את עמודות המסננים, וניתן לוותר עליו"""
+        sparse = matching_algorithm.create_matching_table(profiles_df, tenders_df)
+        bits = sparse.pair_filter_bits()
+        dense = sparse.to_dense()
+
+        assert bits.dtype == np.uint8
+        assert bits.shape == (len(profiles_df), len(tenders_df))
+        assert (((bits.ravel() & matching_algorithm.AREA_PASSED) != 0) == (dense['עובר_אזור'] == 1.0)).all()
+
+        compact = matching_algorithm.create_matching_table(profiles_df, tenders_df, keep_filters=False)
+        assert list(compact.pairs()) == list(sparse.pairs())
+        with pytest.raises(ValueError):
+            compact.to_dense()
+
+    def test_compare_and_export(self, profiles_df, tenders_df, tmp_path):
+        """טסט: ההשוואה לטבלה הידנית וייצוא ה-CSV עובדים ישירות על הייצוג הדליל"""
+        sparse = matching_algorithm.create_matching_table(profiles_df, tenders_df)
+        sparse.to_csv(tmp_path / 'generated.csv')
+        manual = pd.read_csv(tmp_path / 'generated.csv')
+
+        assert len(manual) == len(sparse)
+        comparison = matching_algorithm.compare_with_manual_table(sparse, manual)
+        assert comparison['f1_score'] == 1.0
+        assert comparison['common_matches'] == len(sparse)
+
+
+# הרצת הטסטים
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+טסטים לטעינת קבצי המכרזים ולמטמון של ממשקי Streamlit
+"""
+
+import os
+import pickle
+from datetime import datetime
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import tender_data
+from tender_data import (
+    add_plot_counts,
+    add_tender_dates,
+    file_fingerprint,
+    file_hash,
+    format_israeli_dates,
+    has_priority_plots,
+    load_with_snapshot,
+    parse_plot_counts,
+    parse_priority_plots,
+    parse_tender_dates,
+    read_tender_table,
+    snapshot_path
+)
+from ui_data import get_tender_store, load_answer_table
+from test_matching_engines import make_tenders
+
+
+def write_tenders(path, tenders_df, mtime_ns=None):
+    """כתיבת טבלת מכרזים לקובץ CSV וקביעת זמן השינוי שלו"""
+    tenders_df.to_csv(path, index=False)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestFileFingerprint:
+    """טסטים לטביעת האצבע של קובץ נתונים"""
+    
+    def test_fingerprint_fields(self, tmp_path):
+        """טסט: טביעת האצבע כוללת נתיב, זמן שינוי וגיבוב תוכן"""
+        path = tmp_path / 'tenders.csv'
+        write_tenders(path, make_tenders())
+        
+        fingerprint = file_fingerprint(path)
+        assert fingerprint == (str(path), os.stat(path).st_mtime_ns, file_hash(path))
+    
+    def test_fingerprint_changes_with_content(self, tmp_path):
+        """טסט: שינוי תוכן הקובץ משנה את טביעת האצבע גם באותו זמן שינוי"""
+        path = tmp_path / 'tenders.csv'
+        write_tenders(path, make_tenders(), mtime_ns=10**18)
+        before = file_fingerprint(path)
+        write_tenders(path, make_tenders().iloc[:10], mtime_ns=10**18)
+        
+        assert file_fingerprint(path) != before
+    
+    def test_missing_file(self, tmp_path):
+        """טסט: קובץ חסר מעלה FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            file_fingerprint(tmp_path / 'missing.xlsx')
+    
+    def test_read_csv_and_excel(self, tmp_path):
+        """טסט: קריאת טבלת מכרזים מקובץ CSV ומחוברת Excel"""
+        tenders_df = make_tenders()
+        tenders_df.to_csv(tmp_path / 'tenders.csv', index=False)
+        tenders_df.to_excel(tmp_path / 'tenders.xlsx', index=False)
+        
+        assert read_tender_table(tmp_path / 'tenders.csv')['מספר המכרז'].tolist() == tenders_df['מספר המכרז'].tolist()
+        assert read_tender_table(tmp_path / 'tenders.xlsx')['מספר המכרז'].tolist() == tenders_df['מספר המכרז'].tolist()
+
+
+class TestSnapshots:
+    """טסטים לקבצי ה-snapshot הבינאריים של טבלאות המקור"""
+    
+    def counting_parser(self, calls):
+        def parser(path):
+            calls.append(path)
+            return tender_data.parse_tender_table(path)
+        return parser
+    
+    def test_round_trip_keeps_dtypes(self, tmp_path):
+        """טסט: טעינה מה-snapshot זהה לקריאת החוברת, כולל עמודות מעורבות של תאריכים וטקסט"""
+        tenders_df = make_tenders()
+        tenders_df['מועד אחרון להגשת הצעות'] = tenders_df['מועד אחרון להגשת הצעות'].astype(object)
+        tenders_df.loc[3, 'מועד אחרון להגשת הצעות'] = 'בוטל'
+        tenders_df.to_excel(tmp_path / 'tenders.xlsx', index=False)
+        
+        parsed = tender_data.parse_tender_table(tmp_path / 'tenders.xlsx')
+        read_tender_table(tmp_path / 'tenders.xlsx')
+        assert snapshot_path(tmp_path / 'tenders.xlsx', tender_data.SNAPSHOT_DIR).exists()
+        pd.testing.assert_frame_equal(read_tender_table(tmp_path / 'tenders.xlsx'), parsed)
+    
+    def test_parsed_once_and_rebuilt_on_change(self, tmp_path):
+        """טסט: המקור נקרא פעם אחת, ונקרא מחדש רק כשהתוכן שלו משתנה"""
+        path = tmp_path / 'tenders.csv'
+        write_tenders(path, make_tenders())
+        calls = []
+        parser = self.counting_parser(calls)
+        
+        load_with_snapshot(path, parser)
+        load_with_snapshot(path, parser)
+        assert len(calls) == 1
+        
+        # עדכון זמן ללא שינוי תוכן אינו מחייב קריאה מחדש
+        os.utime(path, ns=(os.stat(path).st_mtime_ns + 10**9,) * 2)
+        load_with_snapshot(path, parser)
+        assert len(calls) == 1
+        
+        write_tenders(path, make_tenders().iloc[:5])
+        assert len(load_with_snapshot(path, parser)) == 5
+        assert len(calls) == 2
+    
+    def test_corrupt_snapshot_is_replaced(self, tmp_path):
+        """טסט: קובץ snapshot פגום נבנה מחדש מהמקור"""
+        path = tmp_path / 'tenders.csv'
+        write_tenders(path, make_tenders())
+        read_tender_table(path)
+        # טקסט שאינו pickle, pickle שנקטע, ו-pickle תקין שאינו snapshot
+        for payload in [b'not a pickle', pickle.dumps({'version': 1})[:5], b'\x80\x05\x95\xff\xff\xff\xff\xff\xff\xff\xff',
+                        pickle.dumps([1, 2]), pickle.dumps({'version': tender_data.SNAPSHOT_VERSION})]:
+            snapshot_path(path, tender_data.SNAPSHOT_DIR).write_bytes(payload)
+            assert len(read_tender_table(path)) == len(make_tenders())
+
+
+class TestTenderDates:
+    """טסטים לפענוח ולעיצוב של עמודות התאריכים"""
+    
+    def test_parse_mixed_cells(self):
+        """טסט: תאים מסוג datetime וטקסט בפורמטים שונים מפוענחים לאותו תאריך"""
+        cells = pd.Series([datetime(2025, 10, 20, 12, 0), ' 20/10/2025  12:00:00', '2025-10-20 12:00:00',
+                           '.20/10/2025  12:00:00'], dtype=object)
+        
+        parsed = parse_tender_dates(cells)
+        assert parsed.dtype == 'datetime64[ns]'
+        assert (parsed == pd.Timestamp('2025-10-20 12:00')).all()
+    
+    def test_iso_text_is_not_day_first(self):
+        """טסט: תאריך בפורמט ISO אינו מתפרש כיום-חודש"""
+        parsed = parse_tender_dates(pd.Series(['2025-06-10 00:00:00', '4.8.2025'], dtype=object))
+        assert parsed.tolist() == [pd.Timestamp('2025-06-10'), pd.Timestamp('2025-08-04')]
+    
+    def test_format_israeli_dates(self):
+        """טסט: עיצוב DD.M.YYYY בשעה HH:MM, וטקסט המקור כאשר אין תאריך"""
+        cells = pd.Series([datetime(2025, 9, 1, 12, 0), 'בוטל', np.nan, 'לא צוין'], dtype=object)
+        
+        formatted = format_israeli_dates(parse_tender_dates(cells), cells)
+        assert formatted.tolist() == ['1.9.2025 בשעה 12:00', 'בוטל', 'לא צוין', 'לא צוין']
+    
+    def test_dates_parsed_at_load(self, tmp_path):
+        """טסט: טבלת המכרזים נטענת עם עמודות התאריכים המפוענחות והמעוצבות"""
+        tenders_df = make_tenders()
+        write_tenders(tmp_path / 'tenders.csv', tenders_df)
+        
+        loaded = read_tender_table(tmp_path / 'tenders.csv')
+        assert loaded['deadline'].dtype == 'datetime64[ns]'
+        assert loaded['deadline_text'].tolist() == add_tender_dates(tenders_df)['deadline_text'].tolist()
+
+
+class TestPlotCounts:
+    """טסטים לפענוח מספרי המגרשים מהטקסט"""
+    
+    def test_plots_and_units(self):
+        """טסט: מספר מגרשים ויחידות דיור מתוך הפורמטים השונים בטבלה"""
+        cells = pd.Series(['4 מגרשים (6 יח"ד)', '1 מגרש (1 יח"ד)', '1,044 יח"ד', '40 מגרשים',
+                           '66 מגרשים (לבניית 110 יח"ד)', '6 יח״ד', 'בוטל', np.nan])
+        
+        plots, units = parse_plot_counts(cells)
+        assert plots.dtype == 'Int64' and units.dtype == 'Int64'
+        assert plots.tolist() == [4, 1, pd.NA, 40, 66, pd.NA, pd.NA, pd.NA]
+        assert units.tolist() == [6, 1, 1044, pd.NA, 110, 6, pd.NA, pd.NA]
+    
+    def test_priority_plots(self):
+        """טסט: 'כל המגרשים' מונה את כל מגרשי המכרז, 'לא רלוונטי' מונה אפס, ויח"ד אינן נספרות כמגרשים"""
+        cells = pd.Series(['כל המגרשים', 'לא רלוונטי', '2 יח"ד', 150, '132 מגרשים', 'בוטל', np.nan], dtype=object)
+        plot_count = pd.Series([5, 5, 5, 150, 4, pd.NA, 5], dtype='Int64')
+        housing_units = pd.Series([8, 8, 8, 150, 528, pd.NA, 5], dtype='Int64')
+        
+        plots, units, all_plots = parse_priority_plots(cells, plot_count, housing_units)
+        assert plots.tolist() == [5, 0, pd.NA, 150, 132, pd.NA, pd.NA]
+        assert units.tolist() == [8, 0, 2, pd.NA, pd.NA, pd.NA, pd.NA]
+        assert all_plots.tolist() == [True, False, False, False, False, False, False]
+    
+    def test_all_plots_of_units_only_tender(self):
+        """טסט: מכרז שרשום רק ביח"ד ('308 יח"ד') עם 'כל המגרשים' שומר את התג ואת מספר היח"ד"""
+        tenders_df = make_tenders().iloc[:3].copy()
+        tenders_df['מספר מגרשים'] = ['308 יח"ד', '1,044 יח"ד', '6 יח״ד']
+        tenders_df['כמה מגרשים בעדיפות בהגרלה לנכי צה"ל'] = ['כל המגרשים', 'כל המגרשים', 'לא רלוונטי']
+        tenders_df['כמה מגרשים בעדיפות בהגרלה לחיילי מילואים'] = ['כל המגרשים', 'לא רלוונטי', 'כל המגרשים']
+        
+        counted = add_plot_counts(tenders_df)
+        assert counted['disabled_priority_units'].tolist() == [308, 1044, 0]
+        assert counted['miluim_priority_units'].tolist() == [308, 0, 6]
+        badges = [[has_priority_plots(tender, 'disabled_priority_all', 'disabled_priority_plots', 'disabled_priority_units'),
+                   has_priority_plots(tender, 'miluim_priority_all', 'miluim_priority_plots', 'miluim_priority_units')]
+                  for tender in counted.to_dict('records')]
+        assert badges == [[True, True], [True, False], [False, True]]
+    
+    def test_counts_parsed_at_load(self, tmp_path):
+        """טסט: טבלת המכרזים נטענת עם עמודות מספרי המגרשים"""
+        tenders_df = make_tenders()
+        write_tenders(tmp_path / 'tenders.csv', tenders_df)
+        
+        loaded = read_tender_table(tmp_path / 'tenders.csv')
+        assert loaded['plot_count'].tolist() == add_plot_counts(tenders_df)['plot_count'].tolist()
+        assert loaded['plot_count'].sum() == sum(range(1, len(tenders_df) + 1))
+
+
+class TestCachedAnswerTable:
+    """טסטים לטעינה השמורה במטמון של טבלת התשובות"""
+    
+    def test_parsed_once(self, tmp_path):
+        """טסט: קריאות חוזרות מחזירות את אותה טבלה ללא קריאה מחדש של הקובץ"""
+        path = tmp_path / 'tenders.csv'
+        write_tenders(path, make_tenders())
+        
+        assert load_answer_table(path) is load_answer_table(path)
+    
+    def test_invalidated_when_file_changes(self, tmp_path):
+        """טסט: שינוי בקובץ בונה גרסה חדשה של הטבלה"""
+        path = tmp_path / 'tenders.csv'
+        write_tenders(path, make_tenders())
+        first = load_answer_table(path)
+        write_tenders(path, make_tenders().iloc[:10], mtime_ns=os.stat(path).st_mtime_ns + 10**9)
+        
+        # הבדיקה שהצופה ברקע מבצע מדי פעם
+        assert get_tender_store(path).check_for_update()
+        second = load_answer_table(path)
+        assert second is not first
+        assert len(second.tenders_df) == 10
+
+
+# הרצת הטסטים
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
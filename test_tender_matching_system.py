@@ -449,6 +449,180 @@ class TestUIComponents:
         assert len(matches) == 0
         assert len(errors) > 0
         assert any('קובץ הנתונים לא נמצא' in error for error in errors)
+    
+    def test_results_table_view(self):
+        """טסט: תצוגת הטבלה מכילה את כל המכרזים, עם מספרי מגרשים ומועד כערכים מספריים"""
+        from tender_ui_streamlit import build_results_table, build_tender_display_table
+        
+        tenders_df = pd.DataFrame([
+            {
+                'מספר המכרז': f'T00{i}',
+                'עיר': 'תל אביב',
+                'שכונה': 'רמת אביב',
+                'אזור גיאוגרפי ': 'מרכז',
+                'מספר מגרשים': f'{i + 4} מגרשים ({i + 6} יח"ד)',
+                'כמה מגרשים בעדיפות בהגרלה לנכי צה"ל': 'כל המגרשים',
+                'כמה מגרשים בעדיפות בהגרלה לחיילי מילואים': 'לא רלוונטי',
+                'תאריך פרסום חוברת': '2024-01-01',
+                'מועד אחרון להגשת הצעות': '2024-02-01 12:00:00',
+                'אזור עדיפות': 'A',
+                'מי רשאי להגיש': 'חיילי מילואים',
+                'סטטוס דיור נדרש': 'לא צוין',
+                'קישור למכרז ': 'https://apps.land.gov.il/MichrazimSite/#/michraz/1'
+            }
+            for i in range(3)
+        ])
+        
+        table = build_results_table(build_tender_display_table(tenders_df, np.arange(3)))
+        
+        assert len(table) == 3
+        assert table['מגרשים'].tolist() == [4, 5, 6]
+        assert table['מגרשים לנכי צה"ל'].tolist() == [4, 5, 6]
+        assert table['מגרשים לחיילי מילואים'].tolist() == [0, 0, 0]
+        assert (table['מועד אחרון להגשה'] == pd.Timestamp('2024-02-01 12:00')).all()
+    
+    def test_card_fragments(self):
+        """טסט: תוכן כרטיס המכרז נבנה מראש מהשורה בלבד"""
+        from tender_ui_streamlit import build_card_fragments, build_tender_display_table
+        
+        tenders_df = pd.DataFrame([{
+            'מספר המכרז': 'T001',
+            'עיר': 'תל אביב',
+            'שכונה': np.nan,
+            'אזור גיאוגרפי ': 'מרכז',
+            'מספר מגרשים': '4 מגרשים (6 יח"ד)',
+            'כמה מגרשים בעדיפות בהגרלה לנכי צה"ל': 'כל המגרשים',
+            'כמה מגרשים בעדיפות בהגרלה לחיילי מילואים': 'לא רלוונטי',
+            'תאריך פרסום חוברת': '2024-01-01',
+            'מועד אחרון להגשת הצעות': '2024-02-01 12:00:00',
+            'אזור עדיפות': 'B',
+            'מי רשאי להגיש': 'חיילי מילואים',
+            'סטטוס דיור נדרש': 'לא צוין',
+            'קישור למכרז ': np.nan
+        }])
+        tender = build_tender_display_table(tenders_df, [0]).iloc[0]
+        
+        fragments = build_card_fragments(tender)
+        assert fragments['header'] == "🏆 מכרז #T001 | 📍 תל אביב • מרכז"
+        assert fragments['priority'] == ('warning', "⚡ עדיפות ב'")
+        assert fragments['miluim'] is None
+        assert 'כל המגרשים' in fragments['disability']
+        assert fragments['deadline'] == "⏰ **מועד אחרון:** 1.2.2024 בשעה 12:00"
+        assert fragments['housing'] == "🏠 **דרישת דיור:** עדיפות לחסרי דיור"
+        assert 'https://apps.land.gov.il/MichrazimSite/#/search' in fragments['link']
+    
+    def test_session_keeps_positions_only(self, tmp_path):
+        """טסט: החיפוש מחזיר מיקומים מסוג int32 שמהם נבנית טבלת התצוגה"""
+        from tender_store import TenderStore
+        from tender_ui_streamlit import build_tender_display_table, find_matching_positions, find_matching_tenders
+        from test_matching_engines import make_tenders
+        
+        path = tmp_path / 'tenders.csv'
+        make_tenders().to_csv(path, index=False)
+        tender_version = TenderStore(path).current
+        profile_data = {
+            'ימי_מילואים_מ-7.10.23': 60,
+            'תעודת_מילואים_פעיל': 'לא',
+            'ימי_מילואים_ב-6_שנים': 0,
+            'סיווג_נכות': '',
+            'חסר_דיור': 'כן',
+            'אזור_מועדף': 'דרום',
+            'בן/בת_זוג_זכאי': 'לא'
+        }
+        
+        version, positions, errors = find_matching_positions(profile_data, tender_version)
+        matches, _ = find_matching_tenders(profile_data, tender_version)
+        
+        assert version is tender_version and errors == []
+        assert positions.dtype == np.int32 and len(positions) > 0
+        pd.testing.assert_frame_equal(build_tender_display_table(version.tenders_df, positions), matches)
+    
+    def test_identical_searches_cached(self, tmp_path):
+        """טסט: חיפוש זהה באותה גרסת נתונים מוחזר מהמטמון המשותף"""
+        from tender_store import TenderStore
+        from tender_ui_streamlit import find_matching_positions, find_matching_tenders
+        from test_matching_engines import make_tenders
+        from ui_data import get_match_cache
+        
+        path = tmp_path / 'tenders.csv'
+        make_tenders().to_csv(path, index=False)
+        tender_version = TenderStore(path).current
+        profile_data = {
+            'ימי_מילואים_מ-7.10.23': 60,
+            'תעודת_מילואים_פעיל': 'לא',
+            'ימי_מילואים_ב-6_שנים': 0,
+            'סיווג_נכות': '',
+            'חסר_דיור': 'כן',
+            'אזור_מועדף': 'צפון',
+            'בן/בת_זוג_זכאי': 'לא'
+        }
+        hits = get_match_cache().stats()['hits']
+        
+        matches, _ = find_matching_tenders(profile_data, tender_version)
+        _, positions, _ = find_matching_positions({**profile_data, 'ימי_מילואים_מ-7.10.23': 100}, tender_version)
+        again, _ = find_matching_tenders(profile_data, tender_version)
+        
+        assert again is matches and len(positions) == len(matches) > 0
+        assert get_match_cache().stats()['hits'] == hits + 2
+    
+    def test_explicit_as_of_not_cached(self, tmp_path):
+        """טסט: חיפוש לתאריך מסוים מחושב לפי התאריך ואינו מוחזר מהמטמון"""
+        from tender_store import TenderStore
+        from tender_ui_streamlit import AS_OF_NOW, find_matching_tenders
+        from test_matching_engines import make_tenders
+        from ui_data import get_match_cache
+        
+        path = tmp_path / 'tenders.csv'
+        make_tenders().to_csv(path, index=False)
+        tender_version = TenderStore(path).current
+        profile_data = {
+            'ימי_מילואים_מ-7.10.23': 60,
+            'תעודת_מילואים_פעיל': 'לא',
+            'ימי_מילואים_ב-6_שנים': 0,
+            'סיווג_נכות': '',
+            'חסר_דיור': 'כן',
+            'אזור_מועדף': 'צפון',
+            'בן/בת_זוג_זכאי': 'לא'
+        }
+        
+        early, _ = find_matching_tenders(profile_data, tender_version, as_of=pd.Timestamp('2025-01-01'))
+        late, _ = find_matching_tenders(profile_data, tender_version, as_of=pd.Timestamp('2030-01-01'))
+        assert len(early) > 0 and len(late) == 0
+        
+        # מועדי ההגשה בנתוני הבדיקה עברו, כך שגם "עכשיו" אינו מחזיר מכרזים, ופעם שנייה מגיעה מהמטמון
+        hits = get_match_cache().stats()['hits']
+        now, _ = find_matching_tenders(profile_data, tender_version, as_of=AS_OF_NOW)
+        assert len(now) == 0 and find_matching_tenders(profile_data, tender_version, as_of=AS_OF_NOW)[0] is now
+        assert get_match_cache().stats()['hits'] == hits + 1
+    
+    def test_session_matches_from_stored_positions(self, tmp_path):
+        """טסט: שורות החיפוש השמור נבנות מהגרסה והמיקומים שבסשן, וחיפוש חוזר רק כשהגרסה הוסרה"""
+        from types import SimpleNamespace
+        import tender_ui_streamlit
+        from tender_store import TenderStore
+        from test_matching_engines import make_tenders
+        
+        path = tmp_path / 'tenders.csv'
+        make_tenders().to_csv(path, index=False)
+        tender_version = TenderStore(path).current
+        positions = np.array([4, 1, 7], dtype=np.int32)
+        session_state = SimpleNamespace(tender_version=tender_version.number, match_positions=positions,
+                                        profile_data={})
+        store = SimpleNamespace(get=lambda number: tender_version if number == tender_version.number else None)
+        searched = (tender_version, (np.array([2], dtype=np.int32), pd.DataFrame({'x': [1]})), [])
+        
+        with patch.object(tender_ui_streamlit.st, 'session_state', session_state), \
+             patch.object(tender_ui_streamlit, 'get_tender_store', lambda path: store), \
+             patch.object(tender_ui_streamlit, 'match_tenders', MagicMock(return_value=searched)) as match_tenders:
+            matches = tender_ui_streamlit.load_session_matches()
+            expected = tender_ui_streamlit.build_tender_display_table(tender_version.tenders_df, positions)
+            pd.testing.assert_frame_equal(matches, expected)
+            assert not match_tenders.called
+            
+            session_state.tender_version = tender_version.number + 1
+            assert tender_ui_streamlit.load_session_matches() is searched[1][1]
+            assert session_state.match_positions.tolist() == [2]
+            assert match_tenders.call_args.kwargs['as_of'] == tender_ui_streamlit.AS_OF_NOW
 
 
 class TestPerformance:
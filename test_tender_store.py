@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+טסטים למערכי המכרזים המשותפים בין תהליכי השרת
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from create_comprehensive_matches import PROFILE_CATEGORIES, TenderAnswerTable, TenderAreaIndex
+from tender_store import (
+    ResultCache,
+    SharedTenderArrays,
+    TenderStore,
+    build_answer_table,
+    build_tender_arrays,
+    publish_tender_arrays
+)
+from tender_data import CLOSED_DEADLINE
+from test_matching_engines import make_tenders
+
+AREAS = ['דרום', 'צפון', 'ירושלים', 'מרכז', 'יהודה ושומרון', 'בוטל', 'חו"ל']
+
+
+class TestTenderArrays:
+    """טסטים לבניית מערכי המכרזים"""
+    
+    def test_deadlines_and_missing_areas(self):
+        """טסט: מועד ריק או לא מובן הופך ל-NaT, רק מכרז שבוטל נחשב סגור, ומכרז ללא אזור מקבל קוד 1-"""
+        tenders_df = make_tenders()
+        tenders_df['מועד אחרון להגשת הצעות'] = tenders_df['מועד אחרון להגשת הצעות'].astype(object)
+        tenders_df.loc[0, 'מועד אחרון להגשת הצעות'] = ' 20/10/2025  12:00:00'
+        tenders_df.loc[1, 'מועד אחרון להגשת הצעות'] = 'בוטל'
+        tenders_df.loc[2, 'מועד אחרון להגשת הצעות'] = np.nan
+        tenders_df.loc[3, 'מועד אחרון להגשת הצעות'] = '31/02/2025'
+        records, area_names = build_tender_arrays(tenders_df)
+        
+        assert records['deadline'][0] == np.datetime64('2025-10-20T12:00')
+        assert records['deadline'][1] == CLOSED_DEADLINE
+        assert np.isnat(records['deadline'][2]) and np.isnat(records['deadline'][3])
+        assert (records['area_code'][tenders_df['אזור גיאוגרפי '].isna().to_numpy()] == -1).all()
+        assert 'nan' not in area_names
+    
+    def test_plot_counts(self):
+        """טסט: מספרי המגרשים נשמרים כמספרים, ו-1- כאשר אין מספר"""
+        tenders_df = make_tenders()
+        tenders_df.loc[1, 'מספר מגרשים'] = 'בוטל'
+        records, _ = build_tender_arrays(tenders_df)
+        
+        assert records['plot_count'][0] == 1 and records['housing_units'][0] == 1
+        assert records['plot_count'][1] == -1
+        assert records['disabled_priority_all'][0] and records['disabled_priority_plots'][0] == 1
+        assert records['miluim_priority_plots'][1] == 0
+        assert records['miluim_priority_plots'][2] == -1 and records['miluim_priority_units'][2] == 3
+
+
+class TestSharedTenderArrays:
+    """טסטים לחיבור למערכים המשותפים ולהחלפת גרסה"""
+    
+    def test_same_answers_as_index(self, tmp_path):
+        """טסט: ההתאמה מול המערכים המשותפים זהה לאינדקס המקומי"""
+        tenders_df = make_tenders()
+        publish_tender_arrays(tenders_df, tmp_path)
+        shared = SharedTenderArrays(tmp_path, tenders_df)
+        index = TenderAreaIndex(tenders_df)
+        
+        assert isinstance(shared.records, np.memmap)
+        for area in AREAS:
+            for category in PROFILE_CATEGORIES:
+                for housing_need in ['כן', 'לא']:
+                    assert (shared.match_positions(area, category, housing_need).tolist() ==
+                            index.match_positions(area, category, housing_need).tolist())
+        assert TenderAnswerTable(shared).answers.keys() == TenderAnswerTable(index).answers.keys()
+    
+    def test_publish_swaps_version(self, tmp_path):
+        """טסט: פרסום גרסה חדשה אינו משפיע על תהליך שמחובר לגרסה הקודמת עד לרענון"""
+        old_tenders = make_tenders()
+        new_tenders = make_tenders().iloc[:10]
+        old_version = publish_tender_arrays(old_tenders, tmp_path)
+        shared = SharedTenderArrays(tmp_path)
+        
+        new_version = publish_tender_arrays(new_tenders, tmp_path, keep=1)
+        assert new_version != old_version
+        assert not (tmp_path / f"tenders-{old_version}.npy").exists()
+        assert len(shared.records) == len(old_tenders)
+        
+        assert shared.refresh() == new_version
+        assert len(shared.records) == len(new_tenders)
+    
+    def test_attach_to_published_version(self, tmp_path, monkeypatch):
+        """טסט: תהליך מתחבר לגרסה שהוא עצמו פרסם גם אם CURRENT כבר מצביע על פרסום של תהליך אחר"""
+        import ui_data
+        
+        tenders_df, other_tenders = make_tenders(), make_tenders().iloc[:10]
+        version = publish_tender_arrays(tenders_df, tmp_path)
+        publish_tender_arrays(other_tenders, tmp_path)
+        assert len(SharedTenderArrays(tmp_path, tenders_df, version).records) == len(tenders_df)
+        
+        def publish_then_other(tenders_df, shared_dir):
+            published = publish_tender_arrays(tenders_df, shared_dir)
+            publish_tender_arrays(other_tenders, shared_dir)
+            return published
+        
+        path = tmp_path / 'tenders.csv'
+        tenders_df.to_csv(path, index=False)
+        monkeypatch.setattr(ui_data, 'SHARED_DIR', str(tmp_path / 'shared'))
+        monkeypatch.setattr(ui_data, 'publish_tender_arrays', publish_then_other)
+        answer_table = ui_data._build_answer_table(path)
+        assert len(answer_table.tender_index.records) == len(tenders_df)
+    
+    def test_republish_same_data(self, tmp_path):
+        """טסט: פרסום חוזר של אותם נתונים מחזיר את אותה גרסה"""
+        assert publish_tender_arrays(make_tenders(), tmp_path) == publish_tender_arrays(make_tenders(), tmp_path)
+        assert len(list(tmp_path.glob('tenders-*.npy'))) == 1
+    
+    def test_different_table_rejected(self, tmp_path):
+        """טסט: חיבור עם טבלת תצוגה שאינה תואמת לגרסה המפורסמת נכשל"""
+        publish_tender_arrays(make_tenders(), tmp_path)
+        with pytest.raises(ValueError):
+            SharedTenderArrays(tmp_path, make_tenders().iloc[:5])
+
+
+def rewrite_tenders(path, tenders_df):
+    """כתיבה מחדש של קובץ המכרזים עם זמן שינוי מאוחר יותר"""
+    mtime_ns = os.stat(path).st_mtime_ns + 10**9 if path.exists() else None
+    tenders_df.to_csv(path, index=False)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestTenderStore:
+    """טסטים לטעינה מחדש של נתוני המכרזים כגרסאות"""
+    
+    def test_new_version_on_change(self, tmp_path):
+        """טסט: שינוי בקובץ יוצר גרסה חדשה והגרסה הקודמת נשמרת ללא שינוי"""
+        path = tmp_path / 'tenders.csv'
+        rewrite_tenders(path, make_tenders())
+        store = TenderStore(path)
+        first = store.current
+        
+        assert not store.check_for_update()
+        rewrite_tenders(path, make_tenders().iloc[:10])
+        assert store.check_for_update()
+        
+        assert store.current.number == first.number + 1
+        assert len(store.current.tenders_df) == 10
+        assert store.get(first.number) is first
+        assert len(first.tenders_df) == len(make_tenders())
+    
+    def test_old_versions_evicted(self, tmp_path):
+        """טסט: נשמרות רק הגרסאות האחרונות"""
+        path = tmp_path / 'tenders.csv'
+        rewrite_tenders(path, make_tenders())
+        store = TenderStore(path, keep_versions=2)
+        for count in [30, 20, 10]:
+            rewrite_tenders(path, make_tenders().iloc[:count])
+            store.check_for_update()
+        
+        assert store.current.number == 4
+        assert store.get(1) is None
+        assert store.get(3) is not None
+    
+    def test_failed_reload_keeps_current(self, tmp_path):
+        """טסט: קובץ פגום אינו מחליף את הגרסה הנוכחית"""
+        path = tmp_path / 'tenders.xlsx'
+        make_tenders().to_excel(path, index=False)
+        store = TenderStore(path)
+        first = store.current
+        path.write_bytes(b'partially written workbook')
+        
+        assert not store.check_for_update()
+        assert store.current is first
+        assert store.last_error is not None
+    
+    def test_reads_do_not_wait_for_reload(self, tmp_path):
+        """טסט: קריאת הגרסה הנוכחית אינה ממתינה לבנייה של גרסה חדשה"""
+        path = tmp_path / 'tenders.csv'
+        rewrite_tenders(path, make_tenders())
+        building, release = threading.Event(), threading.Event()
+        
+        def slow_build(build_path):
+            if store_ready.is_set():
+                building.set()
+                release.wait(5)
+            return build_answer_table(build_path)
+        
+        store_ready = threading.Event()
+        store = TenderStore(path, build=slow_build)
+        store_ready.set()
+        rewrite_tenders(path, make_tenders().iloc[:10])
+        reload = threading.Thread(target=store.check_for_update)
+        reload.start()
+        assert building.wait(5)
+        
+        # בזמן שהבנייה תקועה, החיפוש ממשיך לקבל את הגרסה הקודמת
+        assert store.current.number == 1
+        release.set()
+        reload.join()
+        assert store.current.number == 2
+    
+    def test_sweep_drops_expired_tenders(self, tmp_path):
+        """טסט: ניקוי מכרזים שפג תוקפם יוצר גרסה חדשה רק כשיש מה לנקות"""
+        path = tmp_path / 'tenders.csv'
+        rewrite_tenders(path, make_tenders())
+        store = TenderStore(path)
+        first = store.current
+        
+        assert not store.sweep(as_of='2025-08-01')
+        assert store.sweep(as_of='2025-09-15')
+        assert store.current.number == first.number + 1
+        assert store.current.fingerprint == first.fingerprint
+        assert store.current.answer_table.deadline_index.expired_count('2025-09-15') == 0
+        assert not store.sweep(as_of='2025-09-15')
+        # אין שינוי בקובץ, ולכן אין טעינה מחדש
+        assert not store.check_for_update()
+    
+    def test_watcher_picks_up_changes(self, tmp_path):
+        """טסט: הצופה ברקע מחליף גרסה לאחר שינוי בקובץ"""
+        path = tmp_path / 'tenders.csv'
+        rewrite_tenders(path, make_tenders())
+        store = TenderStore(path, poll_interval=0.02).start()
+        try:
+            rewrite_tenders(path, make_tenders().iloc[:10])
+            deadline = time.monotonic() + 5
+            while store.current.number == 1 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert store.current.number == 2
+        finally:
+            store.stop()
+
+
+class TestResultCache:
+    """טסטים למטמון התוצאות"""
+    
+    def test_hits_and_lru_eviction(self):
+        """טסט: תוצאה מחושבת פעם אחת, והוותיקה ביותר בשימוש נזרקת ראשונה"""
+        cache = ResultCache(maxsize=2)
+        calls = []
+        compute = lambda key: lambda: calls.append(key) or key.upper()
+        
+        assert cache.get_or_compute('a', compute('a')) == 'A'
+        assert cache.get_or_compute('a', compute('a')) == 'A'
+        cache.get_or_compute('b', compute('b'))
+        cache.get_or_compute('a', compute('a'))
+        cache.get_or_compute('c', compute('c'))
+        cache.get_or_compute('a', compute('a'))
+        cache.get_or_compute('b', compute('b'))
+        
+        assert calls == ['a', 'b', 'c', 'b']
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (3, 4, 2, 2)
+    
+    def test_ttl(self):
+        """טסט: תוצאה שפג תוקפה מחושבת מחדש"""
+        now = [0.0]
+        cache = ResultCache(ttl=10, clock=lambda: now[0])
+        calls = []
+        compute = lambda: calls.append(now[0]) or len(calls)
+        
+        assert cache.get_or_compute('key', compute) == 1
+        now[0] = 9.5
+        assert cache.get_or_compute('key', compute) == 1
+        now[0] = 10.5
+        assert cache.get_or_compute('key', compute) == 2
+        assert calls == [0.0, 10.5]
+    
+    def test_concurrent_requests_coalesce(self):
+        """טסט: בקשות זהות במקביל מחכות לחישוב אחד"""
+        cache = ResultCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+                   for _ in range(8)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while cache.coalesced < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        assert len(calls) == 1
+        assert results == ['result'] * 8
+        assert (cache.misses, cache.coalesced) == (1, 7)
+    
+    def test_failure_not_cached(self):
+        """טסט: חישוב שנכשל אינו נשמר במטמון"""
+        cache = ResultCache()
+        
+        def fail():
+            raise ValueError("boom")
+        
+        with pytest.raises(ValueError):
+            cache.get_or_compute('key', fail)
+        assert cache.get_or_compute('key', lambda: 'ok') == 'ok'
+        assert cache.stats()['size'] == 1
+
+
+# הרצת הטסטים
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
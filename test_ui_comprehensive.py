@@ -28,6 +28,7 @@ from create_comprehensive_matches import (
     check_housing_match,
     create_comprehensive_matching_table
 )
+from tender_data import read_profile_table, read_tender_table
 
 class TenderMatchingTestSuite:
     """חבילת בדיקות מקיפה למערכת התאמת מכרזים"""
@@ -76,11 +77,11 @@ class TenderMatchingTestSuite:
         
         try:
             # Load profiles
-            profiles_df = pd.read_csv('data/csv_output/טבלת הפרופילים.csv')
+            profiles_df = read_profile_table('data/csv_output/טבלת הפרופילים.csv')
             self.log_test("טעינת טבלת פרופילים", True, f"{len(profiles_df)} פרופילים")
             
             # Load tenders
-            tenders_df = pd.read_excel('data/טבלת מכרזים יולי 25.xlsx')
+            tenders_df = read_tender_table('data/טבלת מכרזים יולי 25.xlsx')
             self.log_test("טעינת טבלת מכרזים", True, f"{len(tenders_df)} מכרזים")
             
             # Load matches
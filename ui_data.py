@@ -0,0 +1,70 @@
+"""
+Tender data for the Streamlit apps.
+
+Each process keeps one TenderStore per tender file: the answer table for every
+(area, category, housing) key is built once per file version by a background watcher,
+so a search is a dictionary lookup on the current version and never waits for a reload.
+The same watcher sweeps tenders out of the answers once their deadline has passed.
+Search results are cached per version and matching key, so identical searches from many
+sessions are computed once.
+
+When TENDER_SHARED_DIR is set, the tender arrays are published to that directory and the
+answers are computed from the shared memory-mapped copy instead of a per-process index.
+The mode is scoped to those matching arrays and does not keep memory flat as processes
+are added: each process still parses the file and keeps its own display table, answer
+arrays and cached results, and the interpreter with pandas and Streamlit dominates its
+memory. See tender_store for measured figures.
+"""
+
+import os
+
+import streamlit as st
+
+from create_comprehensive_matches import TenderAnswerTable, TenderAreaIndex
+from tender_data import read_tender_table
+from tender_store import ResultCache, SharedTenderArrays, TenderStore, publish_tender_arrays
+
+SHARED_DIR = os.environ.get('TENDER_SHARED_DIR')
+
+# A version has at most a few dozen matching keys; results of retired versions age out
+MATCH_CACHE_SIZE = 512
+MATCH_CACHE_TTL = 600.0
+
+def _build_answer_table(path):
+    """Parse a tender file and materialize its answers, through the shared arrays if enabled"""
+    tenders_df = read_tender_table(path)
+    if SHARED_DIR:
+        # Publishing is content-addressed, so every process seeing this file version agrees;
+        # attach to that version, not to CURRENT, which another process may have repointed
+        version = publish_tender_arrays(tenders_df, SHARED_DIR)
+        try:
+            shared = SharedTenderArrays(SHARED_DIR, tenders_df, version)
+        except FileNotFoundError:
+            # Another process's publishes pruned it in between; publishing writes it again
+            shared = SharedTenderArrays(SHARED_DIR, tenders_df, publish_tender_arrays(tenders_df, SHARED_DIR))
+        return TenderAnswerTable(shared)
+    return TenderAnswerTable(TenderAreaIndex(tenders_df))
+
+@st.cache_resource(show_spinner=False)
+def get_tender_store(path):
+    """The watched TenderStore of a tender file, one per process"""
+    return TenderStore(path, _build_answer_table, sweep_expired=True).start()
+
+# A module global rather than st.cache_resource: this module is imported once per process,
+# and the cache is consulted on every search, where st.cache_resource costs more than a hit
+_match_cache = ResultCache(maxsize=MATCH_CACHE_SIZE, ttl=MATCH_CACHE_TTL)
+
+def get_match_cache():
+    """Search results shared by every session of the process, see tender_store.ResultCache"""
+    return _match_cache
+
+def current_tender_version(path):
+    """The latest TenderVersion of a tender file; sessions pin it for their results"""
+    return get_tender_store(path).current
+
+def load_answer_table(path):
+    """TenderAnswerTable of the current version of a tender file.
+
+    The table is shared by every session and must be treated as read-only.
+    """
+    return current_tender_version(path).answer_table